@@ -0,0 +1,97 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Import time benchmark for silk_run start-up.
+
+Imports a module in a fresh interpreter with `-X importtime`, prints the
+slowest imports and exits with status 1 if the total exceeds the budget or a
+module that should load lazily was imported. `-X importtime` needs Python 3.7;
+on older versions the benchmark is skipped.
+
+Usage: python -m silk.benchmarks.import_time [-m MODULE] [-b BUDGET_MS] [-n TOP]
+"""
+
+import argparse
+import subprocess
+import sys
+
+DEFAULT_MODULE = "silk.tests.silk_run"
+DEFAULT_BUDGET_MS = 250
+LAZY_MODULES = ("django", "grpc", "pandas", "silk.tools.otns_manager")
+
+IMPORTTIME_SUPPORTED = sys.version_info >= (3, 7)
+
+
+def measure(module):
+    """Import module in a new interpreter.
+
+    Returns:
+        list: (cumulative_us, self_us, name) of every imported module, in import order.
+
+    Raises:
+        RuntimeError: the interpreter has no `-X importtime`.
+    """
+    if not IMPORTTIME_SUPPORTED:
+        raise RuntimeError("-X importtime needs Python 3.7 or later")
+
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             universal_newlines=True,
+                             check=True)
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        imports.append((int(cumulative_us), int(self_us), name.strip()))
+
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check silk start-up import time against a budget")
+    parser.add_argument("-m", "--module", default=DEFAULT_MODULE, help="module to import")
+    parser.add_argument("-b", "--budget", type=float, default=DEFAULT_BUDGET_MS, help="budget in milliseconds")
+    parser.add_argument("-n", "--top", type=int, default=15, help="number of slowest imports to print")
+    args = parser.parse_args()
+
+    if not IMPORTTIME_SUPPORTED:
+        print("Skipping import time benchmark: -X importtime needs Python 3.7 or later")
+        sys.exit(0)
+
+    imports = measure(args.module)
+    total_ms = next(cumulative for cumulative, _, name in imports if name == args.module) / 1000.0
+
+    for cumulative, self_us, name in sorted(imports, reverse=True)[:args.top]:
+        print("{0:>10.1f} ms {1:>10.1f} ms  {2}".format(cumulative / 1000.0, self_us / 1000.0, name))
+
+    loaded = sorted({name for _, _, name in imports if name.split(".")[0] in LAZY_MODULES or name in LAZY_MODULES})
+    print("Total import time of {0}: {1:.1f} ms (budget {2:.0f} ms)".format(args.module, total_ms, args.budget))
+
+    failed = False
+    if loaded:
+        print("Modules that should load lazily: {0}".format(", ".join(loaded)))
+        failed = True
+    if total_ms > args.budget:
+        print("Import time is over budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
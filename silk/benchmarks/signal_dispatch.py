@@ -0,0 +1,74 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Dispatch throughput benchmark for silk.utils.signal.
+
+Usage: python -m silk.benchmarks.signal_dispatch [-n LINES] [-s SUBSCRIBERS] [-b BATCH]
+"""
+
+import argparse
+import time
+
+from silk.utils import signal
+
+
+class CountingSubscriber(signal.Subscriber):
+    """Subscriber doing the minimum amount of work per line.
+    """
+
+    def __init__(self, publisher):
+        self.count = 0
+        super().__init__(publisher=publisher)
+
+    def subscribe_handle(self, sender, **kwargs):
+        self.count += 1
+
+
+def run(num_lines, num_subscribers, batch_size):
+    """Run the benchmark and return a dict of lines dispatched per second for each mode.
+    """
+    publisher = signal.Publisher()
+    subscribers = [CountingSubscriber(publisher) for _ in range(num_subscribers)]
+    line = "wpantund[1234]: [OTNS] role=2"
+
+    results = {}
+
+    start_time = time.perf_counter()
+    for _ in range(num_lines):
+        publisher.emit(line=line)
+    results["emit"] = num_lines / (time.perf_counter() - start_time)
+
+    batch = [{"line": line}] * batch_size
+    start_time = time.perf_counter()
+    for _ in range(num_lines // batch_size):
+        publisher.emit_batch(batch)
+    results["emit_batch"] = (num_lines // batch_size) * batch_size / (time.perf_counter() - start_time)
+
+    del subscribers
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure silk signal dispatch throughput")
+    parser.add_argument("-n", "--lines", type=int, default=200000, help="number of lines to dispatch")
+    parser.add_argument("-s", "--subscribers", type=int, default=2, help="number of subscribers")
+    parser.add_argument("-b", "--batch", type=int, default=16, help="lines per emit_batch call")
+    args = parser.parse_args()
+
+    results = run(args.lines, args.subscribers, args.batch)
+    for mode, rate in results.items():
+        print("{0:<12}{1:>14,.0f} lines/s ({2} subscribers)".format(mode, rate, args.subscribers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""wpanctl table parsing benchmark.
+
+Extracts the child, neighbor and router tables printed in the unit test
+fixture logs and times parsing them with the original split-and-dict row
+parsing, the slotted row objects and the columnar tables.
+
+Usage: python -m silk.benchmarks.table_parse [-r REPEAT]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from silk.tools import wpan_table_parser
+
+FIXTURE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "unit_tests", "fixture")
+
+_STDOUT_MARKER = "[stdout] "
+
+# Field only found in the rows of each table kind.
+_TABLE_KINDS = (("router", "RouterId:"), ("neighbor", "IsChild:"), ("child", "Timeout:"))
+
+PARSERS = {
+    "child": (wpan_table_parser.parse_child_table_result, wpan_table_parser.parse_child_table_columns),
+    "neighbor": (wpan_table_parser.parse_neighbor_table_result, wpan_table_parser.parse_neighbor_table_columns),
+    "router": (wpan_table_parser.parse_router_table_result, wpan_table_parser.parse_router_table_columns),
+}
+
+
+def load_tables(directory=FIXTURE_DIRECTORY):
+    """Returns {kind: [table list string, ...]} of the tables printed in the *_table_log.txt files of directory.
+    """
+    tables = {kind: [] for kind in PARSERS}
+
+    for path in sorted(glob.glob(os.path.join(directory, "*_table_log.txt"))):
+        rows = None
+        with open(path) as log_file:
+            for line in log_file:
+                position = line.find(_STDOUT_MARKER)
+                if position < 0:
+                    continue
+                output = line[position + len(_STDOUT_MARKER):].rstrip("\n")
+
+                if output.endswith("["):
+                    rows = []
+                elif output == "]" and rows is not None:
+                    for kind, field in _TABLE_KINDS:
+                        if rows and field in rows[0]:
+                            tables[kind].append("\n".join(["["] + rows + ["]"]))
+                            break
+                    rows = None
+                elif rows is not None and output.startswith("\t\""):
+                    rows.append(output)
+
+    return tables
+
+
+def split_parse(table_list):
+    """Parse rows the way the table entries originally did: whitespace split and a dict of `:` splits.
+    """
+    entries = []
+    for text in table_list.split("\n")[1:-1]:
+        items = [item[:-1] if item[-1] == "," else item for item in text[2:-1].split()]
+        entries.append((items[0], {item.split(":")[0]: item.split(":")[1] for item in items[1:]}))
+    return entries
+
+
+def _time(function, tables, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for table in tables:
+            function(table)
+    return time.perf_counter() - start_time
+
+
+def run(repeat=1000, directory=FIXTURE_DIRECTORY):
+    """Run the benchmark and return {kind: {"tables": count, "rows": count, "<parser>_us": microseconds per table}}.
+    """
+    results = {}
+    for kind, tables in load_tables(directory).items():
+        if not tables:
+            continue
+
+        rows_parser, columns_parser = PARSERS[kind]
+        count = len(tables) * repeat
+        results[kind] = {
+            "tables": len(tables),
+            "rows": sum(len(rows_parser(table)) for table in tables),
+            "split_us": _time(split_parse, tables, repeat) / count * 1e6,
+            "rows_us": _time(rows_parser, tables, repeat) / count * 1e6,
+            "columns_us": _time(columns_parser, tables, repeat) / count * 1e6,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure wpanctl table parsing over the fixture logs")
+    parser.add_argument("-r", "--repeat", type=int, default=1000, help="number of times each table is parsed")
+    args = parser.parse_args()
+
+    for kind, result in run(args.repeat).items():
+        print("{0:<8} {1:3d} tables {2:4d} rows: split {3:6.1f} us, rows {4:6.1f} us, columns {5:6.1f} us".format(
+            kind, result["tables"], result["rows"], result["split_us"], result["rows_us"], result["columns_us"]))
+
+
+if __name__ == "__main__":
+    main()
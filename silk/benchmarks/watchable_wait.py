@@ -0,0 +1,91 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Concurrent watcher benchmark for silk.tools.watchable.
+
+Hundreds of threads watch the counters of a set of nodes, half through
+Watchable.watch and half through wait_any over all nodes, while one thread
+keeps updating the counters.
+
+Usage: python -m silk.benchmarks.watchable_wait [-n NODES] [-w WATCHERS] [-u UPDATES]
+"""
+
+import argparse
+import threading
+import time
+
+from silk.tools import watchable
+
+
+def run(num_nodes, num_watchers, num_updates, timeout=60):
+    """Run the benchmark and return a dict with the update rate and the number of satisfied watchers.
+    """
+    counters = [watchable.Watchable(0, name="node%d" % index) for index in range(num_nodes)]
+    target = num_updates // num_nodes
+    satisfied = []
+    satisfied_lock = threading.Lock()
+    ready = threading.Barrier(num_watchers + 1)
+
+    def watch_one(counter):
+        ready.wait()
+        if counter.watch(lambda value: value >= target, timeout=timeout):
+            with satisfied_lock:
+                satisfied.append(counter)
+
+    def watch_any():
+        ready.wait()
+        if watchable.wait_any([(counter, lambda value: value >= target) for counter in counters], timeout=timeout):
+            with satisfied_lock:
+                satisfied.append(None)
+
+    watchers = []
+    for index in range(num_watchers):
+        if index % 2:
+            watcher = threading.Thread(target=watch_any)
+        else:
+            watcher = threading.Thread(target=watch_one, args=(counters[index % num_nodes],))
+        watcher.start()
+        watchers.append(watcher)
+
+    ready.wait()
+    start_time = time.perf_counter()
+    for update in range(target * num_nodes):
+        counter = counters[update % num_nodes]
+        counter.set(counter.get() + 1)
+    update_time = time.perf_counter() - start_time
+
+    for watcher in watchers:
+        watcher.join()
+    total_time = time.perf_counter() - start_time
+
+    return {
+        "updates_per_second": target * num_nodes / update_time,
+        "wake_up_seconds": total_time,
+        "satisfied": len(satisfied),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure watchable update and wake-up cost with many watchers")
+    parser.add_argument("-n", "--nodes", type=int, default=32, help="number of watched nodes")
+    parser.add_argument("-w", "--watchers", type=int, default=500, help="number of watcher threads")
+    parser.add_argument("-u", "--updates", type=int, default=20000, help="number of updates over all nodes")
+    args = parser.parse_args()
+
+    results = run(args.nodes, args.watchers, args.updates)
+    print("{0:,.0f} updates/s, all watchers done after {1:.3f}s, {2}/{3} satisfied".format(
+        results["updates_per_second"], results["wake_up_seconds"], results["satisfied"], args.watchers))
+
+
+if __name__ == "__main__":
+    main()
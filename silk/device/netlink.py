@@ -0,0 +1,503 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process rtnetlink backend for network namespace provisioning.
+
+This module speaks NETLINK_ROUTE over a raw socket so that namespaces, links,
+addresses, routes and sysctls can be configured without forking `ip`,
+`ifconfig` or `sysctl` through sudo. Every operation requires root; callers
+should check `is_available()` and fall back to the command line tools when it
+returns False.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import ipaddress
+import os
+import socket
+import struct
+import threading
+
+NETNS_RUN_DIR = "/var/run/netns"
+
+CLONE_NEWNET = 0x40000000
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_SHARED = 0x100000
+MNT_DETACH = 0x2
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+NLM_F_REQUEST = 0x1
+NLM_F_ACK = 0x4
+NLM_F_EXCL = 0x200
+NLM_F_CREATE = 0x400
+
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_NEWROUTE = 24
+
+IFF_UP = 0x1
+
+IFLA_IFNAME = 3
+IFLA_LINKINFO = 18
+IFLA_NET_NS_FD = 28
+IFLA_INFO_KIND = 1
+IFLA_INFO_DATA = 2
+VETH_INFO_PEER = 1
+
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+
+RTA_DST = 1
+RTA_OIF = 4
+RTA_GATEWAY = 5
+
+RT_TABLE_MAIN = 254
+RTPROT_BOOT = 3
+RT_SCOPE_UNIVERSE = 0
+RTN_UNICAST = 1
+
+NLA_F_NESTED = 0x8000
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_IFINFOMSG = struct.Struct("=BxHiII")
+_IFADDRMSG = struct.Struct("=BBBBI")
+_RTMSG = struct.Struct("=BBBBBBBBI")
+_RTATTR = struct.Struct("=HH")
+_NLMSGERR = struct.Struct("=i")
+
+_RECV_BUFFER_SIZE = 65536
+
+_libc_instance = None
+
+
+class NetlinkError(Exception):
+    """Raised when the kernel rejects a request or the backend cannot be used.
+
+    Attributes:
+        code (int): positive errno value reported by the kernel, 0 if unknown.
+    """
+
+    def __init__(self, message: str, code: int = 0):
+        super().__init__(message)
+        self.code = code
+
+
+def _libc():
+    global _libc_instance
+
+    if _libc_instance is None:
+        _libc_instance = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+    return _libc_instance
+
+
+def _check_libc_call(result: int, description: str):
+    if result != 0:
+        code = ctypes.get_errno()
+        raise NetlinkError("{} failed: {}".format(description, os.strerror(code)), code)
+
+
+def is_available() -> bool:
+    """Check whether the netlink backend can be used on this host.
+
+    Returns:
+        bool: True when running as root on Linux with rtnetlink support.
+    """
+    if not hasattr(socket, "AF_NETLINK") or os.geteuid() != 0:
+        return False
+
+    try:
+        return hasattr(_libc(), "setns") and hasattr(_libc(), "unshare")
+    except OSError:
+        return False
+
+
+def netns_path(netns: str) -> str:
+    """Return the bind mount path backing a named network namespace.
+    """
+    return os.path.join(NETNS_RUN_DIR, netns)
+
+
+def _run_in_thread(name: str, func, *args):
+    """Run func on a short-lived thread and return its result.
+
+    Namespace switches made with setns() or unshare() only affect the calling
+    thread, so doing them on a throwaway thread leaves the caller untouched.
+    """
+    result = {}
+
+    def target():
+        try:
+            result["value"] = func(*args)
+        except BaseException as error:
+            result["error"] = error
+
+    thread = threading.Thread(target=target, name=name)
+    thread.start()
+    thread.join()
+
+    if "error" in result:
+        raise result["error"]
+
+    return result.get("value")
+
+
+def run_in_netns(netns: str, func, *args):
+    """Call func from inside the named network namespace.
+
+    Sockets and /proc/sys/net files opened by func stay bound to that
+    namespace after the call returns.
+
+    Args:
+        netns (str): name of the network namespace. None runs func in the caller's namespace.
+        func (callable): function to call.
+
+    Returns:
+        The value returned by func.
+    """
+    if netns is None:
+        return func(*args)
+
+    def enter_and_call():
+        fd = os.open(netns_path(netns), os.O_RDONLY)
+        try:
+            _check_libc_call(_libc().setns(fd, CLONE_NEWNET), "setns({})".format(netns))
+        finally:
+            os.close(fd)
+        return func(*args)
+
+    return _run_in_thread("netns-" + netns, enter_and_call)
+
+
+def _share_netns_run_dir():
+    """Make NETNS_RUN_DIR a shared mount point, like `ip netns add` does.
+
+    Namespace bind mounts then propagate to mount namespaces created later, e.g. by `ip netns exec`. A directory that
+    is not a mount point yet is bind mounted on itself first.
+    """
+    run_dir = NETNS_RUN_DIR.encode()
+    if _libc().mount(b"", run_dir, b"none", MS_SHARED | MS_REC, None) == 0:
+        return
+
+    if ctypes.get_errno() != errno.EINVAL:
+        _check_libc_call(-1, "mount --make-rshared {}".format(NETNS_RUN_DIR))
+    _check_libc_call(_libc().mount(run_dir, run_dir, b"none", MS_BIND | MS_REC, None),
+                     "mount --rbind {}".format(NETNS_RUN_DIR))
+    _check_libc_call(_libc().mount(b"", run_dir, b"none", MS_SHARED | MS_REC, None),
+                     "mount --make-rshared {}".format(NETNS_RUN_DIR))
+
+
+def create_netns(netns: str) -> bool:
+    """Create a named network namespace, like `ip netns add`.
+
+    Args:
+        netns (str): name of the network namespace.
+
+    Returns:
+        bool: True if the namespace was created, False if it already existed.
+    """
+    os.makedirs(NETNS_RUN_DIR, exist_ok=True)
+    _share_netns_run_dir()
+    path = netns_path(netns)
+
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_CREAT | os.O_EXCL, 0)
+    except FileExistsError:
+        return False
+    os.close(fd)
+
+    def unshare_and_bind():
+        _check_libc_call(_libc().unshare(CLONE_NEWNET), "unshare")
+        _check_libc_call(_libc().mount(b"/proc/thread-self/ns/net", path.encode(), b"none", MS_BIND, None),
+                         "mount({})".format(path))
+
+    try:
+        _run_in_thread("netns-add-" + netns, unshare_and_bind)
+    except NetlinkError:
+        os.unlink(path)
+        raise
+
+    return True
+
+
+def delete_netns(netns: str):
+    """Delete a named network namespace, like `ip netns del`.
+
+    Args:
+        netns (str): name of the network namespace.
+    """
+    path = netns_path(netns)
+    _check_libc_call(_libc().umount2(path.encode(), MNT_DETACH), "umount({})".format(path))
+    os.unlink(path)
+
+
+def set_sysctl(netns: str, key: str, value: str):
+    """Write a sysctl inside a network namespace, like `sysctl -w`.
+
+    Args:
+        netns (str): name of the network namespace. None uses the caller's namespace.
+        key (str): dotted sysctl key, e.g. net.ipv6.conf.all.forwarding.
+        value (str): value to write.
+    """
+
+    def write():
+        with open(os.path.join("/proc/sys", *key.split(".")), "w") as sysctl_file:
+            sysctl_file.write(str(value))
+
+    run_in_netns(netns, write)
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def pack_attr(attr_type: int, data: bytes) -> bytes:
+    """Pack a netlink attribute, padded to a four byte boundary.
+
+    Args:
+        attr_type (int): attribute type.
+        data (bytes): attribute payload.
+
+    Returns:
+        bytes: encoded attribute.
+    """
+    length = _RTATTR.size + len(data)
+    return _RTATTR.pack(length, attr_type) + data + b"\0" * (_align(length) - length)
+
+
+def pack_message(msg_type: int, flags: int, seq: int, payload: bytes) -> bytes:
+    """Pack a netlink message header in front of payload.
+
+    Args:
+        msg_type (int): netlink message type.
+        flags (int): netlink message flags.
+        seq (int): sequence number used to match the kernel acknowledgement.
+        payload (bytes): message body.
+
+    Returns:
+        bytes: encoded message.
+    """
+    return _NLMSGHDR.pack(_NLMSGHDR.size + len(payload), msg_type, flags, seq, 0) + payload
+
+
+def unpack_messages(data: bytes):
+    """Split a datagram received from the kernel into netlink messages.
+
+    Args:
+        data (bytes): received datagram.
+
+    Yields:
+        Tuple[int, int, bytes]: message type, sequence number and body.
+    """
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, _, seq, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        yield msg_type, seq, data[offset + _NLMSGHDR.size:offset + length]
+        offset += _align(length)
+
+
+def _ifname_attr(name: str) -> bytes:
+    return pack_attr(IFLA_IFNAME, name.encode() + b"\0")
+
+
+def _ip6_packed(address: str) -> bytes:
+    return ipaddress.IPv6Address(address).packed
+
+
+def link_message_body(index: int = 0, flags: int = 0, change: int = 0, attrs: bytes = b"") -> bytes:
+    """Build an ifinfomsg body followed by attrs.
+    """
+    return _IFINFOMSG.pack(socket.AF_UNSPEC, 0, index, flags, change) + attrs
+
+
+def veth_pair_body(name: str, peer: str) -> bytes:
+    """Build the RTM_NEWLINK body creating a veth pair name <-> peer.
+    """
+    peer_info = pack_attr(VETH_INFO_PEER | NLA_F_NESTED, link_message_body(attrs=_ifname_attr(peer)))
+    link_info = pack_attr(IFLA_INFO_KIND, b"veth") + pack_attr(IFLA_INFO_DATA | NLA_F_NESTED, peer_info)
+    return link_message_body(attrs=_ifname_attr(name) + pack_attr(IFLA_LINKINFO | NLA_F_NESTED, link_info))
+
+
+def address_body(index: int, address: str, prefix_len: int) -> bytes:
+    """Build the RTM_NEWADDR body adding an IPv6 address to interface index.
+    """
+    packed = _ip6_packed(address)
+    return (_IFADDRMSG.pack(socket.AF_INET6, prefix_len, 0, RT_SCOPE_UNIVERSE, index) + pack_attr(IFA_LOCAL, packed) +
+            pack_attr(IFA_ADDRESS, packed))
+
+
+def route_body(index: int, dest: str, dest_len: int, gateway: str = None) -> bytes:
+    """Build the RTM_NEWROUTE body for an IPv6 route out of interface index.
+
+    A dest_len of 0 adds a default route.
+    """
+    body = _RTMSG.pack(socket.AF_INET6, dest_len, 0, 0, RT_TABLE_MAIN, RTPROT_BOOT, RT_SCOPE_UNIVERSE, RTN_UNICAST, 0)
+    if dest_len:
+        body += pack_attr(RTA_DST, _ip6_packed(dest))
+    if gateway:
+        body += pack_attr(RTA_GATEWAY, _ip6_packed(gateway))
+    return body + pack_attr(RTA_OIF, struct.pack("=i", index))
+
+
+class NetlinkRoute(object):
+    """A NETLINK_ROUTE socket bound to one network namespace.
+
+    Requests are acknowledged synchronously. `batch` sends many requests in a
+    single datagram and collects every acknowledgement, which is how bulk
+    address and route provisioning avoids one round trip per entry.
+    """
+
+    def __init__(self, netns: str = None):
+        """Open a route socket inside netns.
+
+        Args:
+            netns (str, optional): name of the network namespace. Defaults to the caller's namespace.
+        """
+        self.netns = netns
+        self._sock = run_in_netns(netns, socket.socket, socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        self._sock.bind((0, 0))
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the underlying socket.
+        """
+        self._sock.close()
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        return self._seq
+
+    def batch(self, requests, ignore_errors=()):
+        """Send several requests at once and wait for all acknowledgements.
+
+        Args:
+            requests (List[Tuple[int, int, bytes]]): message type, extra flags and body for each request.
+            ignore_errors (Iterable[int], optional): errno values treated as success, e.g. EEXIST.
+
+        Raises:
+            NetlinkError: if the kernel rejected any request. The first failure is reported.
+
+        Returns:
+            List[List[Tuple[int, bytes]]]: replies received for each request, in request order.
+        """
+        if not requests:
+            return []
+
+        with self._lock:
+            seqs = []
+            datagram = b""
+            for msg_type, flags, body in requests:
+                seq = self._next_seq()
+                seqs.append(seq)
+                datagram += pack_message(msg_type, NLM_F_REQUEST | NLM_F_ACK | flags, seq, body)
+
+            self._sock.sendall(datagram)
+
+            replies = {seq: [] for seq in seqs}
+            pending = set(seqs)
+            errors = {}
+            while pending:
+                for msg_type, seq, body in unpack_messages(self._sock.recv(_RECV_BUFFER_SIZE)):
+                    if seq not in pending:
+                        continue
+                    if msg_type == NLMSG_ERROR:
+                        code = -_NLMSGERR.unpack_from(body)[0]
+                        if code and code not in ignore_errors:
+                            errors[seq] = code
+                        pending.discard(seq)
+                    elif msg_type == NLMSG_DONE:
+                        pending.discard(seq)
+                    else:
+                        replies[seq].append((msg_type, body))
+
+        for index, seq in enumerate(seqs):
+            if seq in errors:
+                code = errors[seq]
+                raise NetlinkError("request {} of {} failed: {}".format(index + 1, len(seqs), os.strerror(code)), code)
+
+        return [replies[seq] for seq in seqs]
+
+    def request(self, msg_type: int, flags: int, body: bytes, ignore_errors=()):
+        """Send one request and wait for its acknowledgement.
+
+        Returns:
+            List[Tuple[int, bytes]]: replies received before the acknowledgement.
+        """
+        return self.batch([(msg_type, flags, body)], ignore_errors)[0]
+
+    def link_index(self, name: str) -> int:
+        """Look up the interface index of name in this socket's namespace.
+
+        Indexes are not cached since wpantund recreates its interface on every restart.
+        """
+        for msg_type, body in self.request(RTM_GETLINK, 0, link_message_body(attrs=_ifname_attr(name))):
+            if msg_type == RTM_NEWLINK:
+                return _IFINFOMSG.unpack_from(body)[2]
+
+        raise NetlinkError("interface {} not found".format(name), errno.ENODEV)
+
+    def _link_indexes(self, names) -> dict:
+        return {name: self.link_index(name) for name in set(names)}
+
+    def add_veth_pair(self, name: str, peer: str):
+        """Create a veth pair, like `ip link add name <name> type veth peer name <peer>`.
+        """
+        self.request(RTM_NEWLINK, NLM_F_CREATE | NLM_F_EXCL, veth_pair_body(name, peer))
+
+    def set_link_up(self, name: str):
+        """Bring an interface up, like `ip link set <name> up`.
+        """
+        self.request(RTM_NEWLINK, 0, link_message_body(self.link_index(name), IFF_UP, IFF_UP))
+
+    def set_link_netns(self, name: str, netns: str):
+        """Move an interface into another network namespace, like `ip link set <name> netns <netns>`.
+        """
+        fd = os.open(netns_path(netns), os.O_RDONLY)
+        try:
+            attrs = pack_attr(IFLA_NET_NS_FD, struct.pack("=I", fd))
+            self.request(RTM_NEWLINK, 0, link_message_body(self.link_index(name), attrs=attrs))
+        finally:
+            os.close(fd)
+
+    def add_addresses(self, entries):
+        """Add IPv6 addresses in one batch. Addresses that already exist are ignored.
+
+        Args:
+            entries (Iterable[Tuple[str, str, int]]): interface name, address and prefix length.
+        """
+        entries = list(entries)
+        indexes = self._link_indexes(interface for interface, _, _ in entries)
+        requests = [(RTM_NEWADDR, NLM_F_CREATE | NLM_F_EXCL, address_body(indexes[interface], address, prefix_len))
+                    for interface, address, prefix_len in entries]
+        self.batch(requests, ignore_errors=(errno.EEXIST,))
+
+    def add_routes(self, entries):
+        """Add IPv6 routes in one batch. Routes that already exist are ignored.
+
+        Args:
+            entries (Iterable[Tuple[str, int, str, str]]): destination, destination prefix length, gateway
+                (or None) and outgoing interface name.
+        """
+        entries = list(entries)
+        indexes = self._link_indexes(interface for _, _, _, interface in entries)
+        requests = [(RTM_NEWROUTE, NLM_F_CREATE | NLM_F_EXCL, route_body(indexes[interface], dest, dest_len, gateway))
+                    for dest, dest_len, gateway, interface in entries]
+        self.batch(requests, ignore_errors=(errno.EEXIST,))
@@ -18,12 +18,31 @@ import logging
 import os
 import subprocess
 
+from silk.device import netlink
 from silk.device.system_call_manager import SystemCallManager
 from silk.node.base_node import BaseNode
 import silk.postprocessing.ip as silk_ip
 
+logger = logging.getLogger(__name__)
+
 
 def create_link_pair(interface_1, interface_2):
+    """Create a veth pair interface_1 <-> interface_2 in the root network namespace.
+
+    Returns the error output, which is empty on success.
+    """
+    if netlink.is_available():
+        try:
+            route = netlink.NetlinkRoute()
+            try:
+                route.add_veth_pair(interface_1, interface_2)
+            finally:
+                route.close()
+            return ""
+        except (netlink.NetlinkError, OSError) as error:
+            # The pair is created by a single request, so a failed one left nothing behind for ip to trip over.
+            logger.debug("netlink link-add failed, falling back to ip: %s", error)
+
     command = "sudo ip link add name %s " % interface_1
     command += "type veth peer name %s" % interface_2
 
@@ -49,6 +68,7 @@ class NetnsController(SystemCallManager):
     """
 
     _hw_model = None
+    _netlink_route = None
 
     def __init__(self, netns: str = None, device_path: str = None):
         """
@@ -75,6 +95,15 @@ class NetnsController(SystemCallManager):
         self.log_info("Adding network namespace for %s" % self.device_path)
         if self.netns is None:
             self.netns = os.path.basename(self.device_path)
+
+        if netlink.is_available():
+            try:
+                if not netlink.create_netns(self.netns):
+                    self.log_debug("Network namespace %s already exists" % self.netns)
+                return self.netns
+            except (netlink.NetlinkError, OSError) as error:
+                self.log_debug("netlink netns-add failed, falling back to ip: %s" % error)
+
         command = "sudo ip netns add %s" % self.netns
         self._make_system_call("netns-add", command, 2)
         return self.netns
@@ -84,9 +113,46 @@ class NetnsController(SystemCallManager):
         """
         self.log_info("Deleting network namespace for %s" % self.device_path)
 
+        if self._netlink_route is not None:
+            self._netlink_route.close()
+            self._netlink_route = None
+
+        if netlink.is_available():
+            try:
+                netlink.delete_netns(self.netns)
+                # Log the equivalent command, log replay keys node removal on it.
+                self.log_debug("sudo ip netns del %s (netlink)" % self.netns)
+                return
+            except (netlink.NetlinkError, OSError) as error:
+                self.log_debug("netlink netns-del failed, falling back to ip: %s" % error)
+
         command = "sudo ip netns del %s" % self.netns
         self._make_system_call("netns-del", command, 2)
 
+    def _netlink(self):
+        """Return the netlink route socket of this netns, or None when netlink is not available.
+        """
+        if self._netlink_route is None and netlink.is_available():
+            try:
+                self._netlink_route = netlink.NetlinkRoute(self.netns)
+            except (netlink.NetlinkError, OSError) as error:
+                self.log_debug("netlink unavailable in %s, using command line tools: %s" % (self.netns, error))
+        return self._netlink_route
+
+    def _make_netlink_call_async(self, action, operation, *args):
+        """Queue a netlink operation so it runs in order with the other queued calls.
+        """
+
+        def invoke(*invoke_args):
+            delegates = invoke_args[-1]
+            try:
+                operation(*invoke_args[:-1])
+            except (netlink.NetlinkError, OSError) as error:
+                delegates.set_error("%s failed: %s" % (action, error))
+            return True
+
+        self.make_function_call_async(invoke, *args)
+
     def netns_pids(self):
         """List all PIDs running in this device's netns.
         """
@@ -129,20 +195,46 @@ class NetnsController(SystemCallManager):
         command = self.construct_netns_command(command)
         return self._make_system_call("netns-exec", command, timeout)
 
-    def make_netns_call_async(self, command, expect, timeout, field=None, exact_match: bool = False):
+    def make_netns_call_async(self,
+                              command,
+                              expect,
+                              timeout,
+                              field=None,
+                              exact_match: bool = False,
+                              diagnostic: bool = False):
         """
         Take a standard system call (eg: ifconfig, ping, etc.).
         Format the command so that it will be called in this network namespace.
         Make the system call with a timeout.
         """
         command = self.construct_netns_command(command)
-        return self.make_system_call_async("netns-exec", command, expect, timeout, field, exact_match)
+        return self.make_system_call_async("netns-exec", command, expect, timeout, field, exact_match, diagnostic)
 
     def link_set(self, interface_name, virtual_eth_peer):
         """
         Assign a network namespace link endpoint to this network namespace.
         Bring up the new interface.
         """
+        netns_route = self._netlink()
+        if netns_route is not None:
+            moved = False
+            try:
+                root_route = netlink.NetlinkRoute()
+                try:
+                    root_route.set_link_netns(interface_name, self.netns)
+                    moved = True
+                    root_route.set_link_up(virtual_eth_peer)
+                finally:
+                    root_route.close()
+                netns_route.set_link_up(interface_name)
+                return
+            except (netlink.NetlinkError, OSError) as error:
+                # Once the link is in this netns the command line path would fail on a half-configured link.
+                if moved:
+                    self.log_error("netlink link-set failed after moving %s: %s" % (interface_name, error))
+                    raise
+                self.log_error("netlink link-set failed, falling back to ip: %s" % error)
+
         command = "ip link set %s netns %s" % (interface_name, self.netns)
         self._make_system_call("link-set", command, 1)
 
@@ -160,28 +252,73 @@ class NetnsController(SystemCallManager):
         interface.
         """
         new_ip = silk_ip.assemble(prefix, subnet, mac)
-        command = "ip addr add %s/64 dev %s" % (new_ip, interface)
         self.store_data(new_ip, interface_label)
-        self.make_netns_call_async(command, "", 1)
-        self.make_netns_call_async("ifconfig", "", 1)
+        self.add_ip6_addrs([(new_ip, 64, interface)])
+
+    def add_ip6_addrs(self, addresses):
+        """
+        Add many IPv6 addresses to interfaces of this network namespace.
+        `addresses` is a list of (address, prefix_len, interface) tuples.
+        With netlink the whole list is applied in a single request batch.
+        """
+        netns_route = self._netlink()
+        if netns_route is not None:
+            entries = [(interface, address, prefix_len) for address, prefix_len, interface in addresses]
+            for address, prefix_len, interface in addresses:
+                self.log_debug("Adding %s/%s to %s" % (address, prefix_len, interface))
+            self._make_netlink_call_async("addr-add", netns_route.add_addresses, entries)
+            return
+
+        for address, prefix_len, interface in addresses:
+            command = "ip addr add %s/%s dev %s" % (address, prefix_len, interface)
+            self.make_netns_call_async(command, "", 1)
+        self.make_netns_call_async("ifconfig", "", 1, diagnostic=True)
 
     def set_default_route(self, default_interface=None):
         if default_interface is None:
             default_interface = self.thread_interface
+
+        netns_route = self._netlink()
+        if netns_route is not None:
+            self._make_netlink_call_async("route-add", netns_route.add_routes, [("::", 0, None, default_interface)])
+            return
+
         command = "ip -6 route add default dev %s" % default_interface
         self.make_netns_call_async(command, "", 1)
 
     def enable_ipv6_forwarding(self):
-        command = "sysctl -w net.ipv6.conf.all.forwarding=1"
-        self.make_netns_call_async(command, "", 1, None)
+        self.__set_ipv6_forwarding(1)
 
     def disable_ipv6_forwarding(self):
-        command = "sysctl -w net.ipv6.conf.all.forwarding=0"
+        self.__set_ipv6_forwarding(0)
+
+    def __set_ipv6_forwarding(self, value):
+        if self._netlink() is not None:
+            self._make_netlink_call_async("sysctl", netlink.set_sysctl, self.netns, "net.ipv6.conf.all.forwarding",
+                                          value)
+            return
+
+        command = "sysctl -w net.ipv6.conf.all.forwarding=%s" % value
         self.make_netns_call_async(command, "", 1, None)
 
     def add_route(self, dest, dest_subnet_length, via_addr, interface_name):
-        command = "ip -6 route add %s/%s via %s dev %s" % (dest, dest_subnet_length, via_addr, interface_name)
-        self.make_netns_call_async(command, "", 1, None)
+        self.add_routes([(dest, dest_subnet_length, via_addr, interface_name)])
+
+    def add_routes(self, routes):
+        """
+        Add many IPv6 routes to this network namespace.
+        `routes` is a list of (dest, dest_subnet_length, via_addr, interface_name) tuples.
+        With netlink the whole list is applied in a single request batch.
+        """
+        netns_route = self._netlink()
+        if netns_route is not None:
+            entries = [(dest, int(length), via, interface) for dest, length, via, interface in routes]
+            self._make_netlink_call_async("route-add", netns_route.add_routes, entries)
+            return
+
+        for dest, dest_subnet_length, via_addr, interface_name in routes:
+            command = "ip -6 route add %s/%s via %s dev %s" % (dest, dest_subnet_length, via_addr, interface_name)
+            self.make_netns_call_async(command, "", 1, None)
 
 
 class StandaloneNetworkNamespace(NetnsController, BaseNode):
@@ -205,22 +342,22 @@ class StandaloneNetworkNamespace(NetnsController, BaseNode):
 
         self.logger.setLevel(logging.DEBUG)
 
-    def log_debug(self, log_line):
+    def log_debug(self, log_line, *args):
         if self.logger is not None:
-            self.logger.debug(log_line)
+            self.logger.debug(log_line, *args)
 
-    def log_info(self, log_line):
+    def log_info(self, log_line, *args):
         if self.logger is not None:
-            self.logger.info(log_line)
+            self.logger.info(log_line, *args)
 
-    def log_warning(self, log_line):
+    def log_warning(self, log_line, *args):
         if self.logger is not None:
-            self.logger.warning(log_line)
+            self.logger.warning(log_line, *args)
 
-    def log_error(self, log_line):
+    def log_error(self, log_line, *args):
         if self.logger is not None:
-            self.logger.error(log_line)
+            self.logger.error(log_line, *args)
 
-    def log_critical(self, log_line):
+    def log_critical(self, log_line, *args):
         if self.logger is not None:
-            self.logger.critical(log_line)
+            self.logger.critical(log_line, *args)
@@ -23,6 +23,16 @@ import time
 
 from . import message_item
 from silk.node.base_node import BaseNode
+from silk.node.base_node import is_lean_mode
+from silk.utils import event_log
+from silk.utils import watchdog
+
+# Queued by stop_worker to end the worker thread.
+_STOP_WORKER = object()
+
+# Function calls such as firmware flashing may legitimately run for minutes without reporting progress; they get
+# this multiple of the watchdog timeout.
+FUNCTION_CALL_WATCHDOG_BUDGET = 10
 
 
 class MessageSystemCallItem(message_item.MessageItemBase):
@@ -42,7 +52,7 @@ class MessageSystemCallItem(message_item.MessageItemBase):
 
     def log_match_failure(self, response):
         self.parent.log_error("Worker failed to match expected output.")
-        self.parent.log_error("Expected: \"%s\"" % self.expect)
+        self.parent.log_error("Expected: \"%s\"", self.expect)
         self.parent.log_error("Actual Output:")
 
         for line in response.splitlines():
@@ -70,12 +80,16 @@ class MessageSystemCallItem(message_item.MessageItemBase):
         if self.expect is None:
             self.expect = ""
 
-        self.parent.log_debug("Dequeuing command \"%s\"" % self.cmd)
+        self.parent.log_debug("Dequeuing command \"%s\"", self.cmd)
 
         response = None
+        abort_generation = self.parent.abort_generation
 
         if self.cmd is not None:
             response = self.parent._make_system_call(self.action, self.cmd, self.timeout)
+        if self.parent.abort_generation != abort_generation:
+            # The command was cancelled by abort_pending, which already posted the error.
+            return
         if response is None:
             self.log_response_failure()
             return
@@ -107,14 +121,31 @@ class SystemCallManager(object):
     def __init__(self):
         self.__message_queue = queue.Queue()
         self.__event_lock = threading.Lock()
+        self.__process_lock = threading.Lock()
+        self.__active_processes = set()
+        self.__abort_generation = 0
+        self.__heartbeat = watchdog.register("thread-" + self._name, self.__worker_stalled)
         self.__worker_thread = threading.Thread(target=self.__worker_run, name="thread-" + self._name)
         self.__worker_thread.daemon = True
         self.__worker_thread.start()
 
-    def make_system_call_async(self, action, command, expect, timeout, field=None, exact_match: bool = False):
+    def make_system_call_async(self,
+                               action,
+                               command,
+                               expect,
+                               timeout,
+                               field=None,
+                               exact_match: bool = False,
+                               diagnostic: bool = False):
         """Post a command, timeout, and expect value to a queue for the consumer thread.
+
+        Diagnostic commands only feed the logs and are skipped in lean mode.
         """
-        self.log_info("Enqueuing command \"%s\"" % command)
+        if diagnostic and is_lean_mode():
+            self.log_debug("Skipping diagnostic command \"%s\"", command)
+            return
+
+        self.log_info("Enqueuing command \"%s\"", command)
         item = MessageSystemCallItem(action, command, expect, timeout, field, exact_match)
 
         with self.__event_lock:
@@ -125,7 +156,7 @@ class SystemCallManager(object):
     def make_function_call_async(self, function, *args):
         """Enqueue a Python function to be called on the worker thread.
         """
-        self.log_info("Enqueueing function %s with args %s" % (function, args))
+        self.log_info("Enqueueing function %s with args %s", function, args)
         item = message_item.MessageCallableItem(function, args)
 
         with self.__event_lock:
@@ -133,20 +164,85 @@ class SystemCallManager(object):
             self.__message_queue.put_nowait(item)
             self.log_debug("Message enqueued")
 
+    @property
+    def abort_generation(self):
+        """Number of times abort_pending has been called on this node.
+        """
+        return self.__abort_generation
+
+    def abort_pending(self, msg):
+        """Post msg as an error, drop all queued commands and kill the ones in flight.
+
+        Callers blocked in wait_for_completion return right away with msg.
+        """
+        self.log_error("Aborting pending commands: {0}".format(msg))
+
+        with self.__event_lock:
+            self.post_error(msg)
+            self.__clear_message_queue()
+            self.__abort_generation += 1
+            self.__kill_active_processes()
+
+            self.set_all_clear(True)
+
+    def stop_worker(self, timeout=10):
+        """Drop all queued commands, kill the ones in flight and stop the worker thread.
+
+        The node cannot run commands afterwards.
+        """
+        self.log_debug("Stopping worker thread")
+
+        with self.__event_lock:
+            self.__clear_message_queue()
+            self.__abort_generation += 1
+            self.__kill_active_processes()
+            self.__message_queue.put_nowait(_STOP_WORKER)
+
+        if self.__worker_thread is not threading.current_thread():
+            self.__worker_thread.join(timeout)
+        self.__heartbeat.disarm()
+
+    def __kill_active_processes(self):
+        with self.__process_lock:
+            processes = list(self.__active_processes)
+        for proc in processes:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
     def _make_system_call(self, action, command, timeout):
         """Generic method for making a system call with timeout.
         """
 
-        log_line = "Making system call for %s" % action
-        self.log_debug(log_line)
-        self.log_debug(command)
+        self.log_debug("Making system call for %s", action)
+        self.log_debug("%s", command)
+        abort_generation = self.__abort_generation
         try:
             proc = subprocess.Popen(command, bufsize=0, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         except Exception as error:
-            self.log_error("Failed to start subprocess: %s" % error)
-            self.log_error("\tCommand: %s" % command)
+            self.log_error("Failed to start subprocess: %s", error)
+            self.log_error("\tCommand: %s", command)
             return None
 
+        with self.__process_lock:
+            self.__active_processes.add(proc)
+        start_time = time.time()
+        try:
+            return self.__read_system_call_output(proc, timeout, abort_generation)
+        finally:
+            with self.__process_lock:
+                self.__active_processes.discard(proc)
+            event_log.record(event_log.COMMAND,
+                             self._name,
+                             action=action,
+                             command=command,
+                             duration=time.time() - start_time,
+                             returncode=proc.poll())
+
+    def __read_system_call_output(self, proc, timeout, abort_generation):
+        """Collect the output of proc until it exits, times out or is aborted.
+        """
         flags = fcntl.fcntl(proc.stdout, fcntl.F_GETFL)
         fcntl.fcntl(proc.stdout, fcntl.F_SETFL, flags | os.O_NONBLOCK)
 
@@ -155,7 +251,16 @@ class SystemCallManager(object):
 
         t_start = time.time()
         while True:
-            if proc.poll() == 0:
+            # Any exit status ends the call; a failing command against a dead daemon must not wait out the timeout.
+            if proc.poll() is not None:
+                break
+
+            if self.__abort_generation != abort_generation:
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+
                 break
 
             try:
@@ -167,12 +272,15 @@ class SystemCallManager(object):
                 # Check the length of the read list to see if there is new data
                 if len(poll_list[0]) > 0:
                     curr_line += proc.stdout.read(1).decode("utf-8")
+                    # New output is progress; the call only stalls once it goes quiet for the watchdog timeout.
+                    self.__heartbeat.beat()
             except Exception as err:
                 print("EXCEPTION:{}".format(err))
                 break
 
             if len(curr_line) > 0 and curr_line[-1] == "\n" and not curr_line.isspace():
-                self.log_debug("[stdout] %s" % (curr_line.rstrip()))
+                if self.is_debug_enabled():
+                    self.log_debug("[stdout] %s", curr_line.rstrip())
                 stdout += curr_line
                 curr_line = ""
 
@@ -197,8 +305,9 @@ class SystemCallManager(object):
                     break
             if this_stdout:
                 this_stdout = curr_line + this_stdout
-                for line in this_stdout.splitlines():
-                    self.log_debug("[stdout] %s" % (line.rstrip()))
+                if self.is_debug_enabled():
+                    for line in this_stdout.splitlines():
+                        self.log_debug("[stdout] %s", line.rstrip())
                 stdout += this_stdout
         except ValueError:
             pass
@@ -232,6 +341,8 @@ class SystemCallManager(object):
             self.__event_lock.release()
 
             item = self.__message_queue.get()
+            if item is _STOP_WORKER:
+                break
 
             error_handler = lambda me, error_str: me.__set_error(error_str)
 
@@ -239,7 +350,21 @@ class SystemCallManager(object):
 
             item.set_delegates(delegates)
 
-            item.invoke(self)
+            # System calls beat the heartbeat as their subprocess prints output, so a call stalls once it is quiet for
+            # the watchdog timeout. Function calls cannot report progress and get a longer budget.
+            if isinstance(item, MessageSystemCallItem):
+                self.__heartbeat.arm()
+            else:
+                self.__heartbeat.arm(FUNCTION_CALL_WATCHDOG_BUDGET)
+            try:
+                item.invoke(self)
+            finally:
+                self.__heartbeat.disarm()
+
+    def __worker_stalled(self, location, stacks_path):
+        """Fail the node when the watchdog finds its worker thread stuck.
+        """
+        self.abort_pending("Worker thread stalled at {0}, stacks written to {1}".format(location, stacks_path))
 
 
 class TemporarySystemCallManager(SystemCallManager, BaseNode):
@@ -18,7 +18,26 @@ import logging
 import threading
 import queue
 
-import silk.tools.watchable as watchable
+from silk.node.node_state import NodeState
+
+_LEAN_MODE = False
+
+
+def set_lean_mode(enabled):
+    """Enable or disable lean mode for all nodes.
+
+    In lean mode nodes skip the system calls queued with diagnostic=True,
+    which only feed the logs. collect_diagnostics logs the node state when a
+    test fails.
+    """
+    global _LEAN_MODE
+    _LEAN_MODE = enabled
+
+
+def is_lean_mode():
+    """Returns True if diagnostic-only system calls should be skipped.
+    """
+    return _LEAN_MODE
 
 
 def not_implemented(f):
@@ -40,27 +59,34 @@ class BaseNode(object):
         self._error = queue.Queue(1)
         self._all_clear = threading.Event()
         self._lock = threading.Lock()
-        self.__store = dict()
+        self.state = NodeState(self._lock)
         self.logger = logging.getLogger("SilkDefault")
 
-    def __get_log_prefix(self):
-        return "%s" % self._name
+    def is_debug_enabled(self):
+        """Returns True if debug events of this node are not discarded.
+
+        Guard hot paths with it when building the arguments of log_debug is itself costly.
+        """
+        return self.logger is not None and self.logger.isEnabledFor(logging.DEBUG)
 
-    def log_debug(self, log):
+    def log_debug(self, log, *args):
         """Helper to log debug events.
+
+        log is only formatted with args if debug events are enabled.
         """
-        line = "DBG: %s: %s" % (self.__get_log_prefix(), log)
-        self.logger.debug(line)
+        if self.is_debug_enabled():
+            self.logger.debug("DBG: %s: %s", self._name, log % args if args else log)
 
-    def log_info(self, log):
+    def log_info(self, log, *args):
         """Helper to log info events.
         """
-        self.logger.info("%s: %s" % (self.__get_log_prefix(), log))
+        if self.logger is not None and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("%s: %s", self._name, log % args if args else log)
 
-    def log_error(self, log):
+    def log_error(self, log, *args):
         """Helper to log error events.
         """
-        self.logger.error("ERR: %s: %s" % (self.__get_log_prefix(), log))
+        self.logger.error("ERR: %s: %s", self._name, log % args if args else log)
 
     def in_error(self):
         """Returns true if error condition has been set.
@@ -101,7 +127,7 @@ class BaseNode(object):
         3: When a message has been queued (to clear event)
         """
 
-        self.log_debug("Setting all-clear to %s" % is_all_clear)
+        self.log_debug("Setting all-clear to %s", is_all_clear)
 
         if is_all_clear:
             self._all_clear.set()
@@ -117,30 +143,18 @@ class BaseNode(object):
         return self.get_error()
 
     def store_data(self, value, field):
-        with self._lock:
-            assigned = False
-
-            self.log_debug("Stored data: %s %s" % (field, value))
-            if isinstance(value, str):
-                value = value.strip()
-
-            if field in self.__store:
-                old_value = self.__store[field]
-                if watchable.is_watchable(old_value):
-                    old_value.set(value)
-                    assigned = True
-
-            if not assigned:
-                self.__store[field] = value
+        self.log_debug("Stored data: %s %s", field, value)
+        self.state.set(field, value)
 
     def clear_store(self):
-        with self._lock:
-            self.__store = {}
+        self.state.clear()
 
     def get_data(self, field, to_type=None, default=None):
-        self._lock.acquire()
-        value = self.__store.get(field, default)
-        self._lock.release()
+        # Typed fields were converted when stored
+        if to_type is not None and self.state.has_type(field, to_type):
+            return self.state.get_typed(field, default)
+
+        value = self.state.get(field, default)
 
         # Convert to desired type
         if to_type is not None:
@@ -168,7 +182,7 @@ class BaseNode(object):
     @property
     def ip6_lla(self):
         """ Link-Local Address """
-        return self.get_data(self.ip6_lla_label)
+        return self.state.ip6_lla
 
     @property
     def ip6_mla_label(self):
@@ -177,7 +191,7 @@ class BaseNode(object):
     @property
     def ip6_mla(self):
         """ Mesh-Local Address """
-        return self.get_data(self.ip6_mla_label)
+        return self.state.ip6_mla
 
     @property
     def ping6_sent_label(self):
@@ -186,7 +200,7 @@ class BaseNode(object):
     @property
     def ping6_sent(self):
         """ Number of ping6 packets sent in most recent ping6 command """
-        return self.get_data(self.ping6_sent_label, int, default=0)
+        return self.state.get_typed("ping6_sent", 0)
 
     @property
     def ping6_received_label(self):
@@ -195,7 +209,7 @@ class BaseNode(object):
     @property
     def ping6_received(self):
         """ Number of ping6 packets received in most recent ping6 command """
-        return self.get_data(self.ping6_received_label, int, default=0)
+        return self.state.get_typed("ping6_received", 0)
 
     @property
     def ping6_results_label(self):
@@ -219,7 +233,7 @@ class BaseNode(object):
     @property
     def ping6_round_trip_time(self):
         """Average time to receive pings"""
-        return self.get_data(self.ping6_round_trip_time_label, float, default=0)
+        return self.state.get_typed("ping6_round_trip_time", 0)
 
     @not_implemented
     def set_up(self):
@@ -246,6 +260,11 @@ class BaseNode(object):
         """
         pass
 
+    def collect_diagnostics(self):
+        """Log the node state after a failure, including what lean mode skips while a test runs.
+        """
+        pass
+
     @not_implemented
     def reset_thread_radio(self):
         """Reset the node's thread radio.
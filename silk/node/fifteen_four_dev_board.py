@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 import logging
 import os
 import re
+import threading
 import time
 import traceback
 
@@ -23,11 +25,13 @@ from silk.config import wpan_constants as wpan
 from silk.device.netns_base import create_link_pair
 from silk.device.netns_base import NetnsController
 from silk.device.netns_base import StandaloneNetworkNamespace
+from silk.node.base_node import is_lean_mode
 from silk.node.wpantund_base import role_is_thread
 from silk.node.wpantund_base import WpantundWpanNode
 from silk.postprocessing import ip as silk_ip
 from silk.tools import wpan_table_parser
-from silk.utils import signal, subprocess_runner
+from silk.tools import wpantund_log
+from silk.utils import event_log, signal, subprocess_runner
 from silk.utils.directorypath import DirectoryPath
 from silk.utils.jsonfile import JsonFile
 from silk.utils.network import get_local_ip
@@ -39,6 +43,46 @@ import silk.hw.hw_resource as hw_resource
 LOG_PATH = "/opt/openthread_test/results/"
 POSIX_PATH = "/opt/openthread_test/posix"
 RETRY = 3
+# Seconds each diagnostics query may take on a node that already failed.
+DIAGNOSTICS_TIMEOUT = 5
+
+_WPANTUND_LINE_LOGGING = None
+
+
+def set_wpantund_line_logging(enabled):
+    """Log every wpantund output line at debug level, not only the lines monitors react to.
+
+    By default, or with enabled None, every line is logged unless lean mode is on.
+    """
+    global _WPANTUND_LINE_LOGGING
+    _WPANTUND_LINE_LOGGING = enabled
+
+
+def is_wpantund_line_logging():
+    """Returns True if every wpantund output line is logged.
+    """
+    if _WPANTUND_LINE_LOGGING is None:
+        return not is_lean_mode()
+    return _WPANTUND_LINE_LOGGING
+
+
+def get_thread_mode():
+    """Look up the Thread mode (NCP or RCP) of this host in clusters.conf.
+
+    Defaults to NCP if this host is not listed or the file cannot be read.
+    """
+    thread_mode = "NCP"
+    local_ip = get_local_ip()
+
+    try:
+        cluster_list = JsonFile.get_json("clusters.conf")["clusters"]
+        for cluster in cluster_list:
+            if cluster["ip"] == local_ip:
+                thread_mode = cluster["thread_mode"]
+    except Exception as error:
+        logging.info("Cannot load cluster.conf file." f" Running on NCP mode. Error: {error}")
+
+    return thread_mode
 
 
 class WpantundMonitor(signal.Subscriber):
@@ -49,42 +93,63 @@ class WpantundMonitor(signal.Subscriber):
     crashed = False
     state = None
     logger = None
+    crash_handler = None
+    node_name = None
 
     framing_errors = 0
 
-    state_regex = re.compile(r"State change: \"(?P<old_state>[.]+)\" -> \"(?P<new_state>[.]+)\"")
-
     def log_debug(self, line):
-        if self.logger is not None:
+        if self.logger is not None and self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(line)
 
+    def __report_crash(self, line):
+        """Invoke crash_handler once per crash with the offending line.
+        """
+        already_crashed = self.crashed
+        self.crashed = True
+        self.running = False
+
+        if not already_crashed:
+            event_log.record(event_log.WPANTUND_CRASH, self.node_name, line=line)
+
+        if self.crash_handler is not None and not already_crashed:
+            self.crash_handler(line)
+
     def subscribe_handle(self, sender, **kwargs):
-        # Unconditionally log incoming line
         line = kwargs["line"]
+        event = wpantund_log.line_event(kwargs)
+
+        # Lines nobody reacts to are not logged in lean mode; the others are
+        # always logged so that state changes and OTNS status can be replayed.
+        if event is None:
+            if is_wpantund_line_logging():
+                self.log_debug(line)
+            return
+
         self.log_debug(line)
 
         # Check to see if there has been a state transition
-        match = self.state_regex.search(line)
-        if match is not None:
-            self.state = match.group("new_state")
+        if event.type == wpantund_log.LineEventType.STATE_CHANGE:
+            self.state = event.value
+            event_log.record(event_log.STATE_CHANGE, self.node_name, state=self.state)
 
             if self.state == "uninitialized:fault":
-                self.running = False
-
-            return
+                self.__report_crash(line)
 
         # Check if wpantund has crashed
-        if "FATAL ERROR" in line:
-            self.crashed = True
-            self.running = False
-            return
+        elif event.type == wpantund_log.LineEventType.CRASH:
+            self.__report_crash(line)
 
-        if "Finished initializing NCP" in line:
+        elif event.type == wpantund_log.LineEventType.NCP_READY:
             self.running = True
 
-        if "Framing error" in line:
+        elif event.type == wpantund_log.LineEventType.FRAMING_ERROR:
             self.framing_errors += 1
 
+        elif event.type == wpantund_log.LineEventType.OTNS_STATUS:
+            key, value = wpantund_log.split_otns_status(event.value)
+            event_log.record(event_log.OTNS_STATUS, self.node_name, key=key, value=value)
+
 
 class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
     """
@@ -99,7 +164,9 @@ class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
                  virtual=False,
                  virtual_name="",
                  device=None,
-                 device_path=None):
+                 device_path=None,
+                 thread_mode=None,
+                 restart_on_crash=False):
         self.logger = None
         self.wpantund_logger = None
         self.netns = None
@@ -110,19 +177,14 @@ class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
         self.virtual_eth_peer = "v-eth1"
         self.flash_result = False
         self.otns_manager = None
+        self.restart_on_crash = restart_on_crash
 
         self.wpantund_verbose_debug = wpantund_verbose_debug
         self.thread_mode = "NCP"
-        if not virtual:
-            local_ip = get_local_ip()
-
-            try:
-                cluster_list = JsonFile.get_json("clusters.conf")["clusters"]
-                for cluster in cluster_list:
-                    if cluster["ip"] == local_ip:
-                        self.thread_mode = cluster["thread_mode"]
-            except Exception as error:
-                logging.info("Cannot load cluster.conf file." f" Running on NCP mode. Error: {error}")
+        if thread_mode is not None:
+            self.thread_mode = thread_mode
+        elif not virtual:
+            self.thread_mode = get_thread_mode()
 
         logging.debug("Thread Mode: {}".format(self.thread_mode))
 
@@ -165,25 +227,25 @@ class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
         if self.wpantund_monitor is not None:
             self.wpantund_monitor.logger = self.wpantund_logger
 
-    def log_debug(self, log_line):
+    def log_debug(self, log_line, *args):
         if self.logger is not None:
-            self.logger.debug(log_line)
+            self.logger.debug(log_line, *args)
 
-    def log_info(self, log_line):
+    def log_info(self, log_line, *args):
         if self.logger is not None:
-            self.logger.info(log_line)
+            self.logger.info(log_line, *args)
 
-    def log_warning(self, log_line):
+    def log_warning(self, log_line, *args):
         if self.logger is not None:
-            self.logger.warning(log_line)
+            self.logger.warning(log_line, *args)
 
-    def log_error(self, log_line):
+    def log_error(self, log_line, *args):
         if self.logger is not None:
-            self.logger.error(log_line)
+            self.logger.error(log_line, *args)
 
-    def log_critical(self, log_line):
+    def log_critical(self, log_line, *args):
         if self.logger is not None:
-            self.logger.critical(log_line)
+            self.logger.critical(log_line, *args)
 
 #################################
 #   base_node functionality
@@ -265,12 +327,14 @@ class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
 #   Handle wpantund and wpanctl
 #################################
 
-    def wpanctl_async(self, action, command, expect, timeout, field=None):
+    def wpanctl_async(self, action, command, expect, timeout, field=None, diagnostic=False):
         """Queue a system call into wpanctl inside the network namespace.
+
+        Diagnostic calls only feed the logs and are skipped in lean mode.
         """
         wpanctl_command = defaults.WPANCTL_PATH + f" -I {self.netns} "
         wpanctl_command += command
-        self.make_netns_call_async(wpanctl_command, expect, timeout, field)
+        self.make_netns_call_async(wpanctl_command, expect, timeout, field, diagnostic=diagnostic)
 
     def wpanctl(self, action, command, timeout):
         """Make a system call into wpanctl inside the network namespace.
@@ -313,13 +377,16 @@ class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
         self.log_info("Starting wpantund with command %s" % command)
 
         try:
-            self.wpantund_process = subprocess_runner.SubprocessRunner(command)
+            self.wpantund_process = subprocess_runner.SubprocessRunner(command, classifier=wpantund_log.classify)
 
         except Exception:
             print(traceback.format_exc())
 
         # Install signal listeners here
         self.wpantund_monitor = WpantundMonitor(publisher=self.wpantund_process)
+        self.wpantund_process.stall_handler = self.__wpantund_output_stalled
+        self.wpantund_monitor.crash_handler = self.__wpantund_crashed
+        self.wpantund_monitor.node_name = self.device.name()
 
         if self.otns_manager is not None:
             self.otns_manager.subscribe_to_node(self)
@@ -352,6 +419,58 @@ class FifteenFourDevBoardNode(WpantundWpanNode, NetnsController):
         else:
             self.log_info("No wpantund process to stop")
 
+    def __wpantund_crashed(self, line):
+        """Fail every pending command as soon as wpantund reports a fatal error.
+
+        Runs on the wpantund output thread, so a restart is handed off to its own thread.
+        """
+        self.abort_pending("wpantund crashed on %s: %s" % (self.device.name(), line))
+
+        if self.restart_on_crash:
+            restart_thread = threading.Thread(target=self.restart_wpantund, name="restart-%s" % self.netns)
+            restart_thread.daemon = True
+            restart_thread.start()
+
+    def __wpantund_output_stalled(self, location, stacks_path):
+        """Fail every pending command when handling wpantund output gets stuck.
+        """
+        self.abort_pending("wpantund output handling stalled on %s at %s, stacks written to %s" %
+                           (self.device.name(), location, stacks_path))
+
+    def collect_diagnostics(self):
+        """Log the interface list and, unless wpantund is down, its status.
+        """
+        self.log_info("Collecting diagnostics")
+        self.make_netns_call("ifconfig", DIAGNOSTICS_TIMEOUT)
+
+        if self.wpantund_process is None or (self.wpantund_monitor is not None and self.wpantund_monitor.crashed):
+            self.log_info("Skipping wpanctl status, wpantund is not running")
+            return
+        self.wpanctl("status", "status", DIAGNOSTICS_TIMEOUT)
+
+    def restart_wpantund(self, resume=True):
+        """Restart wpantund inside the network namespace.
+
+        Args:
+            resume (bool): queue a `resume` so the node rejoins its saved network.
+
+        Returns:
+            bool: True if wpantund came back up.
+        """
+        self.log_info("Restarting wpantund")
+        self.__stop_wpantund()
+
+        try:
+            self.__start_wpantund(self.thread_mode)
+        except RuntimeError as error:
+            self.log_error(str(error))
+            return False
+
+        if resume:
+            self.resume()
+
+        return True
+
     def configure_virtual_eth_peer(self, veth_name):
         netns_if = veth_name + "-netns-if"
         self.virtual_eth_peer = veth_name
@@ -606,24 +725,86 @@ class ThreadDevBoard(FifteenFourDevBoardThreadNode):
     """
     _hw_model = hw_module.HW_NRF52840
 
+    @staticmethod
+    def claim_device(name=None, sw_version=None):
+        """Claim an unused nRF52840 dev board, or an efr32 one if none is left.
+
+        Returns a (device, model) tuple. Raises HardwareNotFound if neither is available.
+        """
+        try:
+            device = hw_resource.global_instance().get_hw_module(hw_module.HW_NRF52840,
+                                                                 name=name,
+                                                                 sw_version=sw_version)
+            return device, hw_module.HW_NRF52840
+        except Exception:
+            device = hw_resource.global_instance().get_hw_module(hw_module.HW_EFR32, name=name, sw_version=sw_version)
+            return device, hw_module.HW_EFR32
+
     def get_device(self, name=None, sw_version=None):
         """Find an unused dev board, or other hardware.
         """
         try:
-            self.device = hw_resource.global_instance().get_hw_module(hw_module.HW_NRF52840,
-                                                                      name=name,
-                                                                      sw_version=sw_version)
-            self.hwModel = hw_module.HW_NRF52840
+            self.device, self.hwModel = self.claim_device(name=name, sw_version=sw_version)
+        except Exception as error:
+            self.log_critical("Cannot find nRF52840 or efr32 Dev. board!! Error: %s" % error)
+
+        self.device_path = self.device.port()
+
+    @classmethod
+    def create_many(cls, count, wpantund_verbose_debug=False, sw_version=None, max_workers=None):
+        """Build `count` boards at once.
+
+        The clusters.conf lookup and local IP query are done once for all boards and hardware is claimed up
+        front. The boards, including their network namespaces and worker threads, are then constructed
+        concurrently. Returns the list of boards once every one of them is ready.
+
+        If anything fails, the boards already built are torn down (worker thread stopped, network namespace
+        cleaned up), all the hardware claimed here is released and the error is raised.
+        """
+        thread_mode = get_thread_mode()
+
+        claimed = []
+        try:
+            for _ in range(count):
+                claimed.append(cls.claim_device(sw_version=sw_version))
         except Exception:
+            for device, _ in claimed:
+                hw_resource.global_instance().free_hw_module(device)
+            raise
+
+        def build(claim):
+            device, model = claim
+            board = cls(wpantund_verbose_debug=wpantund_verbose_debug,
+                        sw_version=sw_version,
+                        device=device,
+                        device_path=device.port(),
+                        thread_mode=thread_mode)
+            board.hwModel = model
+            return board
+
+        with ThreadPoolExecutor(max_workers=max_workers or max(count, 1)) as executor:
+            futures = [executor.submit(build, claim) for claim in claimed]
+
+        boards = []
+        errors = []
+        for future in futures:
             try:
-                self.device = hw_resource.global_instance().get_hw_module(hw_module.HW_EFR32,
-                                                                          name=name,
-                                                                          sw_version=sw_version)
-                self.hwModel = hw_module.HW_EFR32
+                boards.append(future.result())
             except Exception as error:
-                self.log_critical("Cannot find nRF52840 or efr32 Dev. board!! Error: %s" % error)
-
-        self.device_path = self.device.port()
+                errors.append(error)
+
+        if errors:
+            for board in boards:
+                try:
+                    board.stop_worker()
+                    board.cleanup_netns()
+                except Exception as error:
+                    logging.error("Failed to tear down %s: %s" % (board.device.name(), error))
+            for device, _ in claimed:
+                hw_resource.global_instance().free_hw_module(device)
+            raise errors[0]
+
+        return boards
 
     def get_unclaimed_device(self, name: str):
         """Get an unclaimed device by name.
@@ -0,0 +1,137 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Typed state record of a node.
+
+The labels every node uses are slots of NodeState, any other label goes to a
+dict of extras. Fields with a declared type are converted once when written,
+so readers get the typed value without converting it again. Writes are
+serialized by a lock; reads take no lock, as each read is a single attribute
+or dict lookup.
+"""
+
+import threading
+
+import silk.tools.watchable as watchable
+
+
+def _hex_int(value):
+    return int(value, 16)
+
+
+HEX_INT = "hex-int"
+
+# Declared type of the typed fields: the to_type get_data is called with, and its converter.
+FIELD_TYPES = {
+    "panid": (HEX_INT, _hex_int),
+    "channel": (int, int),
+    "ping6_sent": (int, int),
+    "ping6_received": (int, int),
+    "ping6_round_trip_time": (float, float),
+}
+
+FIELDS = ("ip6_lla", "ip6_mla", "role", "panid", "xpanid", "channel", "network_name", "psk", "wpan_mac_addr",
+          "ip6_postfix", "ping6_sent", "ping6_received", "ping6_results", "ping6_round_trip_time")
+
+_TYPED_SUFFIX = "_typed"
+_FIELD_SET = frozenset(FIELDS)
+
+
+class NodeState(object):
+    """State of one node, keyed by the data labels of the node.
+
+    Listeners are called as listener(field, old_value, new_value) on the writing
+    thread after a field changes. Setting a field holding a watchable sets the
+    watchable instead of replacing it.
+
+    Args:
+        lock (threading.Lock): lock serializing the writes, a new one if None.
+    """
+
+    __slots__ = FIELDS + tuple(field + _TYPED_SUFFIX for field in FIELD_TYPES) + ("extras", "_lock", "_listeners")
+
+    def __init__(self, lock=None):
+        self._lock = threading.Lock() if lock is None else lock
+        self._listeners = ()
+        self.clear()
+
+    def clear(self):
+        """Reset every field to None and drop the extras.
+        """
+        with self._lock:
+            for field in FIELDS:
+                object.__setattr__(self, field, None)
+            for field in FIELD_TYPES:
+                object.__setattr__(self, field + _TYPED_SUFFIX, None)
+            self.extras = {}
+
+    def get(self, field, default=None):
+        """Returns the value of field as it was written, or default if it was never written.
+        """
+        if field in _FIELD_SET:
+            value = getattr(self, field)
+            return default if value is None else value
+        return self.extras.get(field, default)
+
+    def has_type(self, field, to_type):
+        """Returns True if field is converted to to_type on write.
+        """
+        declared = FIELD_TYPES.get(field)
+        return declared is not None and declared[0] == to_type
+
+    def get_typed(self, field, default=None):
+        """Returns the converted value of a typed field, or default if it is unset or did not convert.
+        """
+        value = getattr(self, field + _TYPED_SUFFIX)
+        return default if value is None else value
+
+    def set(self, field, value):
+        """Write field, converting it if it is typed, and notify the listeners if it changed.
+        """
+        if isinstance(value, str):
+            value = value.strip()
+
+        with self._lock:
+            old_value = self.get(field)
+
+            if watchable.is_watchable(old_value):
+                old_value.set(value)
+                return
+
+            if field in _FIELD_SET:
+                object.__setattr__(self, field, value)
+                if field in FIELD_TYPES:
+                    object.__setattr__(self, field + _TYPED_SUFFIX, self.__convert(field, value))
+            else:
+                self.extras[field] = value
+
+        if self._listeners and old_value != value:
+            for listener in self._listeners:
+                listener(field, old_value, value)
+
+    @staticmethod
+    def __convert(field, value):
+        if value is None:
+            return None
+        try:
+            return FIELD_TYPES[field][1](value)
+        except (TypeError, ValueError):
+            return None
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            self._listeners = tuple(known for known in self._listeners if known != listener)
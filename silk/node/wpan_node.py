@@ -125,7 +125,7 @@ class WpanNode(base_node.BaseNode):
 
         Removes any ":" from string
         """
-        return self.get_data(self.wpan_mac_addr_label, default="").replace(":", "")
+        return (self.state.wpan_mac_addr or "").replace(":", "")
 
     @property
     def network_name_label(self):
@@ -133,7 +133,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def network_name(self):
-        return self.get_data(self.network_name_label)
+        return self.state.network_name
 
     @property
     def panid_label(self):
@@ -141,7 +141,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def panid(self):
-        return self.get_data(self.panid_label, "hex-int", default=-1)
+        return self.state.get_typed("panid", -1)
 
     @property
     def xpanid_label(self):
@@ -149,7 +149,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def xpanid(self):
-        return self.get_data(self.xpanid_label)
+        return self.state.xpanid
 
     @property
     def channel_label(self):
@@ -157,7 +157,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def channel(self):
-        return self.get_data(self.channel_label, int, default=0)
+        return self.state.get_typed("channel", 0)
 
     @property
     def role_label(self):
@@ -165,7 +165,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def role(self):
-        return self.get_data(self.role_label)
+        return self.state.role
 
     @property
     def psk_label(self):
@@ -173,7 +173,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def psk(self):
-        return self.get_data(self.psk_label)
+        return self.state.psk
 
     @property
     def ip6_postfix_label(self):
@@ -181,7 +181,7 @@ class WpanNode(base_node.BaseNode):
 
     @property
     def ip6_postfix(self):
-        return self.get_data(self.ip6_postfix_label)
+        return self.state.ip6_postfix
 
     def ip6_postfix_process(self):
         mac_addr = self.get_data(self.ip6_postfix_label).split(":")
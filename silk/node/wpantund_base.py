@@ -241,7 +241,7 @@ class WpantundWpanNode(wpan_node.WpanNode):
 
         self.wpanctl_async(action, "getprop Network:Key", r"\[[0-9a-fA-F]{32}\]", 20, self.psk_label)
 
-        self.wpanctl_async(action, "status", "AllowingJoin", 20)
+        self.wpanctl_async(action, "status", "AllowingJoin", 20, diagnostic=True)
 
     def leave(self):
         """Tell the NCP to leave its current PAN.
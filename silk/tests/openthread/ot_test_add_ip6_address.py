@@ -22,12 +22,9 @@ from silk.tools import wpan_table_parser
 from silk.tools import wpan_util
 from silk.tools.wpan_util import verify, verify_within
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 IP6_PREFIX_1 = "fd00:c0de::"
 IP6_PREFIX_2 = "fd00:deed::"
 IP6_PREFIX_3 = "fd00:beef::"
@@ -21,12 +21,9 @@ from silk.node.wpan_node import WpanCredentials
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import (verify, verify_within, is_associated, verify_address)
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 WAIT_TIME = 10  # in seconds
 CHILD_SUPERVISION_CHECK_TIMEOUT = 1
 
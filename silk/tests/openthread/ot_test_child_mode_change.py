@@ -20,12 +20,9 @@ from silk.node.wpan_node import WpanCredentials
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify, verify_within, VerifyError
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 WAIT_INTERVAL = 10
 # Thread Mode for end-device and sleepy end-device
 DEVICE_MODE_SLEEPY_END_DEVICE = wpan.THREAD_MODE_FLAG_FULL_NETWORK_DATA
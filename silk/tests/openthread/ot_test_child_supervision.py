@@ -23,7 +23,6 @@ from silk.node.wpan_node import WpanCredentials
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify, verify_within
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
@@ -31,8 +30,6 @@ CHILD_TIMEOUT = 6
 CHILD_SUPERVISION_CHECK_TIMEOUT = 12
 PARENT_SUPERVISION_INTERVAL = 10
 
-hwr.global_instance()
-
 
 class TestChildSupervision(testcase.TestCase):
     poll_interval = 500
@@ -21,12 +21,9 @@ from silk.node.wpan_node import WpanCredentials
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify, verify_within, is_associated
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 CHILD_SUPERVISION_CHECK_TIMEOUT = 5
 PARENT_SUPERVISION_INTERVAL = 60
 CHILD_TIMEOUT = 600
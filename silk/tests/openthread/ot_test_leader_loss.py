@@ -21,11 +21,9 @@ from silk.node.wpan_node import WpanCredentials
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify, verify_within
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
 ROLE_WAIT_TIME = 180
 LEADER_CHANGE_WAIT_TIME = 5 * 60
 NUM_CHILDREN = 1
@@ -18,11 +18,9 @@ import unittest
 from silk.config import wpan_constants as wpan
 from silk.tools.wpan_util import verify, verify_within, is_associated
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
 WAIT_TIME = 2  # seconds
 
 PSKd = "123456"
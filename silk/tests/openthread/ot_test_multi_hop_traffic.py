@@ -19,18 +19,16 @@ import random
 import time
 import unittest
 
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
+from silk.tools import topology
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify, verify_within
 from silk.unit_tests.test_utils import random_string
 from silk.utils import process_cleanup
 
-hwr.global_instance()
-
 NUM_ROUTERS = 4
 NUM_FED_CHILDREN = 2
 NUM_SED_CHILDREN = 4
@@ -63,16 +61,11 @@ class TestMultiHopTraffic(testcase.TestCase):
 
     @classmethod
     def hardware_select(cls: 'TestMultiHopTraffic'):
-        cls.routers = []
-        cls.sed_children = []
-        cls.fed_children = []
-
-        for _ in range(NUM_ROUTERS):
-            cls.routers.append(ffdb.ThreadDevBoard())
-            cls.sed_children.append(ffdb.ThreadDevBoard())
+        boards = ffdb.ThreadDevBoard.create_many(2 * NUM_ROUTERS + NUM_FED_CHILDREN)
 
-        for _ in range(NUM_FED_CHILDREN):
-            cls.fed_children.append(ffdb.ThreadDevBoard())
+        cls.routers = boards[0:2 * NUM_ROUTERS:2]
+        cls.sed_children = boards[1:2 * NUM_ROUTERS:2]
+        cls.fed_children = boards[2 * NUM_ROUTERS:]
 
         cls.all_nodes = cls.routers + cls.sed_children + cls.fed_children
 
@@ -112,45 +105,23 @@ class TestMultiHopTraffic(testcase.TestCase):
 
     @testcase.test_method_decorator
     def test01_Pairing(self):
-        # Allowlist routers with their corresponding sleepy children
-        for index in range(NUM_ROUTERS):
-            self.routers[index].allowlist_node(self.sed_children[index])
-            self.sed_children[index].allowlist_node(self.routers[index])
-
-        # Allowlist a FED child for the first and last routers
-        self.routers[0].allowlist_node(self.fed_children[0])
-        self.fed_children[0].allowlist_node(self.routers[0])
+        # Chain the routers, give each router its sleepy child and the first and last routers a FED child
+        edges = topology.chain(self.routers)
+        edges += list(zip(self.routers, self.sed_children))
+        edges += [(self.routers[0], self.fed_children[0]), (self.routers[-1], self.fed_children[-1])]
 
-        self.routers[-1].allowlist_node(self.fed_children[-1])
-        self.fed_children[-1].allowlist_node(self.routers[-1])
-
-        # Allowlist routers at [index-1] and [index]
-        for index in range(1, NUM_ROUTERS):
-            self.routers[index - 1].allowlist_node(self.routers[index])
-            self.routers[index].allowlist_node(self.routers[index - 1])
+        roles = {child: "sleepy-end-device" for child in self.sed_children}
+        roles.update({child: "end-node" for child in self.fed_children})
 
-        self.routers[0].form(self.network_data, "router")
-        self.routers[0].permit_join(60)
-        self.wait_for_completion(self.device_list)
+        timings = topology.Topology(edges, roles=roles).build(self.network_data, permit_join_period=60)
+        self.logger.info("Topology build timings: %s" % dict(timings))
 
         self.logger.info(self.routers[0].ip6_lla)
         self.logger.info(self.routers[0].ip6_thread_ula)
 
-        self.network_data.xpanid = self.routers[0].xpanid
-        self.network_data.panid = self.routers[0].panid
-
-        self.sed_children[0].join(self.network_data, "sleepy-end-device")
-        self.sed_children[0].set_sleep_poll_interval(POLL_INTERVAL)
-
-        for index in range(1, NUM_ROUTERS):
-            self.routers[index].join(self.network_data, "router")
-            self.sed_children[index].join(self.network_data, "sleepy-end-device")
-            self.sed_children[index].set_sleep_poll_interval(POLL_INTERVAL)
-            self.wait_for_completion(self.device_list)
-
-        for index in range(NUM_FED_CHILDREN):
-            self.fed_children[index].join(self.network_data, "end-node")
-            self.wait_for_completion(self.device_list)
+        for child in self.sed_children:
+            child.set_sleep_poll_interval(POLL_INTERVAL)
+        self.wait_for_completion(self.device_list)
 
         for index in range(1, NUM_ROUTERS):
             self.assertTrue(self.routers[index].get(wpan.WPAN_NODE_TYPE) == wpan.NODE_TYPE_ROUTER)
@@ -20,12 +20,9 @@ from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
 from silk.tools import wpan_table_parser
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 NUM_ROUTERS = 2
 NUM_CHILDREN = 1
 
@@ -20,12 +20,9 @@ from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
 from silk.tools.wpan_util import (verify_within, verify_prefix_with_rloc16, verify_no_prefix_with_rloc16)
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 common_prefix = "fd00:cafe::"
 prefix1 = "fd00:1::"
 prefix2 = "fd00:2::"
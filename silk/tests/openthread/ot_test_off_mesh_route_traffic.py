@@ -25,12 +25,9 @@ from silk.utils import process_cleanup
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify_within
 from silk.unit_tests.test_utils import random_string
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 WAIT_TIME = 10
 NUM_ROUTES = 3
 NUM_ROUTES_LOCAL = 1
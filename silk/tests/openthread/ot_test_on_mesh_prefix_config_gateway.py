@@ -20,12 +20,9 @@ from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
 from silk.tools.wpan_util import verify_address, verify_prefix, is_associated, verify
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 prefix1 = "fd00:abba:cafe::"
 prefix2 = "fd00:1234::"
 prefix3 = "fd00:deed::"
@@ -22,12 +22,9 @@ from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify
 from silk.tools.wpan_util import verify_address, verify_prefix
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 prefix1 = "fd00:abba:cafe::"
 prefix2 = "fd00:1234::"
 NUM_CHILDREN = 1
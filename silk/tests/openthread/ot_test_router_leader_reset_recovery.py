@@ -20,11 +20,9 @@ from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
 from silk.tools.wpan_util import (verify, verify_within, is_associated, check_neighbor_table)
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
 WAIT_INTERVAL = 6
 
 
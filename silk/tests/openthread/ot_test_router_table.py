@@ -18,15 +18,13 @@ import time
 
 from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
+from silk.tools import topology
 from silk.tools import wpan_table_parser
 from silk.tools.wpan_util import verify, VerifyError, verify_within
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 WAIT_TIME = 30
 
 
@@ -89,39 +87,15 @@ class TestRouterTable(testcase.TestCase):
 
     @testcase.test_method_decorator
     def test01_Form_Network(self):
-        # Form the Network
-        self.r1.form(self.network_data, "router")
-        self.wait_for_completion(self.device_list)
-
-        # allowlist all routers with each other
-        self.r1.allowlist_node(self.r2)
-        self.r2.allowlist_node(self.r1)
-
-        self.r1.allowlist_node(self.r3)
-        self.r3.allowlist_node(self.r1)
-
-        self.r2.allowlist_node(self.r3)
-        self.r3.allowlist_node(self.r2)
-
-        self.r3.allowlist_node(self.r4)
-        self.r4.allowlist_node(self.r3)
-
-        # allowlist between r4 and c1
-        self.r4.allowlist_node(self.c1)
-        self.c1.allowlist_node(self.r4)
+        # allowlist all routers with each other, r4 with c1, then form on r1 and join outwards
+        links = topology.mesh([self.r1, self.r2, self.r3]) + [(self.r3, self.r4), (self.r4, self.c1)]
+        network = topology.Topology(links, roles={self.c1: "sleepy-end-device"})
+        timings = network.build(self.network_data)
+        self.logger.info("Topology build timings: %s" % dict(timings))
 
         self.logger.info(self.r1.ip6_lla)
         self.logger.info(self.r1.ip6_thread_ula)
 
-        self.network_data.xpanid = self.r1.xpanid
-        self.network_data.panid = self.r1.panid
-
-        for router in (self.r2, self.r3, self.r4):
-            router.join(self.network_data, "router")
-            self.wait_for_completion(self.device_list)
-
-        self.c1.join(self.network_data, "sleepy-end-device")
-        self.wait_for_completion(self.device_list)
         self.c1.set_sleep_poll_interval(2000)
 
         for _ in range(30):
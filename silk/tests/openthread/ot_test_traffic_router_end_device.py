@@ -23,12 +23,9 @@ from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
 from silk.utils import process_cleanup
 from silk.unit_tests.test_utils import random_string
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 
 class TestTrafficRouterEndDevice(testcase.TestCase):
     """Test traffic between a router and an end device in a two node network.
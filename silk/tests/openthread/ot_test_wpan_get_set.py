@@ -18,12 +18,9 @@ import unittest
 from silk.config import wpan_constants as wpan
 from silk.node.wpan_node import WpanCredentials
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 all_gettable_props = [
     wpan.WPAN_STATE,
     wpan.WPAN_NAME,
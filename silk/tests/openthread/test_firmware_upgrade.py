@@ -15,15 +15,12 @@
 import time
 
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
 FIRMWARE_FILE_CDC = "/opt/openthread_test/nrf52840_image/ot-ncp-ftd.hex"
 FIRMWARE_FILE_CLI = "/opt/openthread_test/nrf52840_image/ot-cli-ftd.hex"
 
-hwr.global_instance()
-
 
 class TestFirmwareUpgrade(testcase.TestCase):
 
@@ -16,12 +16,9 @@ import time
 import unittest
 
 from silk.utils import process_cleanup
-import silk.hw.hw_resource as hwr
 import silk.node.fifteen_four_dev_board as ffdb
 import silk.tests.testcase as testcase
 
-hwr.global_instance()
-
 
 class TestWpantundStart(testcase.TestCase):
     poll_interval = 1000
@@ -27,6 +27,7 @@ import time
 
 from silk.tools.otns_manager import OtnsManager, OtnsNodeSummaryCollection
 from silk.tools.otns_manager import RegexType as OtnsRegexType
+from silk.utils import compressed_log
 import silk.hw.hw_resource as hw_resource
 import silk.node.fifteen_four_dev_board as ffdb
 
@@ -285,30 +286,28 @@ class SilkReplayer(object):
             int: the last processed line number.
         """
         self.otns_manager.set_replay_speed(self.speed)
-        with open(file=self.input_path, mode="r") as file:
-            for line_number, line in enumerate(file):
-                if line_number < start_line:
-                    continue
-                if stop_regex and re.search(stop_regex, line):
-                    return line_number
-                line_match = re.search(RegexType.LOG_LINE.value, line)
-                if line_match:
-                    timestamp = datetime.strptime(line_match.group(1), DATE_FORMAT)
-                    if not self.last_time:
-                        self.last_time = timestamp
-                    time_diff = timestamp - self.last_time
-                    delay = time_diff.total_seconds() / self.speed
+        # iter_lines reads plain, gzip and zstd compressed logs alike.
+        for line_number, line in enumerate(compressed_log.iter_lines(self.input_path, start_line), start_line):
+            if stop_regex and re.search(stop_regex, line):
+                return line_number
+            line_match = re.search(RegexType.LOG_LINE.value, line)
+            if line_match:
+                timestamp = datetime.strptime(line_match.group(1), DATE_FORMAT)
+                if not self.last_time:
                     self.last_time = timestamp
+                time_diff = timestamp - self.last_time
+                delay = time_diff.total_seconds() / self.speed
+                self.last_time = timestamp
 
-                    entity_name = line_match.group(2)
-                    message = line_match.group(4)
+                entity_name = line_match.group(2)
+                message = line_match.group(4)
 
-                    # delay for the time difference between two log lines
-                    if delay > 0:
-                        time.sleep(delay)
-                    self.execute_message(entity_name, message, timestamp)
+                # delay for the time difference between two log lines
+                if delay > 0:
+                    time.sleep(delay)
+                self.execute_message(entity_name, message, timestamp)
 
-            return line_number
+        return line_number
 
 
 if __name__ == "__main__":
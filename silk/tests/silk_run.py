@@ -167,6 +167,27 @@ class SilkRunner(object):
             print("Setting OTNS server host to {0}".format(args.otns_server))
             silk.tests.testcase.set_otns_host(args.otns_server)
         silk.tests.testcase.set_stream_verbosity(self.verbosity)
+        if args.async_logging:
+            print("Writing logs asynchronously")
+            silk.tests.testcase.set_async_logging(queue_size=args.log_queue_size,
+                                                  policy="drop" if args.log_drop else "block",
+                                                  shard_by_node=args.log_shards)
+        if args.lean:
+            print("Running in lean mode")
+            silk.tests.testcase.set_lean_mode(True)
+        if args.wpantund_lines:
+            silk.tests.testcase.set_wpantund_line_logging(True)
+        if args.watchdog is not None:
+            print("Failing nodes stalled for {0}s".format(args.watchdog))
+            silk.tests.testcase.set_watchdog(args.watchdog)
+        if args.sample_resources is not None:
+            print("Sampling CPU and memory every {0}s".format(args.sample_resources))
+            silk.tests.testcase.set_resource_sampling(args.sample_resources)
+        if args.compress_log is not None:
+            print("Compressing silk.log with {0}".format(args.compress_log))
+            silk.tests.testcase.set_log_compression(compression=args.compress_log,
+                                                    max_bytes=args.log_max_bytes,
+                                                    backup_count=args.log_backups)
         hw_resource.global_instance(args.hw_conf_file)
 
         self.discover()
@@ -196,7 +217,69 @@ class SilkRunner(object):
                             help="Set the verbosity level of the console (0=quiet, 1=default, 2=verbose)")
         parser.add_argument("pattern", nargs="+", metavar="P", help="test file search pattern")
         parser.add_argument("-s", "--otns", dest="otns_server", metavar="OtnsServer", help="OTNS server address")
-        return parser.parse_args(argv[1:])
+        parser.add_argument("-l",
+                            "--lean",
+                            dest="lean",
+                            action="store_true",
+                            help="Skip diagnostic-only system calls and wpantund lines no monitor reacts to")
+        parser.add_argument("-w",
+                            "--wpantund-lines",
+                            dest="wpantund_lines",
+                            action="store_true",
+                            help="Log every wpantund output line even in lean mode")
+        parser.add_argument("-a",
+                            "--async-logging",
+                            dest="async_logging",
+                            action="store_true",
+                            help="Write logs from a background thread through a bounded queue")
+        parser.add_argument("--log-queue-size",
+                            dest="log_queue_size",
+                            type=int,
+                            default=10000,
+                            metavar="N",
+                            help="Maximum number of log records waiting to be written with --async-logging")
+        parser.add_argument("--log-drop",
+                            dest="log_drop",
+                            action="store_true",
+                            help="Drop log records instead of blocking when the queue is full")
+        parser.add_argument("--log-shards",
+                            dest="log_shards",
+                            action="store_true",
+                            help="Also write each node's logs to its own file next to silk.log")
+        parser.add_argument("--watchdog",
+                            dest="watchdog",
+                            type=float,
+                            metavar="SECONDS",
+                            help="Dump thread stacks and fail a node whose command prints nothing for SECONDS")
+        parser.add_argument("--sample-resources",
+                            dest="sample_resources",
+                            type=float,
+                            metavar="SECONDS",
+                            help="Record CPU and RSS of silk, wpantund and sniffer processes every SECONDS")
+        parser.add_argument("-z",
+                            "--compress-log",
+                            dest="compress_log",
+                            nargs="?",
+                            const="auto",
+                            choices=["auto", "gzip", "zstd"],
+                            help="Compress silk.log while it is written (auto uses zstd when installed)")
+        parser.add_argument("--log-max-bytes",
+                            dest="log_max_bytes",
+                            type=int,
+                            default=0,
+                            metavar="N",
+                            help="Rotate the compressed silk.log once it reaches N bytes")
+        parser.add_argument("--log-backups",
+                            dest="log_backups",
+                            type=int,
+                            default=0,
+                            metavar="N",
+                            help="Number of rotated compressed logs to keep")
+        args = parser.parse_args(argv[1:])
+
+        if args.log_max_bytes > 0 and args.log_backups < 1:
+            parser.error("--log-max-bytes needs --log-backups of at least 1")
+        return args
 
     def discover(self):
         self.test_suite = unittest.TestSuite()
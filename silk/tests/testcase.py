@@ -26,11 +26,18 @@ import traceback
 import unittest
 
 from silk.config import wpan_constants as wpan
+from silk.device.netns_base import NetnsController
 from silk.hw.hw_resource import HardwareNotFound
 from silk.node.fifteen_four_dev_board import ThreadDevBoard
-from silk.tools.otns_manager import OtnsManager
+from silk.tools import topology_snapshot
+from silk.utils import compressed_log
+from silk.utils import event_log
+from silk.utils import log_pipeline
+from silk.utils import resource_sampler
+from silk.utils import watchdog
 import silk.config.defaults
 import silk.node.base_node
+import silk.node.fifteen_four_dev_board
 import silk.node.openthread_sniffer as openthread_sniffer
 import silk.node.sniffer_base as sniffer_node
 
@@ -47,6 +54,11 @@ _STREAM_VERBOSITY = 1
 _FILE_HANDLER = None
 _STREAM_HANDLER = None
 _OTNS_HOST = None
+_ASYNC_LOGGING = None
+_LOG_PIPELINE = None
+_LOG_COMPRESSION = None
+_WATCHDOG_TIMEOUT = None
+_RESOURCE_SAMPLING_INTERVAL = None
 
 
 def set_output_directory(path):
@@ -76,6 +88,71 @@ def set_stream_verbosity(verbosity):
     _STREAM_VERBOSITY = verbosity
 
 
+def set_lean_mode(enabled):
+    """Skip diagnostic-only system calls and collect them only when a test fails.
+    """
+    silk.node.base_node.set_lean_mode(enabled)
+
+
+def set_wpantund_line_logging(enabled):
+    """Log every wpantund output line, not only the ones the monitors react to, even in lean mode.
+    """
+    silk.node.fifteen_four_dev_board.set_wpantund_line_logging(enabled)
+
+
+def set_async_logging(queue_size=10000, policy=log_pipeline.POLICY_BLOCK, shard_by_node=False):
+    """Write framework logs from a background thread instead of the logging thread.
+
+    Args:
+        queue_size (int): maximum number of records waiting to be written.
+        policy (str): "block" to make loggers wait when the queue is full, "drop" to discard the record.
+        shard_by_node (bool): also write each node's records to silk.<node>.log next to silk.log.
+    """
+    global _ASYNC_LOGGING
+    _ASYNC_LOGGING = {"queue_size": queue_size, "policy": policy, "shard_by_node": shard_by_node}
+
+
+def set_log_compression(compression=compressed_log.COMPRESSION_AUTO, max_bytes=0, backup_count=0):
+    """Compress silk.log as it is written, rotating it by size.
+
+    Args:
+        compression (str): "gzip", "zstd", or "auto" to use zstd when it is installed.
+        max_bytes (int): compressed size at which silk.log is rotated; 0 never rotates.
+        backup_count (int): number of rotated logs to keep.
+    """
+    global _LOG_COMPRESSION
+    _LOG_COMPRESSION = {"compression": compression, "max_bytes": max_bytes, "backup_count": backup_count}
+
+
+def set_watchdog(timeout):
+    """Fail a node whose worker thread makes no progress for timeout seconds.
+
+    A system call makes progress whenever its command prints output, so timeout should exceed the longest a command
+    used by the tests runs without printing. Function calls, such as firmware flashing, get
+    system_call_manager.FUNCTION_CALL_WATCHDOG_BUDGET times timeout. The stacks of all threads are written to the
+    test output directory when it happens.
+    """
+    global _WATCHDOG_TIMEOUT
+    _WATCHDOG_TIMEOUT = timeout
+
+
+def set_resource_sampling(interval):
+    """Sample CPU usage and RSS of silk, wpantund and sniffer processes every interval seconds during each test.
+    """
+    global _RESOURCE_SAMPLING_INTERVAL
+    _RESOURCE_SAMPLING_INTERVAL = interval
+
+
+def stop_async_logging():
+    """Flush and stop the asynchronous logging pipeline, if one is running.
+    """
+    global _LOG_PIPELINE
+
+    if _LOG_PIPELINE is not None:
+        _LOG_PIPELINE.stop()
+        _LOG_PIPELINE = None
+
+
 def get_silk_child_logger(logger, device_name):
     """
     Silk nodes should take a logger object on instantiation.
@@ -106,9 +183,13 @@ def get_framework_logger(output_dest):
     # Remove previous handler, if any
     if _FILE_HANDLER is not None:
         new_logger.removeHandler(_FILE_HANDLER)
+        _FILE_HANDLER.close()
 
     # Configure and install new file handler
-    _FILE_HANDLER = logging.FileHandler(output_dest, mode="w")
+    if _LOG_COMPRESSION is None:
+        _FILE_HANDLER = logging.FileHandler(output_dest, mode="w")
+    else:
+        _FILE_HANDLER = compressed_log.CompressedRotatingFileHandler(output_dest, **_LOG_COMPRESSION)
     _FILE_HANDLER.setLevel(logging.DEBUG)
     _FILE_HANDLER.setFormatter(formatter)
 
@@ -125,8 +206,22 @@ def get_framework_logger(output_dest):
     _STREAM_HANDLER = logging.StreamHandler()
     _STREAM_HANDLER.setLevel(stream_level)
     _STREAM_HANDLER.setFormatter(formatter)
-    new_logger.addHandler(_STREAM_HANDLER)
-    new_logger.addHandler(_FILE_HANDLER)
+
+    stop_async_logging()
+    if _ASYNC_LOGGING is None:
+        new_logger.addHandler(_STREAM_HANDLER)
+        new_logger.addHandler(_FILE_HANDLER)
+        return new_logger
+
+    global _LOG_PIPELINE
+
+    handlers = [_STREAM_HANDLER, _FILE_HANDLER]
+    if _ASYNC_LOGGING["shard_by_node"]:
+        handlers.append(log_pipeline.NodeShardHandler(os.path.dirname(output_dest), formatter=formatter))
+
+    _LOG_PIPELINE = log_pipeline.LogPipeline(handlers, _ASYNC_LOGGING["queue_size"], _ASYNC_LOGGING["policy"])
+    _LOG_PIPELINE.start()
+    new_logger.addHandler(_LOG_PIPELINE.queue_handler)
 
     return new_logger
 
@@ -155,6 +250,9 @@ def setup_decorator(func):
 
         # Log the current test method
         self.logger.info("SET UP %s.%s" % (self.current_test_class, self.current_test_method))
+        event_log.record(event_log.TEST_MARKER,
+                         marker="set_up",
+                         name="%s.%s" % (self.current_test_class, self.current_test_method))
 
         # Call the setUp function
         func(self)
@@ -175,6 +273,9 @@ def teardown_decorator(func):
 
     def wrapper(self, *args, **kwargs):
         self.logger.info("TEAR DOWN %s.%s" % (self.current_test_class, self.current_test_method))
+        event_log.record(event_log.TEST_MARKER,
+                         marker="tear_down",
+                         name="%s.%s" % (self.current_test_class, self.current_test_method))
 
         self.wait_for_completion(self.device_list)
         func(self)
@@ -222,6 +323,13 @@ def setup_class_decorator(func):
         cls.logger.info("Log dest: %s" % cls.current_output_directory)
         cls.logger.info("SET UP CLASS %s" % cls.current_test_class)
 
+        # Structured copy of the framework events for tools that should not parse silk.log
+        event_log.open_event_log(os.path.join(cls.current_output_directory, event_log.EVENT_LOG_FILENAME))
+        event_log.record(event_log.TEST_MARKER, marker="set_up_class", name=cls.current_test_class)
+
+        if _WATCHDOG_TIMEOUT:
+            watchdog.start(_WATCHDOG_TIMEOUT, cls.current_output_directory)
+
         # Establish a results dictionary
         try:
             cls.results[cls.current_test_class] = collections.OrderedDict()
@@ -234,6 +342,9 @@ def setup_class_decorator(func):
         cls.results[cls.current_test_class][SUITE_ID] = curr_suite_id
 
         if _OTNS_HOST:
+            # OTNS pulls in gRPC, only load it when a server is configured.
+            from silk.tools.otns_manager import OtnsManager
+
             cls.otns_manager = OtnsManager(server_host=_OTNS_HOST, logger=cls.logger.getChild("otnsManager"))
             cls.otns_manager.set_test_title(f"{cls.current_test_class}.set_up")
             cls.otns_manager.set_replay_speed(1.0)
@@ -294,6 +405,7 @@ def teardown_class_decorator(func):
     def wrapper(*args, **kwargs):
         cls = args[0]
         cls.logger.info("TEAR DOWN CLASS %s" % cls.current_test_class)
+        event_log.record(event_log.TEST_MARKER, marker="tear_down_class", name=cls.current_test_class)
 
         if cls.otns_manager:
             cls.otns_manager.set_test_title(f"{cls.current_test_class}.tear_down")
@@ -305,6 +417,8 @@ def teardown_class_decorator(func):
         func(*args, **kwargs)
 
         cls.logger.info("TEAR DOWN CLASS DONE %s" % cls.current_test_class)
+        event_log.record(event_log.TEST_MARKER, marker="tear_down_class_done", name=cls.current_test_class)
+        watchdog.stop()
 
         # Print results summary
         cls.logger.info("=" * 70)
@@ -336,6 +450,10 @@ def teardown_class_decorator(func):
         # Remove the file and stream handler at the end of the test
         while len(cls.logger.handlers) > 0:
             cls.logger.removeHandler(cls.logger.handlers[0])
+        stop_async_logging()
+        if _FILE_HANDLER is not None:
+            _FILE_HANDLER.close()
+        event_log.close_event_log()
 
         output_file = open(os.path.join(cls.current_output_directory, "results.json"), "w")
         json.dump(cls.results, output_file, indent=4)
@@ -361,10 +479,14 @@ def test_method_decorator(func):
         self.add_test_device(None)
         self.wait_for_completion(self.device_list)
         self.logger.info("RUNNING TEST %s.%s" % (self.current_test_class, self.current_test_method))
+        event_log.record(event_log.TEST_MARKER,
+                         marker="running_test",
+                         name="%s.%s" % (self.current_test_class, self.current_test_method))
 
         if self.otns_manager:
             self.otns_manager.set_test_title(f"{self.current_test_class}.{self.current_test_method}")
 
+        sampler = self.start_resource_sampling()
         try:
             func(self)
         except:
@@ -373,8 +495,11 @@ def test_method_decorator(func):
                 for line in call.rstrip().splitlines():
                     self.logger.error(line)
             self.logger.error(stack[1])
+            self.collect_diagnostics(self.device_list)
 
             raise
+        finally:
+            self.stop_resource_sampling(sampler)
 
         self.results[self.current_test_class][self.current_test_method]["test"] = True
 
@@ -398,17 +523,26 @@ class stress_test_decorator(object):
 
             pass_count = 0
 
-            for ii in range(0, num_iterations, 1):
-                self.logger.info("RUNNING TEST %s.%s (%s/%s)" %
-                                 (self.current_test_class, self.current_test_method, ii + 1, num_iterations))
-                try:
-                    func(self)
-                    pass_count += 1
-                except:
-                    stack = sys.exc_info()
-                    for call in traceback.format_tb(stack[2]):
-                        for line in call.rstrip().splitlines():
-                            self.logger.error(line)
+            sampler = self.start_resource_sampling()
+            try:
+                for ii in range(0, num_iterations, 1):
+                    self.logger.info("RUNNING TEST %s.%s (%s/%s)" %
+                                     (self.current_test_class, self.current_test_method, ii + 1, num_iterations))
+                    event_log.record(event_log.TEST_MARKER,
+                                     marker="running_test",
+                                     name="%s.%s" % (self.current_test_class, self.current_test_method),
+                                     iteration=ii + 1)
+                    try:
+                        func(self)
+                        pass_count += 1
+                    except:
+                        stack = sys.exc_info()
+                        for call in traceback.format_tb(stack[2]):
+                            for line in call.rstrip().splitlines():
+                                self.logger.error(line)
+                        self.collect_diagnostics(self.device_list)
+            finally:
+                self.stop_resource_sampling(sampler)
 
             if pass_count < (num_iterations - allowed_failures):
                 self.logger.error("Pass Rate: {0}/{1}".format(pass_count, num_iterations))
@@ -436,6 +570,76 @@ class TestCase(unittest.TestCase):
             if err_msg is not None:
                 self.fail(err_msg)
 
+    def collect_diagnostics(self, node_list):
+        """Log the state of each node in node_list after a failure, including what lean mode skipped.
+        """
+        for n in node_list:
+            try:
+                n.collect_diagnostics()
+            except Exception:
+                self.logger.error("Failed to collect diagnostics from %s" % n.name)
+
+    def start_resource_sampling(self):
+        """Start sampling the silk process, the processes in each node's netns and the sniffers.
+
+        Returns the sampler, or None if resource sampling is off.
+        """
+        if not _RESOURCE_SAMPLING_INTERVAL:
+            return None
+
+        sampler = resource_sampler.ResourceSampler(_RESOURCE_SAMPLING_INTERVAL)
+        sampler.add("silk", os.getpid())
+
+        for device in self.device_list:
+            if not isinstance(device, NetnsController):
+                continue
+            try:
+                pids = [pid.strip() for pid in device.netns_pids() if pid.strip()]
+            except Exception:
+                self.logger.error("Failed to list processes of %s" % device.name)
+                continue
+            for pid in pids:
+                sampler.add("%s.%s" % (device.name, pid), pid)
+
+        for channel, sniffer in self.thread_sniffers.items():
+            process = getattr(sniffer, "sniffer_process", None)
+            if process is not None:
+                sampler.add("sniffer.%s" % channel, process.pid)
+
+        sampler.start()
+        return sampler
+
+    def stop_resource_sampling(self, sampler):
+        """Stop sampler, save its samples next to silk.log and add the peak and mean figures to the results.
+        """
+        if sampler is None:
+            return
+
+        summary = sampler.stop()
+        sampler.save(
+            os.path.join(self.current_output_directory,
+                         "resources.%s.%s.json" % (self.current_test_class, self.current_test_method)))
+        self.results[self.current_test_class][self.current_test_method]["resources"] = summary
+
+    def wait_for_convergence(self, nodes, timeout, label="convergence", **kwargs):
+        """Wait until the network of nodes is stable instead of sleeping for a fixed time.
+
+        The settling time is logged, recorded in the event log and added to the results under
+        "settling_times"[label]. kwargs are passed to topology_snapshot.wait_for_convergence, for example a
+        validate callable replacing the default one partition, one leader, all nodes attached check.
+
+        Returns the topology_snapshot.ConvergenceResult.
+        """
+        result = topology_snapshot.wait_for_convergence(nodes, timeout, **kwargs)
+        self.logger.info("Network settled (%s) in %.2f sec after %d rounds" %
+                         (label, result.settling_time, result.rounds))
+        event_log.record(event_log.CONVERGENCE, label=label, settling_time=result.settling_time, rounds=result.rounds)
+
+        method_results = self.results.get(self.current_test_class, {}).get(getattr(self, "current_test_method", None))
+        if isinstance(method_results, dict):
+            method_results.setdefault("settling_times", {})[label] = result.settling_time
+        return result
+
     def ping6(self, sender, target_addr, num_pings, ping_size=32, allowed_errors=0, num_expected=None, interface=None):
         if num_expected is None:
             num_expected = num_pings
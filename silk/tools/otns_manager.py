@@ -24,23 +24,28 @@ import math
 import re
 import socket
 import struct
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, TYPE_CHECKING
 
 import grpc
-import pandas
 
 from silk.hw.hw_module import HwModule
 from silk.node.fifteen_four_dev_board import ThreadDevBoard
+from silk.tools import wpantund_log
 from silk.tools.pb import visualize_grpc_pb2
 from silk.tools.pb import visualize_grpc_pb2_grpc
 from silk.utils import signal
 from silk.utils.network import get_local_ip
 
+if TYPE_CHECKING:
+    import pandas
+
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
 
 GRPC_SERVER_PORT = 8999
 SERVER_PORT = 9000
 
+_EXTADDR_VALUE_REGEX = re.compile(r"[A-Fa-f0-9]{16}")
+
 
 class RegexType(enum.Enum):
     """Regular expression collections.
@@ -534,8 +539,9 @@ class WpantundOtnsMonitor(signal.Subscriber):
             sender (signal.Publisher): publisher of signal.
             **kwargs (str): published signal.
         """
-        line = kwargs["line"]
-        self.process_log_line(line)
+        event = wpantund_log.line_event(kwargs)
+        if event is not None and self.otns_manager:
+            self.otns_manager.update_event(self.node, event)
 
 
 class OtnsNodeSummary(object):
@@ -737,7 +743,7 @@ class OtnsNodeSummaryCollection(object):
 
         return "\n".join(lines)
 
-    def to_csv(self, extaddr_map: Dict[int, int]) -> pandas.DataFrame:
+    def to_csv(self, extaddr_map: Dict[int, int]) -> "pandas.DataFrame":
         """Generate summary string in CSV format.
 
         Args:
@@ -759,6 +765,9 @@ class OtnsNodeSummaryCollection(object):
         for i, event in enumerate(events):
             events[i] = {"timestamp": event[0].strftime(DATE_FORMAT)[:-3], f"node{event[1]}": event[2]}
 
+        # pandas is slow to import and only needed for CSV summaries.
+        import pandas
+
         return pandas.DataFrame(events, columns=columns)
 
 
@@ -926,20 +935,35 @@ class OtnsManager(object):
             message (str): status message.
             time (datetime, optional): time of the update. Defaults to datetime.now().
         """
-        status_match = re.search(RegexType.STATUS.value, message)
-        if status_match:
-            message = status_match.group(2)
+        event = wpantund_log.classify(message)
+        if event is not None:
+            self.update_event(node, event, time=time)
+
+    def update_event(self, node: OtnsNode, event: wpantund_log.LineEvent, time: datetime = None):
+        """Update node status from a classified wpantund log line.
+
+        Args:
+            node (OtnsNode): OTNS node.
+            event (wpantund_log.LineEvent): classified log line.
+            time (datetime, optional): time of the update. Defaults to now.
+        """
+        if time is None:
+            time = datetime.now()
 
-            extaddr_match = re.search(RegexType.EXTADDR_STATUS.value, message)
-            if extaddr_match:
-                extaddr = int(extaddr_match.group(1), 16)
+        if event.type == wpantund_log.LineEventType.OTNS_STATUS:
+            message = event.value
+            key, value = wpantund_log.split_otns_status(message)
+            # The status payload pattern also admits mode letters, so check an extended address is hex
+            is_extaddr = _EXTADDR_VALUE_REGEX.fullmatch(value) is not None
+
+            if key == "extaddr" and is_extaddr:
+                extaddr = int(value, 16)
                 node.update_extaddr(extaddr)
                 self.node_summaries[node.node_id].extaddr_changed(extaddr, time)
                 return
 
-            role_match = re.search(RegexType.ROLE_STATUS.value, message)
-            if role_match:
-                role = RoleType(int(role_match.group(1)))
+            if key == "role" and value in ("0", "1", "2", "3", "4"):
+                role = RoleType(int(value))
                 node.update_role(role)
                 self.node_summaries[node.node_id].role_changed(role, time)
                 self.update_layout()
@@ -955,48 +979,32 @@ class OtnsManager(object):
                         node.remove_child(child)
                 return
 
-            child_added_match = re.search(RegexType.CHILD_ADDED_STATUS.value, message)
-            if child_added_match:
-                child = int(child_added_match.group(1), 16)
-                node.add_child(child)
-                self.node_summaries[node.node_id].child_changed(True, child, time)
-                return
-
-            child_removed_match = re.search(RegexType.CHILD_REMOVED_STATUS.value, message)
-            if child_removed_match:
-                child = int(child_removed_match.group(1), 16)
-                node.remove_child(child)
-                self.node_summaries[node.node_id].child_changed(False, child, time)
-                return
-
-            router_added_match = re.search(RegexType.ROUTER_ADDED_STATUS.value, message)
-            if router_added_match:
-                router = int(router_added_match.group(1), 16)
-                node.add_router(router)
-                self.node_summaries[node.node_id].neighbor_changed(True, router, time)
-                return
-
-            router_removed_match = re.search(RegexType.ROUTER_REMOVED_STATUS.value, message)
-            if router_removed_match:
-                router = int(router_removed_match.group(1), 16)
-                node.remove_router(router)
-                self.node_summaries[node.node_id].neighbor_changed(False, router, time)
+            if is_extaddr and key in ("child_added", "child_removed", "router_added", "router_removed"):
+                extaddr = int(value, 16)
+                if key == "child_added":
+                    node.add_child(extaddr)
+                    self.node_summaries[node.node_id].child_changed(True, extaddr, time)
+                elif key == "child_removed":
+                    node.remove_child(extaddr)
+                    self.node_summaries[node.node_id].child_changed(False, extaddr, time)
+                elif key == "router_added":
+                    node.add_router(extaddr)
+                    self.node_summaries[node.node_id].neighbor_changed(True, extaddr, time)
+                else:
+                    node.remove_router(extaddr)
+                    self.node_summaries[node.node_id].neighbor_changed(False, extaddr, time)
                 return
 
-            event = Event.status_event(message)
-            node.send_event(event.to_bytes())
+            status_event = Event.status_event(message)
+            node.send_event(status_event.to_bytes())
             return
 
-        get_extaddr_info_match = re.search(RegexType.GET_EXTADDR_RES.value, message)
-        if get_extaddr_info_match:
-            extaddr = get_extaddr_info_match.group(1)
-            node.update_extaddr(int(extaddr, 16))
+        if event.type == wpantund_log.LineEventType.EXTADDR_RESPONSE:
+            node.update_extaddr(int(event.value, 16))
             return
 
-        ncp_version_match = re.search(RegexType.NCP_VERSION.value, message)
-        if ncp_version_match:
-            ncp_version = ncp_version_match.group(1)
-            self.grpc_client.set_netinfo(version=ncp_version)
+        if event.type == wpantund_log.LineEventType.NCP_VERSION:
+            self.grpc_client.set_netinfo(version=event.value)
             return
 
     def set_ncp_version(self, version: str):
@@ -0,0 +1,198 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Declarative builder for allowlist-based Thread test topologies.
+
+A topology is an edge list over nodes. Building it fetches each node's
+extended address once, applies the allowlists of all nodes concurrently, forms
+the network on the leader and then joins the remaining nodes level by level
+(breadth first from the leader), with all joins of a level running in parallel.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import collections
+import logging
+import time
+
+from silk.config import wpan_constants as wpan
+
+logger = logging.getLogger(__name__)
+
+
+class TopologyError(Exception):
+    pass
+
+
+def chain(nodes):
+    """Returns the edges linking nodes one after another.
+    """
+    return [(nodes[index - 1], nodes[index]) for index in range(1, len(nodes))]
+
+
+def star(center, leaves):
+    """Returns the edges linking center to every node in leaves.
+    """
+    return [(center, leaf) for leaf in leaves]
+
+
+def tree(nodes, fanout=2):
+    """Returns the edges of a complete tree rooted at nodes[0] with the given fanout.
+    """
+    return [(nodes[(index - 1) // fanout], nodes[index]) for index in range(1, len(nodes))]
+
+
+def mesh(nodes):
+    """Returns the edges linking every pair of nodes.
+    """
+    return [(nodes[i], nodes[j]) for i in range(len(nodes)) for j in range(i + 1, len(nodes))]
+
+
+class Topology(object):
+    """An allowlist topology over a set of nodes.
+
+    Args:
+        edges (list): (node, node) pairs that should hear each other.
+        roles (dict): role passed to form/join for a node, "router" if missing.
+        leader: node forming the network, the first node of the first edge by default.
+    """
+
+    def __init__(self, edges, roles=None, leader=None):
+        if not edges:
+            raise ValueError("A topology needs at least one edge")
+
+        self.edges = list(edges)
+        self.roles = dict(roles or {})
+        self.leader = leader if leader is not None else self.edges[0][0]
+        self.timings = collections.OrderedDict()
+
+        self.neighbors = collections.OrderedDict()
+        for first, second in self.edges:
+            if first is second:
+                raise ValueError("Node {} cannot be linked to itself".format(first.name))
+            self.neighbors.setdefault(first, []).append(second)
+            self.neighbors.setdefault(second, []).append(first)
+
+        if self.leader not in self.neighbors:
+            raise ValueError("Leader {} is not part of the topology".format(self.leader.name))
+
+        self.levels = self.__join_levels()
+
+    @property
+    def nodes(self):
+        return list(self.neighbors)
+
+    def role(self, node):
+        return self.roles.get(node, "router")
+
+    def __join_levels(self):
+        """Group nodes by hop distance from the leader.
+        """
+        levels = [[self.leader]]
+        visited = {self.leader}
+
+        while True:
+            next_level = []
+            for node in levels[-1]:
+                for neighbor in self.neighbors[node]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_level.append(neighbor)
+            if not next_level:
+                break
+            levels.append(next_level)
+
+        unreachable = [node.name for node in self.neighbors if node not in visited]
+        if unreachable:
+            raise ValueError("Nodes not reachable from the leader: {}".format(", ".join(unreachable)))
+
+        return levels
+
+    def __run_phase(self, name, function, nodes, max_workers):
+        """Run function on every node concurrently and record how long the phase took.
+        """
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(nodes)) as executor:
+            results = list(executor.map(function, nodes))
+
+        self.timings[name] = time.time() - start_time
+        logger.info("Topology phase {} took {:.2f} sec".format(name, self.timings[name]))
+
+        return results
+
+    def __wait_for_nodes(self, phase, nodes):
+        """Wait for the queued commands of nodes and raise a TopologyError listing any failures.
+        """
+        errors = []
+        for node in nodes:
+            error = node.wait_for_completion()
+            if error is not None:
+                errors.append("{}: {}".format(node.name, error))
+
+        if errors:
+            raise TopologyError("{} failed on {}".format(phase, "; ".join(errors)))
+
+    def apply_allowlists(self, max_workers=None):
+        """Allowlist every edge in both directions.
+
+        Extended addresses are read once per node; each node then writes all of
+        its entries, with all nodes being configured concurrently.
+        """
+        nodes = self.nodes
+
+        extaddrs = self.__run_phase("extaddr", lambda node: node.get(wpan.WPAN_EXT_ADDRESS)[1:-1], nodes, max_workers)
+        extaddrs = dict(zip(nodes, extaddrs))
+
+        def allowlist(node):
+            for neighbor in self.neighbors[node]:
+                node.add(wpan.WPAN_MAC_ALLOWLIST_ENTRIES, extaddrs[neighbor])
+            node.set(wpan.WPAN_MAC_ALLOWLIST_ENABLED, "1")
+
+        self.__run_phase("allowlist", allowlist, nodes, max_workers)
+
+    def build(self, network, permit_join_period=None, max_workers=None):
+        """Allowlist, form and join the whole topology.
+
+        Args:
+            network (WpanCredentials): credentials to form with; xpanid and panid are filled in from the leader.
+            permit_join_period (int): if set, the leader permits joining for that many seconds after forming.
+            max_workers (int): maximum number of nodes configured at once.
+
+        Returns:
+            OrderedDict: seconds taken by each phase.
+        """
+        self.timings.clear()
+        self.apply_allowlists(max_workers)
+
+        start_time = time.time()
+        self.leader.form(network, self.role(self.leader))
+        if permit_join_period is not None:
+            self.leader.permit_join(permit_join_period)
+        self.__wait_for_nodes("form", [self.leader])
+        self.timings["form"] = time.time() - start_time
+        logger.info("Topology phase form took {:.2f} sec".format(self.timings["form"]))
+
+        network.xpanid = self.leader.xpanid
+        network.panid = self.leader.panid
+
+        for depth, level in enumerate(self.levels[1:], 1):
+            start_time = time.time()
+            for node in level:
+                node.join(network, self.role(node))
+            self.__wait_for_nodes("join level {}".format(depth), level)
+
+            phase = "join-{}".format(depth)
+            self.timings[phase] = time.time() - start_time
+            logger.info("Topology phase {} took {:.2f} sec".format(phase, self.timings[phase]))
+
+        return self.timings
@@ -0,0 +1,337 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Network-wide snapshots of a Thread mesh.
+
+TopologySnapshot.collect queries the state, role, RLOC16, partition id and
+neighbor table of every node, plus the router and child tables of routers,
+with all nodes queried concurrently. The snapshot joins the tables into one
+adjacency structure: the parent of each child and the router links with
+their path cost and link qualities. Two snapshots can be diffed, and
+is_converged tells whether the mesh has settled into one consistent
+partition.
+
+wait_for_convergence replaces fixed sleeps while a mesh settles: it takes
+cheap fingerprints (role, partition id and router table hash of each node)
+until several rounds in a row are identical and a snapshot finds the mesh
+converged, and reports how long the mesh took to settle.
+"""
+
+import collections
+import logging
+import time
+
+from silk.config import wpan_constants as wpan
+from silk.tools import wpan_table_parser
+from silk.tools import wpan_util
+
+logger = logging.getLogger(__name__)
+
+ROUTER_ROLES = frozenset([wpan.NODE_TYPE_LEADER, wpan.NODE_TYPE_ROUTER])
+
+NodeSnapshot = collections.namedtuple("NodeSnapshot", [
+    "name", "ext_address", "state", "role", "rloc16", "partition_id", "router_table", "child_table", "neighbor_table"
+])
+
+RouterLink = collections.namedtuple("RouterLink", ["path_cost", "lq_in", "lq_out"])
+
+# Node fields compared by TopologySnapshot.diff.
+DIFF_FIELDS = ("state", "role", "rloc16", "partition_id")
+
+DEFAULT_STABLE_ROUNDS = 3
+DEFAULT_ROUND_INTERVAL = 1.0
+
+ConvergenceResult = collections.namedtuple("ConvergenceResult", ["settling_time", "elapsed", "rounds", "fingerprint"])
+
+
+class SnapshotDiff(
+        collections.namedtuple("SnapshotDiff",
+                               ["added", "removed", "changed", "parents", "links_added", "links_removed"])):
+    """Differences between two snapshots; false if there are none.
+
+    added and removed are sets of node names, changed maps a node name to
+    {field: (old, new)}, parents maps a child to its (old, new) parent and
+    links_added and links_removed are sets of (router, router) names.
+    """
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return any(self)
+
+
+def _strip_brackets(value):
+    return value.strip()[1:-1]
+
+
+def _router_table_hash(table):
+    """Hashes the routes of a router table, leaving out the link qualities and ages that change all the time.
+    """
+    if table is None:
+        return None
+    return hash(tuple(zip(table["ext_address"], table["rloc16"], table["next_hop"], table["link_established"])))
+
+
+def _fetch_fingerprint(node):
+    role = node.get(wpan.WPAN_NODE_TYPE).strip()
+    partition_id = node.get(wpan.WPAN_PARTITION_ID).strip()
+    router_table = None
+    if role in ROUTER_ROLES:
+        router_table = wpan_table_parser.parse_router_table_columns(node.get(wpan.WPAN_THREAD_ROUTER_TABLE))
+    return role, partition_id, _router_table_hash(router_table)
+
+
+def fingerprint(nodes, max_workers=None):
+    """Returns the (role, partition id, router table hash) of each node, querying the nodes concurrently.
+
+    Much cheaper than a TopologySnapshot; two equal fingerprints mean no node changed role, partition or routes.
+    """
+    return tuple(wpan_util.fetch_all(nodes, _fetch_fingerprint, max_workers))
+
+
+def wait_for_convergence(nodes,
+                         timeout,
+                         stable_rounds=DEFAULT_STABLE_ROUNDS,
+                         interval=DEFAULT_ROUND_INTERVAL,
+                         max_workers=None,
+                         validate=None):
+    """Wait until `stable_rounds` fingerprints of `nodes` in a row are identical and `validate` finds no problem.
+
+    A stable network is not necessarily a converged one: all nodes detached, or two partitions each with a leader,
+    fingerprint the same round after round. `validate` only runs once the fingerprints are stable, as it is the more
+    expensive check.
+
+    Args:
+        nodes (list): nodes to fingerprint.
+        timeout (float): seconds to wait for the network to converge.
+        stable_rounds (int): identical rounds needed to call the network stable.
+        interval (float): seconds between the starts of two rounds.
+        max_workers (int): nodes queried at a time, see wpan_util.fetch_all.
+        validate (callable): called with `nodes`, returns the list of problems keeping the network from converging.
+            Defaults to the convergence_problems of a TopologySnapshot of the nodes: one partition with one leader,
+            every node attached.
+
+    Returns:
+        ConvergenceResult: settling_time is the number of seconds until the first of the identical rounds, when the
+        network last changed; elapsed is the time the wait took; rounds is the number of fingerprints taken.
+
+    Raises:
+        wpan_util.VerifyError: the network had not converged by the deadline.
+    """
+    if validate is None:
+
+        def validate(nodes):
+            return TopologySnapshot.collect(nodes, max_workers).convergence_problems()
+
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    rounds = 0
+    identical_rounds = 0
+    last_fingerprint = None
+    stable_since = start_time
+
+    while True:
+        round_start_time = time.monotonic()
+        current_fingerprint = fingerprint(nodes, max_workers)
+        rounds += 1
+        problems = []
+
+        if current_fingerprint == last_fingerprint:
+            identical_rounds += 1
+        else:
+            last_fingerprint = current_fingerprint
+            identical_rounds = 1
+            stable_since = round_start_time
+
+        if identical_rounds >= stable_rounds:
+            problems = validate(nodes)
+            if not problems:
+                result = ConvergenceResult(stable_since - start_time,
+                                           time.monotonic() - start_time, rounds, current_fingerprint)
+                logger.debug("Network settled after %.2f sec (%d rounds)", result.settling_time, rounds)
+                return result
+
+        now = time.monotonic()
+        if now >= deadline:
+            if problems:
+                raise wpan_util.VerifyError("Network is stable but did not converge within {} sec: {}".format(
+                    timeout, "; ".join(problems)))
+            raise wpan_util.VerifyError("Network did not settle within {} sec: {} of {} identical rounds".format(
+                timeout, identical_rounds, stable_rounds))
+        time.sleep(max(0, min(round_start_time + interval, deadline) - now))
+
+
+def _fetch_node(node):
+    """Query the state of one node; routers also report their router and child tables.
+    """
+    role = node.get(wpan.WPAN_NODE_TYPE).strip()
+    is_router = role in ROUTER_ROLES
+
+    return NodeSnapshot(
+        name=node.name,
+        ext_address=_strip_brackets(node.get(wpan.WPAN_EXT_ADDRESS)),
+        state=node.get(wpan.WPAN_STATE).strip(),
+        role=role,
+        rloc16=int(node.get(wpan.WPAN_THREAD_RLOC16), 16),
+        partition_id=node.get(wpan.WPAN_PARTITION_ID).strip(),
+        router_table=wpan_table_parser.parse_router_table_columns(node.get(wpan.WPAN_THREAD_ROUTER_TABLE))
+        if is_router else None,
+        child_table=wpan_table_parser.parse_child_table_columns(node.get(wpan.WPAN_THREAD_CHILD_TABLE))
+        if is_router else None,
+        neighbor_table=wpan_table_parser.parse_neighbor_table_columns(node.get(wpan.WPAN_THREAD_NEIGHBOR_TABLE)),
+    )
+
+
+class TopologySnapshot(object):
+    """State and adjacency of a set of nodes at one time.
+
+    Args:
+        nodes (list): NodeSnapshot of each node.
+        timestamp (float): epoch time the collection started at.
+        duration (float): seconds the collection took.
+    """
+
+    def __init__(self, nodes, timestamp=None, duration=0.0):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.duration = duration
+        self.nodes = collections.OrderedDict((node.name, node) for node in nodes)
+
+        self._by_ext_address = {node.ext_address: node.name for node in nodes}
+
+        self.parents = {}
+        self.router_links = {}
+        for node in nodes:
+            if node.child_table is not None:
+                for ext_address in node.child_table["ext_address"]:
+                    self.parents[self.name_of(ext_address)] = node.name
+
+            if node.router_table is not None:
+                table = node.router_table
+                for index, ext_address in enumerate(table["ext_address"]):
+                    if table["link_established"][index]:
+                        self.router_links[(node.name, self.name_of(ext_address))] = RouterLink(
+                            table["path_cost"][index], table["lq_in"][index], table["lq_out"][index])
+
+    @classmethod
+    def collect(cls, nodes, max_workers=None):
+        """Query all nodes concurrently and return their snapshot.
+        """
+        timestamp = time.time()
+        start_time = time.monotonic()
+        states = wpan_util.fetch_all(nodes, _fetch_node, max_workers)
+        duration = time.monotonic() - start_time
+
+        logger.debug("Collected topology snapshot of %d nodes in %.2f sec", len(states), duration)
+        return cls(states, timestamp, duration)
+
+    def name_of(self, ext_address):
+        """Returns the name of the node with `ext_address`; nodes outside the snapshot are named by the address.
+        """
+        return self._by_ext_address.get(ext_address, ext_address)
+
+    def children(self, name):
+        """Returns the names of the children of node `name`.
+        """
+        return sorted(child for child, parent in self.parents.items() if parent == name)
+
+    def neighbors(self, name):
+        """Returns the names of the routers node `name` has an established link with.
+        """
+        return sorted(second for first, second in self.router_links if first == name)
+
+    def fingerprint(self):
+        """Returns the fingerprint of the snapshot, equal to the module fingerprint() of the same nodes.
+        """
+        return tuple(
+            (node.role, node.partition_id, _router_table_hash(node.router_table)) for node in self.nodes.values())
+
+    def leaders(self):
+        return [node.name for node in self.nodes.values() if node.role == wpan.NODE_TYPE_LEADER]
+
+    def partitions(self):
+        """Returns {partition id: [node names]}.
+        """
+        partitions = collections.OrderedDict()
+        for node in self.nodes.values():
+            partitions.setdefault(node.partition_id, []).append(node.name)
+        return partitions
+
+    def diff(self, other):
+        """Returns the SnapshotDiff from an `other`, earlier snapshot to this one.
+        """
+        changed = {}
+        for name in self.nodes.keys() & other.nodes.keys():
+            node, other_node = self.nodes[name], other.nodes[name]
+            changes = {
+                field: (getattr(other_node, field), getattr(node, field))
+                for field in DIFF_FIELDS
+                if getattr(node, field) != getattr(other_node, field)
+            }
+            if changes:
+                changed[name] = changes
+
+        parents = {
+            child: (other.parents.get(child), self.parents.get(child))
+            for child in self.parents.keys() | other.parents.keys()
+            if self.parents.get(child) != other.parents.get(child)
+        }
+
+        return SnapshotDiff(added=self.nodes.keys() - other.nodes.keys(),
+                            removed=other.nodes.keys() - self.nodes.keys(),
+                            changed=changed,
+                            parents=parents,
+                            links_added=self.router_links.keys() - other.router_links.keys(),
+                            links_removed=other.router_links.keys() - self.router_links.keys())
+
+    def convergence_problems(self):
+        """Returns a description of each reason the mesh has not converged, empty once it has.
+
+        A converged mesh has every node associated in one partition with a
+        single leader, every end device in exactly one router's child table and
+        every router link established in both directions.
+        """
+        problems = []
+
+        for node in self.nodes.values():
+            if node.state != wpan.STATE_ASSOCIATED:
+                problems.append("{} is {}".format(node.name, node.state))
+
+        partitions = self.partitions()
+        if len(partitions) > 1:
+            members = ["{} {}".format(partition_id, ", ".join(names)) for partition_id, names in partitions.items()]
+            problems.append("{} partitions: {}".format(len(partitions), "; ".join(members)))
+
+        leaders = self.leaders()
+        if len(leaders) != 1:
+            problems.append("{} leaders: {}".format(len(leaders), ", ".join(leaders)))
+
+        parent_count = collections.Counter()
+        for node in self.nodes.values():
+            if node.child_table is not None:
+                parent_count.update(self.name_of(ext_address) for ext_address in node.child_table["ext_address"])
+        for node in self.nodes.values():
+            if node.role not in ROUTER_ROLES and parent_count[node.name] != 1:
+                problems.append("{} is in {} child tables".format(node.name, parent_count[node.name]))
+
+        for first, second in sorted(self.router_links):
+            if second in self.nodes and (second, first) not in self.router_links:
+                problems.append("link {} -> {} is not established back".format(first, second))
+
+        return problems
+
+    def is_converged(self):
+        return not self.convergence_problems()
+
+    def __repr__(self):
+        return "TopologySnapshot({} nodes, {} children, {} router links)".format(len(self.nodes), len(self.parents),
+                                                                                 len(self.router_links))
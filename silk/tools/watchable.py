@@ -15,15 +15,76 @@
 """
 
 from datetime import datetime
+import array
 import threading
+import time
 
 from . import deadline as silk_deadline
 
+DEFAULT_MAX_HISTORY = 1000
+
+try:
+    _monotonic_ns = time.monotonic_ns
+except AttributeError:
+
+    def _monotonic_ns():
+        return int(time.monotonic() * 1e9)
+
+
+def now_ns():
+    """Returns the current monotonic time in nanoseconds, as used by WatchableWithHistory.
+    """
+    return _monotonic_ns()
+
+
+def _wall_clock_offset_ns():
+    """Returns the wall clock time of monotonic time 0.
+
+    Computed on each conversion rather than once, so that history timestamps still convert to the right datetimes
+    after the wall clock is stepped, e.g. by NTP.
+    """
+    return int(time.time() * 1e9) - now_ns()
+
+
+def _from_datetime(wall_time):
+    return int(wall_time.timestamp() * 1e9) - _wall_clock_offset_ns()
+
+
+def _to_datetime(monotonic_ns):
+    return datetime.fromtimestamp((monotonic_ns + _wall_clock_offset_ns()) / 1e9)
+
 
 def is_watchable(object_to_check):
     return isinstance(object_to_check, (WatchableWithHistory, Watchable))
 
 
+class _Waiter(object):
+    """Wakes a wait_any or wait_all call when one of the watchables it waits on is set.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__pending = False
+
+    def notify(self):
+        # Called with the lock of the set watchable held, so a waiter that has not reset
+        # __pending yet will evaluate its watches after this set and needs no wake-up.
+        if self.__pending:
+            return
+        with self.__condition:
+            self.__pending = True
+            self.__condition.notify()
+
+    def reset(self):
+        with self.__condition:
+            self.__pending = False
+
+    def wait(self, timeout):
+        with self.__condition:
+            if not self.__pending:
+                self.__condition.wait(timeout)
+
+
 # An object whose state can be watched
 class Watchable(object):
     # Constructor
@@ -33,36 +94,39 @@ class Watchable(object):
     def __init__(self, value, name=None, logger=None):
         self.value = value
         self.__lock = threading.Lock()
-        self.__watchers = []
+        # Watchers of the value wait on __changed, watchers of any update on __updated.
+        self.__changed = threading.Condition(self.__lock)
+        self.__updated = threading.Condition(self.__lock)
+        self.__change_waiters = 0
+        self.__update_waiters = 0
+        self.__version = 0
+        self.__waiters = set()
         self.__name = name
         self.__logger = logger
 
     def __get__(self, instance, owner):
-        instance.__lock.acquire()
-        value = instance.value
-        instance.__lock.release()
-
-        return value
+        with instance.__lock:
+            return instance.value
 
     def __set__(self, instance, value):
-        modify = False
-
-        instance.__lock.acquire()
-
-        modify = value != instance.value
-        if modify:
-            instance.value = value
-
-        # Instruct watchers to poll again
-        # even if values have not changed
-        for watcher in instance.__watchers:
-            watcher.set()
-
-        instance.__lock.release()
+        with instance.__lock:
+            modify = value != instance.value
+            if modify:
+                instance.value = value
+            instance.__version += 1
+
+            # Only wake the watchers that can be satisfied by this set. Setting the same object again
+            # counts as a change, as it may have been mutated in place since it was last set.
+            recheck = modify or value is instance.value
+            if recheck and instance.__change_waiters:
+                instance.__changed.notify_all()
+            if instance.__update_waiters:
+                instance.__updated.notify_all()
+            for waiter in instance.__waiters:
+                waiter.notify()
 
         if modify and instance.__logger:
-            log = "%s modified" % str(self)
-            instance.__logger.debug(log)
+            instance.__logger.debug("%s modified", instance)
 
         return value
 
@@ -90,60 +154,134 @@ class Watchable(object):
     # watchable_object.watch(lambda x: x == 5)
     # @param lambda_func A function or callable that returns not None when the desired watch condition is Met
     # @param timeout Timeout in seconds. Specify None for no timeout
+    # @param must_update Only check lambda_func once the value has been set again
     # @return The result of the watch function. A None result implies a timeout
     def watch(self, lambda_func, timeout=None, must_update=False):
         retval = None
 
-        deadline = silk_deadline.Deadline(timeout)
-
-        updated = not must_update
+        deadline = silk_deadline.Deadline(timeout, start_now=True)
+
+        with self.__lock:
+            if must_update:
+                version = self.__version
+                self.__update_waiters += 1
+                try:
+                    while self.__version == version:
+                        if not self.__updated.wait(deadline.get_remaining_seconds()):
+                            return retval
+                finally:
+                    self.__update_waiters -= 1
+
+            self.__change_waiters += 1
+            try:
+                while True:
+                    retval = lambda_func(self.value)
+                    if retval:
+                        break
+
+                    # Bail if we timed out
+                    if not self.__changed.wait(deadline.get_remaining_seconds()):
+                        break
+            finally:
+                self.__change_waiters -= 1
 
-        self.__lock.acquire()
-
-        while True:
+        return retval
 
-            if updated:
-                # First check to see if the value is what we want
-                #
-                retval = lambda_func(self.value)
-                if retval:
-                    break
+    # Wait until there is some update to the underlying variable. Useful for
+    # cases where an asynchronous operation (i.e a command) is pending and we want to
+    # wait until things are updated
+    # @param timeout Timeout in seconds. Specify None for no timeout
+    def watch_for_update(self, timeout=None):
+        return self.watch(lambda v: True, timeout=timeout, must_update=True)
 
-            # Otherwise, add ourselves to the wait list
-            watch_event = threading.Event()
-            self.__watchers.append(watch_event)
+    # Evaluate lambda_func on the current value
+    # @param lambda_func A callable
+    # @return The result of the lambda function
+    def _evaluate(self, lambda_func):
+        with self.__lock:
+            return lambda_func(self.value)
 
-            self.__lock.release()
-            wait_result = watch_event.wait(deadline.get_remaining_seconds())
-            updated = True
-            self.__lock.acquire()
+    def _add_waiter(self, waiter):
+        with self.__lock:
+            self.__waiters.add(waiter)
 
-            self.__watchers.remove(watch_event)
+    def _remove_waiter(self, waiter):
+        with self.__lock:
+            self.__waiters.discard(waiter)
 
-            # Bail if we timed out
-            if wait_result is not True:
-                break
 
-        self.__lock.release()
+def _wait_watches(watches, timeout, need_all):
+    watches = list(watches)
+    deadline = silk_deadline.Deadline(timeout, start_now=True)
+    waiter = _Waiter()
 
-        return retval
+    for watched, _ in watches:
+        watched._add_waiter(waiter)
 
-    # Wait until there is some update to the underlying variable. Useful for
-    # cases where an asynchronous operation (i.e a command) is pending and we want to
-    # wait until things are updated
-    # @param timeout Timeout in seconds. Specify None for no timeout
-    def watch_for_update(self, timeout=None):
-        return self.watch(lambda v: True, must_update=True)
+    try:
+        while True:
+            waiter.reset()
+
+            results = []
+            for index, (watched, lambda_func) in enumerate(watches):
+                result = watched._evaluate(lambda_func)
+                if result and not need_all:
+                    return index, result
+                if not result and need_all:
+                    break
+                results.append(result)
+            else:
+                if need_all:
+                    return results
+
+            remaining = deadline.get_remaining_seconds()
+            if remaining == 0:
+                return None
+            waiter.wait(remaining)
+    finally:
+        for watched, _ in watches:
+            watched._remove_waiter(waiter)
+
+
+# Wait until one of several watches is satisfied, under a single deadline
+# The below example will block until either node is associated
+# wait_any([(state1, lambda x: x == "associated"), (state2, lambda x: x == "associated")], timeout=30)
+# @param watches Iterable of (watchable, lambda_func) pairs
+# @param timeout Timeout in seconds. Specify None for no timeout
+# @return The tuple (index, result) of the first satisfied watch, or None on timeout
+def wait_any(watches, timeout=None):
+    return _wait_watches(watches, timeout, need_all=False)
+
+
+# Wait until all of several watches are satisfied at the same time, under a single deadline
+# @param watches Iterable of (watchable, lambda_func) pairs
+# @param timeout Timeout in seconds. Specify None for no timeout
+# @return The list of results of the lambda functions, or None on timeout
+def wait_all(watches, timeout=None):
+    return _wait_watches(watches, timeout, need_all=True)
 
 
 # A watchable state that also tracks history of the object changing
+#
+# The history is a ring buffer of the last max_history updates. Timestamps are
+# kept as monotonic nanoseconds (see now_ns) in an array("q") next to a list of
+# the values, and time lookups bisect the timestamps.
 class WatchableWithHistory(object):
     # Constructor
     # @param initial_value The initial value of this watchable. Does not count towards history
     # @param name The name for this watchable, for logging only
     # @Param logger A logger to invoke any logging operations
-    def __init__(self, initial_value=None, name=None, logger=None):
-        self.__history = []
+    # @param max_history Number of updates kept, older ones are dropped
+    def __init__(self, initial_value=None, name=None, logger=None, max_history=DEFAULT_MAX_HISTORY):
+        if max_history < 1:
+            raise ValueError("max_history must be at least 1")
+
+        self.__lock = threading.Lock()
+        self.__times = array.array("q", bytes(8 * max_history))
+        self.__values = [None] * max_history
+        self.__start = 0
+        self.__count = 0
+        self.__dropped = 0
         self.__initial_value = initial_value
         self.__value = Watchable(None, name, logger)
 
@@ -157,46 +295,137 @@ class WatchableWithHistory(object):
     def __str__(self):
         return str(self.__value)
 
-    def __update_value(self):
-        if self.__history:
-            [time, value] = self.__history[-1]
-            self.__value.set(value)
-
     # Get the latest value
     def get(self):
-        if self.__history:
+        if self.__count:
             value = self.__value.get()
         else:
             value = self.__initial_value
 
         return value
 
+    # Maximum number of updates kept
+    @property
+    def max_history(self):
+        return len(self.__values)
+
+    # Number of updates dropped from the history to respect max_history
+    @property
+    def dropped(self):
+        return self.__dropped
+
+    def __len__(self):
+        return self.__count
+
+    def __index(self, index):
+        return (self.__start + index) % len(self.__values)
+
+    def __entry(self, index):
+        physical = self.__index(index)
+        return [_to_datetime(self.__times[physical]), self.__values[physical]]
+
+    # Returns the number of updates at or before time t, by bisecting the timestamps
+    def __bisect_right(self, t):
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if t < self.__times[self.__index(middle)]:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    # Returns the number of updates before time t, by bisecting the timestamps
+    def __bisect_left(self, t):
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__times[self.__index(middle)] < t:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
     # Get the history
+    # @return The list of [datetime, value] updates kept, oldest first
     def get_history(self):
-        return self.__history
+        with self.__lock:
+            return [self.__entry(index) for index in range(self.__count)]
 
     # Do an array-like get operation
     # @param index The index to look up
+    # @return [datetime, value] of the update
     def __getitem__(self, index):
-        return self.__history[index]
+        with self.__lock:
+            if index < 0:
+                index += self.__count
+            if not 0 <= index < self.__count:
+                raise IndexError("history index out of range")
+            return self.__entry(index)
+
+    # Insert an update in time order, dropping the oldest one if the history is full. Called with __lock held
+    def __insert(self, timestamp, value):
+        size = len(self.__values)
+        if self.__count == size:
+            self.__start = (self.__start + 1) % size
+            self.__count -= 1
+            self.__dropped += 1
+
+        # value_at and changes_between bisect the timestamps, which must stay sorted. An update older than the
+        # last one goes after the updates at or before its time.
+        position = self.__bisect_right(timestamp)
+        for index in range(self.__count, position, -1):
+            self.__times[self.__index(index)] = self.__times[self.__index(index - 1)]
+            self.__values[self.__index(index)] = self.__values[self.__index(index - 1)]
+
+        physical = self.__index(position)
+        self.__times[physical] = timestamp
+        self.__values[physical] = value
+        self.__count += 1
+
+        self.__value.set(self.__values[self.__index(self.__count - 1)])
 
     # Append a new value to this object
-    # @param time The time
-    # @param value The value
+    # @param item [time, value], with time a datetime or monotonic nanoseconds from now_ns(). An update older than
+    #             the last one is inserted in time order, and the latest update stays the current value
     def append(self, item):
         # Implicit check to ensure that this is a tuple
-        [time, value] = item
-
-        ret = self.__history.append(item)
+        [timestamp, value] = item
 
-        self.__update_value()
+        if isinstance(timestamp, datetime):
+            timestamp = _from_datetime(timestamp)
 
-        return ret
+        with self.__lock:
+            self.__insert(timestamp, value)
 
     # Update the contained value
     # @param value the value
     def set(self, value):
-        return self.append([datetime.now(), value])
+        # Stamped under the lock, so concurrent sets are kept in the order they are applied
+        with self.__lock:
+            self.__insert(now_ns(), value)
+
+    # Get the value in effect at a time
+    # @param t Monotonic nanoseconds from now_ns()
+    # @return The value of the last update at or before t. The initial value if t is before the first
+    #         update, or None if t is before the oldest update kept
+    def value_at(self, t):
+        with self.__lock:
+            index = self.__bisect_right(t)
+            if index:
+                return self.__values[self.__index(index - 1)]
+            return None if self.__dropped else self.__initial_value
+
+    # Get the updates made within a time window
+    # @param t0 Start of the window, in monotonic nanoseconds, inclusive
+    # @param t1 End of the window, in monotonic nanoseconds, inclusive
+    # @return The list of (time, value) updates, time in monotonic nanoseconds
+    def changes_between(self, t0, t1):
+        with self.__lock:
+            first = self.__bisect_left(t0)
+            last = self.__bisect_right(t1)
+            return [(self.__times[self.__index(index)], self.__values[self.__index(index)])
+                    for index in range(first, last)]
 
     # Perform a watch. See the description of "watch" above for Watchable
     # @param lambda_func A callable
@@ -210,3 +439,12 @@ class WatchableWithHistory(object):
     # object after issuing a command
     def watch_for_update(self, timeout=None):
         return self.__value.watch_for_update(timeout)
+
+    def _evaluate(self, lambda_func):
+        return self.__value._evaluate(lambda_func)
+
+    def _add_waiter(self, waiter):
+        self.__value._add_waiter(waiter)
+
+    def _remove_waiter(self, waiter):
+        self.__value._remove_waiter(waiter)
@@ -12,11 +12,64 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import array
+import collections
 import re
 
 from . import wpan_util
 from silk.config import wpan_constants as wpan
 
+_ADDRESS_CACHE_RE = re.compile(r"\t\"(\S+)\s+->\s+(\w+).*? age:(\w+)")
+
+_ON_MESH_PREFIX_RE = re.compile(
+    r"\t\"([0-9a-fA-F:]+)\s*prefix_len:(\d+)\s+origin:(\w*)\s+stable:(\w*).* \[" +
+    r"on-mesh:(\d)\s+def-route:(\d)\s+config:(\d)\s+dhcp:(\d)\s+slaac:(\d)\s+pref:(\d)\s+prio:(\w*)\]" +
+    r"\s+rloc:(0x[0-9a-fA-F]+)")
+
+
+def _slots_repr(entry):
+    """Returns "ClassName({field: value, ...})" for an entry with `__slots__`.
+    """
+    fields = {name: getattr(entry, name) for name in entry.__slots__}
+    return "{}({})".format(entry.__class__.__name__, fields)
+
+
+def _row_pattern(fields):
+    """Compiles a regex matching a table row and capturing its extended address and `fields`.
+
+    `fields` must be in the order wpanctl prints them; the fields in between are skipped.
+    """
+    return re.compile(r"\t\"([0-9a-fA-F]+)" + "".join(r".*? {}:([^,\"]+)".format(field) for field in fields))
+
+
+def _row_values(text, pattern, fields):
+    """Returns the extended address and the values of `fields` of a table row, matched with `pattern`.
+    """
+    m = pattern.match(text)
+    if m is not None:
+        return m.groups()
+
+    # Rows printing the fields in another order take the slower way.
+    items = text[2:-1].split(", ")
+    items_dict = dict(item.split(":", 1) for item in items[1:])
+    return (items[0],) + tuple(items_dict[field] for field in fields)
+
+
+_CHILD_FIELDS = ("RLOC16", "Timeout", "RxOnIdle", "FTD", "SecDataReq", "FullNetData")
+_CHILD_ROW_RE = _row_pattern(_CHILD_FIELDS)
+
+_NEIGHBOR_FIELDS = ("RLOC16", "IsChild", "RxOnIdle", "FTD")
+_NEIGHBOR_ROW_RE = _row_pattern(_NEIGHBOR_FIELDS)
+
+_ROUTER_FIELDS = ("RLOC16", "RouterId", "NextHop", "PathCost", "Age", "LinkEst")
+_ROUTER_ROW_RE = _row_pattern(_ROUTER_FIELDS)
+
+
+def _table_rows(table_list):
+    """Returns the row lines of a wpanctl table list string, without the `[` and `]` lines.
+    """
+    return [line for line in table_list.split("\n") if line.startswith("\t\"")]
+
 
 def is_associated(sed):
     print(sed.getprop(wpan.WPAN_STATE))
@@ -31,6 +84,8 @@ class ChildAddressEntry(object):
     """This object encapsulates a child Address entry.
     """
 
+    __slots__ = ("_ext_address", "_rloc16", "_ipv6_address")
+
     def __init__(self, text):
         # Example of expected text:
         #
@@ -62,13 +117,15 @@ class ChildAddressEntry(object):
         return self._ipv6_address
 
     def __repr__(self):
-        return "ChildEntry({})".format(self.__dict__)
+        return _slots_repr(self)
 
 
 class ChildEntry(object):
     """This object encapsulates a child entry.
     """
 
+    __slots__ = ("_ext_address", "_rloc16", "_timeout", "_rx_on_idle", "_ftd", "_sec_data_req", "_full_net_data")
+
     def __init__(self, text):
         # Example of expected text:
         #
@@ -76,22 +133,13 @@ class ChildEntry(object):
         # `RxOnIdle:no, FTD:no, SecDataReq:yes, FullNetData:yes"`
         #
 
-        # We get rid of the first two chars `\t"` and last char `"`, split the rest using whitespace as separator.
-        # Then remove any `,` at end of items in the list.
-        items = [item[:-1] if item[-1] == "," else item for item in text[2:-1].split()]
-
-        # First item in the extended address
-        self._ext_address = items[0]
+        (self._ext_address, self._rloc16, self._timeout, rx_on_idle, ftd, sec_data_req,
+         full_net_data) = _row_values(text, _CHILD_ROW_RE, _CHILD_FIELDS)
 
-        # Convert the rest into a dictionary by splitting using `:` as separator
-        items_dict = {item.split(":")[0]: item.split(":")[1] for item in items[1:]}
-
-        self._rloc16 = items_dict["RLOC16"]
-        self._timeout = items_dict["Timeout"]
-        self._rx_on_idle = (items_dict["RxOnIdle"] == "yes")
-        self._ftd = (items_dict["FTD"] == "yes")
-        self._sec_data_req = (items_dict["SecDataReq"] == "yes")
-        self._full_net_data = (items_dict["FullNetData"] == "yes")
+        self._rx_on_idle = (rx_on_idle == "yes")
+        self._ftd = (ftd == "yes")
+        self._sec_data_req = (sec_data_req == "yes")
+        self._full_net_data = (full_net_data == "yes")
 
     @property
     def ext_address(self):
@@ -118,7 +166,7 @@ class ChildEntry(object):
         return self._full_net_data
 
     def __repr__(self):
-        return "ChildEntry({})".format(self.__dict__)
+        return _slots_repr(self)
 
 
 def parse_child_table_result(child_table_list):
@@ -143,6 +191,8 @@ class NeighborEntry(object):
     """This object encapsulates a neighbor entry.
     """
 
+    __slots__ = ("_ext_address", "_rloc16", "_is_child", "_rx_on_idle", "_ftd")
+
     def __init__(self, text):
         # Example of expected text:
         #
@@ -150,20 +200,12 @@ class NeighborEntry(object):
         # `IsChild:yes, RxOnIdle:no, FTD:no, SecDataReq:yes, FullNetData:yes"`
         #
 
-        # We get rid of the first two chars `\t"` and last char `"`, split the rest using whitespace as separator.
-        # Then remove any `,` at end of items in the list.
-        items = [item[:-1] if item[-1] == "," else item for item in text[2:-1].split()]
-
-        # First item in the extended address
-        self._ext_address = items[0]
-
-        # Convert the rest into a dictionary by splitting the text using `:` as separator
-        items_dict = {item.split(":")[0]: item.split(":")[1] for item in items[1:]}
+        self._ext_address, self._rloc16, is_child, rx_on_idle, ftd = _row_values(text, _NEIGHBOR_ROW_RE,
+                                                                                 _NEIGHBOR_FIELDS)
 
-        self._rloc16 = items_dict["RLOC16"]
-        self._is_child = (items_dict["IsChild"] == "yes")
-        self._rx_on_idle = (items_dict["RxOnIdle"] == "yes")
-        self._ftd = (items_dict["FTD"] == "yes")
+        self._is_child = (is_child == "yes")
+        self._rx_on_idle = (rx_on_idle == "yes")
+        self._ftd = (ftd == "yes")
 
     @property
     def ext_address(self):
@@ -183,7 +225,7 @@ class NeighborEntry(object):
         return self._is_child
 
     def __repr__(self):
-        return "NeighborEntry({})".format(self.__dict__)
+        return _slots_repr(self)
 
 
 def parse_neighbor_table_result(neighbor_table_list):
@@ -199,28 +241,24 @@ class RouterTableEntry(object):
     """This object encapsulates a router table entry.
     """
 
+    __slots__ = ("_ext_address", "_rloc16", "_router_id", "_next_hop", "_path_cost", "_age", "_le")
+
     def __init__(self, text):
         # Example of expected text:
         #
         # `\t"8A970B3251810826, RLOC16:4000, RouterId:16, NextHop:43, PathCost:1, LQIn:3, LQOut:3, Age:3, LinkEst:yes"`
         #
 
-        # We get rid of the first two chars `\t"` and last char `"`, split the rest using whitespace as separator.
-        # Then remove any `,` at end of items in the list.
-        items = [item[:-1] if item[-1] == "," else item for item in text[2:-1].split()]
+        ext_address, rloc16, router_id, next_hop, path_cost, age, le = _row_values(text, _ROUTER_ROW_RE,
+                                                                                   _ROUTER_FIELDS)
 
-        # First item in the extended address
-        self._ext_address = items[0]
-
-        # Convert the rest into a dictionary by splitting the text using `:` as separator
-        items_dict = {item.split(":")[0]: item.split(":")[1] for item in items[1:]}
-
-        self._rloc16 = int(items_dict["RLOC16"], 16)
-        self._router_id = int(items_dict["RouterId"], 0)
-        self._next_hop = int(items_dict["NextHop"], 0)
-        self._path_cost = int(items_dict["PathCost"], 0)
-        self._age = int(items_dict["Age"], 0)
-        self._le = items_dict["LinkEst"] == "yes"
+        self._ext_address = ext_address
+        self._rloc16 = int(rloc16, 16)
+        self._router_id = int(router_id, 0)
+        self._next_hop = int(next_hop, 0)
+        self._path_cost = int(path_cost, 0)
+        self._age = int(age, 0)
+        self._le = le == "yes"
 
     @property
     def ext_address(self):
@@ -246,7 +284,7 @@ class RouterTableEntry(object):
         return self._le
 
     def __repr__(self):
-        return "RouterTableEntry({})".format(self.__dict__)
+        return _slots_repr(self)
 
 
 def parse_router_table_result(router_table_list):
@@ -259,24 +297,19 @@ class AddressCacheEntry(object):
     """This object encapsulates an address cache entry.
     """
 
+    __slots__ = ("_address", "_rloc16", "_age")
+
     def __init__(self, text):
         # Example of expected text:
         #
         # `\t"fd00:1234::d427:a1d9:6204:dbae -> 0x9c00, age:0"`
         #
 
-        # We get rid of the first two chars `\t"` and last char `"`, split the rest using whitespace as separator.
-        # Then remove any `,` at end of items in the list.
-        items = [item[:-1] if item[-1] == "," else item for item in text[2:-1].split()]
+        address, rloc16, age = _ADDRESS_CACHE_RE.match(text).groups()
 
-        # First item in the extended address
-        self._address = items[0]
-        self._rloc16 = int(items[2], 16)
-
-        # Convert the rest into a dictionary by splitting the text using `:` as separator
-        items_dict = {item.split(":")[0]: item.split(":")[1] for item in items[3:]}
-
-        self._age = int(items_dict["age"], 0)
+        self._address = address
+        self._rloc16 = int(rloc16, 16)
+        self._age = int(age, 0)
 
     @property
     def address(self):
@@ -291,7 +324,7 @@ class AddressCacheEntry(object):
         return self._age
 
     def __repr__(self):
-        return "AddressCacheEntry({})".format(self.__dict__)
+        return _slots_repr(self)
 
 
 def parse_address_cache_table_result(addr_cache_table_list):
@@ -300,6 +333,186 @@ def parse_address_cache_table_result(addr_cache_table_list):
     return [AddressCacheEntry(item) for item in addr_cache_table_list.split("\n")[1:-1]]
 
 
+# Columnar tables
+
+
+def _flag(value):
+    return value == "yes"
+
+
+def _hex_int(value):
+    return int(value, 16)
+
+
+# (column name, row field, converter) of the numeric and flag columns; flags are stored as 0 or 1.
+CHILD_TABLE_COLUMNS = (("rloc16", "RLOC16", _hex_int), ("timeout", "Timeout", int), ("age", "Age", int),
+                       ("rx_on_idle", "RxOnIdle", _flag), ("ftd", "FTD", _flag), ("sec_data_req", "SecDataReq", _flag),
+                       ("full_net_data", "FullNetData", _flag))
+
+NEIGHBOR_TABLE_COLUMNS = (("rloc16", "RLOC16", _hex_int), ("lq_in", "LQIn", int), ("age", "Age", int),
+                          ("is_child", "IsChild", _flag), ("rx_on_idle", "RxOnIdle", _flag), ("ftd", "FTD", _flag))
+
+ROUTER_TABLE_COLUMNS = (("rloc16", "RLOC16", _hex_int), ("router_id", "RouterId", int), ("next_hop", "NextHop", int),
+                        ("path_cost", "PathCost", int), ("lq_in", "LQIn", int), ("lq_out", "LQOut", int),
+                        ("age", "Age", int), ("link_established", "LinkEst", _flag))
+
+# Columns that change between two reads of an otherwise unchanged table.
+VOLATILE_COLUMNS = frozenset(["age"])
+
+TableDiff = collections.namedtuple("TableDiff", ["missing", "unexpected", "changed"])
+
+
+def _index(column):
+    return dict(zip(column, range(len(column))))
+
+
+class Table(object):
+    """Columnar wpanctl table keyed by extended address.
+
+    `columns` maps each column name to a list (ext_address) or an array.array
+    (numbers and flags) of one value per row. Rows are found in O(1) by
+    extended address, RLOC16 or, in router tables, router id.
+    """
+
+    __slots__ = ("columns", "_by_ext_address", "_by_rloc16", "_by_router_id")
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._by_ext_address = _index(columns["ext_address"])
+        self._by_rloc16 = _index(columns["rloc16"])
+        self._by_router_id = _index(columns["router_id"]) if "router_id" in columns else {}
+
+    def __len__(self):
+        return len(self.columns["ext_address"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, ext_address):
+        return ext_address in self._by_ext_address
+
+    def ext_addresses(self):
+        """Returns a set-like view of the extended addresses in the table.
+        """
+        return self._by_ext_address.keys()
+
+    def find(self, ext_address=None, rloc16=None, router_id=None):
+        """Returns the index of the row with `ext_address`, `rloc16` (an integer) or `router_id`, or None.
+        """
+        if ext_address is not None:
+            return self._by_ext_address.get(ext_address)
+        if rloc16 is not None:
+            return self._by_rloc16.get(rloc16)
+        return self._by_router_id.get(router_id)
+
+    def row(self, index):
+        """Returns row `index` as a dict of column name to value.
+        """
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def get(self, ext_address=None, rloc16=None, router_id=None):
+        """Returns the row with `ext_address`, `rloc16` or `router_id` as a dict, or None if there is none.
+        """
+        index = self.find(ext_address, rloc16, router_id)
+        return None if index is None else self.row(index)
+
+    def missing(self, ext_addresses):
+        """Returns the set of `ext_addresses` that have no row in the table.
+        """
+        return set(ext_addresses) - self._by_ext_address.keys()
+
+    def unexpected(self, ext_addresses):
+        """Returns the set of extended addresses in the table that are not in `ext_addresses`.
+        """
+        return self._by_ext_address.keys() - set(ext_addresses)
+
+    def diff(self, other, columns=None):
+        """Compares the table with an `other` table of the same kind, keyed by extended address.
+
+        Returns a TableDiff of the extended addresses only in `other` (missing),
+        only in this table (unexpected), and a dict {ext_address: {column: (other
+        value, value)}} of the rows whose `columns` differ (changed). `columns`
+        defaults to the columns of both tables except the VOLATILE_COLUMNS.
+        """
+        if columns is None:
+            columns = [name for name in self.columns if name in other.columns and name not in VOLATILE_COLUMNS]
+
+        changed = {}
+        for ext_address in self._by_ext_address.keys() & other._by_ext_address.keys():
+            index = self._by_ext_address[ext_address]
+            other_index = other._by_ext_address[ext_address]
+            changes = {
+                name: (other.columns[name][other_index], self.columns[name][index])
+                for name in columns
+                if self.columns[name][index] != other.columns[name][other_index]
+            }
+            if changes:
+                changed[ext_address] = changes
+
+        return TableDiff(missing=other._by_ext_address.keys() - self._by_ext_address.keys(),
+                         unexpected=self._by_ext_address.keys() - other._by_ext_address.keys(),
+                         changed=changed)
+
+    def as_numpy(self, name):
+        """Returns numeric column `name` as a NumPy array sharing its memory.
+
+        NumPy is only imported on first use, as it is too slow to import with every test.
+        """
+        import numpy
+
+        column = self.columns[name]
+        return numpy.frombuffer(column, dtype=numpy.dtype(column.typecode))
+
+    def __repr__(self):
+        return "Table({})".format(self.columns)
+
+
+# Compiled row patterns of parse_table_columns, by row fields
+_COLUMN_PATTERNS = {}
+
+
+def parse_table_columns(table_list, column_spec):
+    """Parses a wpanctl table list string into a `Table` in a single pass over its rows.
+
+    `column_spec` lists the (column name, row field, converter) of the columns besides ext_address in the order
+    wpanctl prints the fields, for example `CHILD_TABLE_COLUMNS`.
+    """
+    fields = tuple(field for _, field, _ in column_spec)
+    pattern = _COLUMN_PATTERNS.get(fields)
+    if pattern is None:
+        pattern = _COLUMN_PATTERNS[fields] = _row_pattern(fields)
+
+    # One scan of the whole string; `.` stops at line ends, so each match is one row.
+    rows = pattern.findall(table_list)
+    if len(rows) != table_list.count("\t\""):
+        rows = [_row_values(line, pattern, fields) for line in _table_rows(table_list)]
+
+    values = list(zip(*rows)) if rows else [()] * (len(fields) + 1)
+    columns = {"ext_address": list(values[0])}
+    for (name, _, convert), column_values in zip(column_spec, values[1:]):
+        columns[name] = array.array("b" if convert is _flag else "l", map(convert, column_values))
+
+    return Table(columns)
+
+
+def parse_child_table_columns(child_table_list):
+    """Parses child table list string into a columnar `Table`.
+    """
+    return parse_table_columns(child_table_list, CHILD_TABLE_COLUMNS)
+
+
+def parse_neighbor_table_columns(neighbor_table_list):
+    """Parses neighbor table list string into a columnar `Table`.
+    """
+    return parse_table_columns(neighbor_table_list, NEIGHBOR_TABLE_COLUMNS)
+
+
+def parse_router_table_columns(router_table_list):
+    """Parses router table list string into a columnar `Table`.
+    """
+    return parse_table_columns(router_table_list, ROUTER_TABLE_COLUMNS)
+
+
 # wpan scan parse
 
 
@@ -453,16 +666,16 @@ class OnMeshPrefix(object):
     """This object encapsulates an on-mesh prefix.
     """
 
+    __slots__ = ("_prefix", "_prefix_len", "_origin", "_stable", "_on_mesh", "_def_route", "_config", "_dhcp",
+                 "_slaac", "_preferred", "_priority", "_rloc16")
+
     def __init__(self, text):
         # Example of expected text:
         #
         # `\t"fd00:abba:cafe::       prefix_len:64   origin:user     stable:yes flags:0x31`
         # ` [on-mesh:1 def-route:0 config:0 dhcp:0 slaac:1 pref:1 prio:med] rloc:0x0000"`
 
-        m = re.match(
-            r"\t\"([0-9a-fA-F:]+)\s*prefix_len:(\d+)\s+origin:(\w*)\s+stable:(\w*).* \[" +
-            r"on-mesh:(\d)\s+def-route:(\d)\s+config:(\d)\s+dhcp:(\d)\s+slaac:(\d)\s+pref:(\d)\s+prio:(\w*)\]" +
-            r"\s+rloc:(0x[0-9a-fA-F]+)", text)
+        m = _ON_MESH_PREFIX_RE.match(text)
         wpan_util.verify(m is not None)
         data = m.groups()
 
@@ -520,7 +733,7 @@ class OnMeshPrefix(object):
         return self._rloc16
 
     def __repr__(self):
-        return "OnMeshPrefix({})".format(self.__dict__)
+        return _slots_repr(self)
 
 
 def parse_on_mesh_prefix_result(on_mesh_prefix_list):
@@ -14,9 +14,12 @@
 
 import inspect
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from silk.config import wpan_constants as wpan
+from silk.utils import event_log
 from . import wpan_table_parser
 
 logger = logging.getLogger(__name__)
@@ -30,64 +33,239 @@ class VerifyError(Exception):
     pass
 
 
-_is_in_verify_within = False
+# Depth of nested verify_within calls on the current thread; verify() does not log failures that will be retried.
+_verify_within_state = threading.local()
+
+DEFAULT_BACKOFF = 1.5
+DEFAULT_MAX_DELAY_TIME = 2.0
+DEFAULT_FALLBACK_DELAY_TIME = 5.0
+DEFAULT_MAX_WORKERS = 8
+
+# Events that can change the outcome of a condition; command events are left out as checks make commands themselves.
+VERIFY_EVENT_TYPES = (event_log.STATE_CHANGE, event_log.OTNS_STATUS, event_log.WPANTUND_CRASH)
+
+
+def _is_in_verify_within():
+    return getattr(_verify_within_state, "depth", 0) > 0
 
 
 def verify(condition):
     """Verifies that a `condition` is true, otherwise raises a VerifyError.
     """
-    global _is_in_verify_within
     if not condition:
         calling_frame = inspect.currentframe().f_back
         error_message = "verify() failed at line {} in \"{}\"".format(calling_frame.f_lineno,
                                                                       calling_frame.f_code.co_filename)
-        if not _is_in_verify_within:
+        if not _is_in_verify_within():
             logger.error(error_message)
         raise VerifyError(error_message)
 
 
-def verify_within(condition_checker_func, wait_time, delay_time=0.1):
+class PollContext(object):
+    """State and statistics of one verify_within call.
+
+    The delay between two failed attempts starts at `delay_time` and grows by
+    `backoff` up to `max_delay_time`. It is never shorter than the last attempt
+    took, so slow checks (many wpanctl calls) leave the devices idle at least
+    half of the time. The last attempt is made at the deadline.
+
+    Args:
+        wait_time (float): seconds the condition has to pass within.
+        delay_time (float): delay after the first failed attempt.
+        max_delay_time (float): longest delay between two attempts.
+        backoff (float): factor the delay grows by after each failed attempt.
+    """
+
+    def __init__(self, wait_time, delay_time=0.1, max_delay_time=DEFAULT_MAX_DELAY_TIME, backoff=DEFAULT_BACKOFF):
+        self.wait_time = wait_time
+        self.max_delay_time = max(max_delay_time, delay_time)
+        self.backoff = backoff
+        self.start_time = time.monotonic()
+        self.deadline = self.start_time + wait_time
+        self.end_time = None
+        self.attempts = 0
+        self.check_time = 0.0
+        self.last_check_time = 0.0
+        self._delay = delay_time
+
+    @property
+    def elapsed(self):
+        """Seconds since the call started, up to its end once it is done.
+        """
+        end_time = self.end_time if self.end_time is not None else time.monotonic()
+        return end_time - self.start_time
+
+    def attempt(self, condition_checker_func):
+        """Run `condition_checker_func` once, timing it.
+        """
+        self.attempts += 1
+        start_time = time.monotonic()
+        try:
+            condition_checker_func()
+        finally:
+            self.last_check_time = time.monotonic() - start_time
+            self.check_time += self.last_check_time
+
+    def next_delay(self):
+        """Returns the seconds to wait before the next attempt, or None once the deadline has passed.
+        """
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+
+        delay = min(max(self._delay, self.last_check_time), self.max_delay_time)
+        self._delay = min(self._delay * self.backoff, self.max_delay_time)
+        return min(delay, remaining)
+
+    def stats(self):
+        return {"attempts": self.attempts, "elapsed": self.elapsed, "check_time": self.check_time}
+
+
+def _poll(condition_checker_func, context, wait):
+    """Attempts `condition_checker_func` until it passes, calling wait(delay) after each failed attempt.
+    """
+    _verify_within_state.depth = getattr(_verify_within_state, "depth", 0) + 1
+    try:
+        while True:
+            try:
+                context.attempt(condition_checker_func)
+            except VerifyError:
+                delay = context.next_delay()
+                if delay is None:
+                    context.end_time = time.monotonic()
+                    logger.error("Took too long to pass the condition ({:.1f}>{} sec, {} attempts)".format(
+                        context.elapsed, context.wait_time, context.attempts))
+                    raise
+                if delay > 0:
+                    wait(delay)
+            else:
+                context.end_time = time.monotonic()
+                break
+    finally:
+        _verify_within_state.depth -= 1
+
+    logger.debug("Condition passed after %d attempts in %.2f sec (%.2f sec checking)", context.attempts,
+                 context.elapsed, context.check_time)
+    return context
+
+
+def verify_within(condition_checker_func,
+                  wait_time,
+                  delay_time=0.1,
+                  max_delay_time=DEFAULT_MAX_DELAY_TIME,
+                  backoff=DEFAULT_BACKOFF):
     """Verifies that a given function `condition_checker_func` passes successfully within a given wait timeout.
         `wait_time` is maximum time waiting for condition_checker to pass (in seconds).
-        `delay_time` specifies a delay interval added between failed attempts (in seconds).
+        `delay_time` specifies the delay after the first failed attempt (in seconds); later delays grow by
+        `backoff` up to `max_delay_time`, see PollContext.
+        Returns the PollContext of the call, holding the number of attempts and the time spent.
+        Safe to call from several threads at once.
+    """
+    context = PollContext(wait_time, delay_time, max_delay_time, backoff)
+    return _poll(condition_checker_func, context, time.sleep)
+
+
+def verify_on_events(condition_checker_func,
+                     wait_time,
+                     nodes=None,
+                     event_types=VERIFY_EVENT_TYPES,
+                     fallback_delay_time=DEFAULT_FALLBACK_DELAY_TIME):
+    """Verifies that `condition_checker_func` passes within `wait_time`, re-checking it when a relevant event arrives.
+        Instead of polling, the condition is checked again as soon as an event of `event_types` (wpantund state
+        changes and OTNS status by default) is recorded for one of `nodes` (node names or nodes, all if None).
+        Without events it is still checked every `fallback_delay_time` seconds and at the deadline.
+        Returns the PollContext of the call, like verify_within.
+    """
+    if nodes is not None:
+        nodes = {node if isinstance(node, str) else node.device.name() for node in nodes}
+    event_types = frozenset(event_types)
+    changed = threading.Event()
+
+    def on_event(event):
+        if event.type in event_types and (nodes is None or event.node in nodes):
+            changed.set()
+
+    def wait(delay):
+        changed.wait(delay)
+        # Events arriving while the condition is checked trigger another check.
+        changed.clear()
+
+    context = PollContext(wait_time, fallback_delay_time, fallback_delay_time, backoff=1)
+    event_log.add_listener(on_event)
+    try:
+        return _poll(condition_checker_func, context, wait)
+    finally:
+        event_log.remove_listener(on_event)
+
+
+def fetch_all(node_list, fetch, max_workers=None):
+    """Returns [fetch(node) for node in node_list], calling fetch for the nodes concurrently.
+        At most `max_workers` (DEFAULT_MAX_WORKERS if None) nodes are queried at a time. An exception raised by
+        fetch is raised once every node was queried.
     """
-    global _is_in_verify_within
-    start_time = time.time()
-    old_is_in_verify_within = _is_in_verify_within
-    _is_in_verify_within = True
-    while True:
+    node_list = list(node_list)
+    if len(node_list) <= 1:
+        return [fetch(node) for node in node_list]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or DEFAULT_MAX_WORKERS, len(node_list))) as executor:
+        futures = [executor.submit(fetch, node) for node in node_list]
+
+    return [future.result() for future in futures]
+
+
+def _raise_failures(failures):
+    """Raises a VerifyError listing all `failures`, if there are any.
+    """
+    if failures:
+        error_message = "; ".join(failures)
+        if not _is_in_verify_within():
+            logger.error(error_message)
+        raise VerifyError(error_message)
+
+
+def verify_nodes(node_list, fetch, check, max_workers=None):
+    """Fetches the data of all nodes in `node_list` concurrently, then verifies each node with check(node, data).
+        A VerifyError raised by `check` does not stop the other nodes from being verified; a single VerifyError
+        listing every failing node is raised at the end.
+    """
+    node_list = list(node_list)
+    failures = []
+    for node, data in zip(node_list, fetch_all(node_list, fetch, max_workers)):
         try:
-            condition_checker_func()
-        except VerifyError:
-            if time.time() - start_time > wait_time:
-                logger.error("Took too long to pass the condition ({}>{} sec)".format(
-                    time.time() - start_time, wait_time))
-                raise
-        except BaseException:
-            raise
-        else:
-            break
-        if delay_time != 0:
-            time.sleep(delay_time)
-    _is_in_verify_within = old_is_in_verify_within
-    return True
+            check(node, data)
+        except VerifyError as error:
+            failures.append("{}: {}".format(node.name, error))
 
+    _raise_failures(failures)
 
-def verify_address(node_list, prefix):
+
+def _fetch_all_addresses(node):
+    return wpan_table_parser.parse_list(node.get(wpan.WPAN_IP6_ALL_ADDRESSES))
+
+
+def _fetch_prefixes(node):
+    return wpan_table_parser.parse_on_mesh_prefix_result(node.get(wpan.WPAN_THREAD_ON_MESH_PREFIXES))
+
+
+def verify_address(node_list, prefix, max_workers=None):
     """This function verifies that all nodes in the `node_list` contain an IPv6 address with the given `prefix`.
     """
-    for node in node_list:
-        all_addrs = wpan_table_parser.parse_list(node.get(wpan.WPAN_IP6_ALL_ADDRESSES))
+
+    def check(node, all_addrs):
         verify(any([addr.startswith(prefix[:-1]) for addr in all_addrs]))
 
+    verify_nodes(node_list, _fetch_all_addresses, check, max_workers)
+
 
-def verify_no_address(node_list, prefix):
+def verify_no_address(node_list, prefix, max_workers=None):
     """This function verifies that none of nodes in the `node_list` contain an IPv6 address with the given `prefix`.
     """
-    for node in node_list:
-        all_addrs = wpan_table_parser.parse_list(node.get(wpan.WPAN_IP6_ALL_ADDRESSES))
+
+    def check(node, all_addrs):
         verify(all([not addr.startswith(prefix[:-1]) for addr in all_addrs]))
 
+    verify_nodes(node_list, _fetch_all_addresses, check, max_workers)
+
 
 def verify_prefix(node_list,
                   prefix,
@@ -99,11 +277,12 @@ def verify_prefix(node_list,
                   dhcp=False,
                   configure=False,
                   default_route=False,
-                  preferred=True):
+                  preferred=True,
+                  max_workers=None):
     """This function verifies that the `prefix` is present on all the nodes in the `node_list`.
     """
-    for node in node_list:
-        prefixes = wpan_table_parser.parse_on_mesh_prefix_result(node.get(wpan.WPAN_THREAD_ON_MESH_PREFIXES))
+
+    def check(node, prefixes):
         for p in prefixes:
             if p.prefix == prefix:
                 verify(int(p.prefix_len) == prefix_len)
@@ -117,7 +296,9 @@ def verify_prefix(node_list,
                 verify(p.priority == priority)
                 break
         else:
-            raise VerifyError("Did not find prefix {} on node {}".format(prefix, node))
+            raise VerifyError("Did not find prefix {} on node {}".format(prefix, node.name))
+
+    verify_nodes(node_list, _fetch_prefixes, check, max_workers)
 
 
 def verify_correct_prefix_among_similar_prefixes(node_list,
@@ -130,14 +311,15 @@ def verify_correct_prefix_among_similar_prefixes(node_list,
                                                  dhcp=False,
                                                  configure=False,
                                                  default_route=False,
-                                                 preferred=False):
+                                                 preferred=False,
+                                                 max_workers=None):
     """
     This function verifies that the `prefix` with specified flags is present on all nodes in the `node_list`
     by checking each and every prefix in the prefixes list till a match is found or the list is exhausted.
     Due to this the correct prefix can be found in cases where same prefix with different flags is added on the nodes.
     """
-    for node in node_list:
-        prefixes = wpan_table_parser.parse_on_mesh_prefix_result(node.get(wpan.WPAN_THREAD_ON_MESH_PREFIXES))
+
+    def check(node, prefixes):
         for p in prefixes:
             if p.prefix == prefix:
                 if (int(p.prefix_len) == prefix_len and p.is_stable() == stable and p.is_on_mesh() == on_mesh and
@@ -147,15 +329,19 @@ def verify_correct_prefix_among_similar_prefixes(node_list,
         else:
             raise VerifyError("Did not find prefix {} on node {}".format(prefix, node.name))
 
+    verify_nodes(node_list, _fetch_prefixes, check, max_workers)
 
-def verify_no_prefix(node_list, prefix):
+
+def verify_no_prefix(node_list, prefix, max_workers=None):
     """This function verifies that the `prefix` is NOT present on any node in the `node_list`.
     """
-    for node in node_list:
-        prefixes = wpan_table_parser.parse_on_mesh_prefix_result(node.get(wpan.WPAN_THREAD_ON_MESH_PREFIXES))
+
+    def check(node, prefixes):
         for p in prefixes:
             verify(not p.prefix == prefix)
 
+    verify_nodes(node_list, _fetch_prefixes, check, max_workers)
+
 
 def verify_prefix_with_rloc16(node_list,
                               prefix,
@@ -168,14 +354,14 @@ def verify_prefix_with_rloc16(node_list,
                               dhcp=False,
                               configure=False,
                               default_route=False,
-                              preferred=True):
+                              preferred=True,
+                              max_workers=None):
     """
     This function verifies that the `prefix` is present on all the nodes in the `node_list`. It also verifies
         that the `prefix` is associated with the given `rloc16` (as an integer).
     """
-    for node in node_list:
-        prefixes = wpan_table_parser.parse_on_mesh_prefix_result(node.get(wpan.WPAN_THREAD_ON_MESH_PREFIXES))
 
+    def check(node, prefixes):
         for p in prefixes:
             if p.prefix == prefix and p.origin == "ncp" and int(p.rloc16(), 0) == rloc16:
                 verify(int(p.prefix_len) == prefix_len)
@@ -191,67 +377,99 @@ def verify_prefix_with_rloc16(node_list,
         else:
             raise VerifyError("Did not find prefix {} on node {}".format(prefix, node.name))
 
+    verify_nodes(node_list, _fetch_prefixes, check, max_workers)
+
 
-def verify_no_prefix_with_rloc16(node_list, prefix, rloc16):
+def verify_no_prefix_with_rloc16(node_list, prefix, rloc16, max_workers=None):
     """
     This function verifies that none of the nodes in `node_list` contains the on-mesh `prefix` associated with the
     given `rloc16`.
     """
-    for node in node_list:
-        prefixes = wpan_table_parser.parse_on_mesh_prefix_result(node.get(wpan.WPAN_THREAD_ON_MESH_PREFIXES))
 
+    def check(node, prefixes):
         for p in prefixes:
             if p.prefix == prefix and p.origin == "ncp" and int(p.rloc16(), 0) == rloc16:
                 raise VerifyError("Did find prefix {} with rloc16 {} on node {}".format(
                     prefix, hex(rloc16), node.name))
 
+    verify_nodes(node_list, _fetch_prefixes, check, max_workers)
 
-def check_neighbor_table(node, neighbors):
+
+def check_neighbor_table(node, neighbors, max_workers=None):
     """This function verifies that the neighbor table of a given `node` contains the node in the `neighbors` list.
+        The table and the neighbors' extended addresses are read concurrently; the VerifyError lists every
+        missing neighbor.
     """
-    neighbor_table = wpan_table_parser.parse_neighbor_table_result(node.get(wpan.WPAN_THREAD_NEIGHBOR_TABLE))
-    for neighbor in neighbors:
-        ext_addr = neighbor.get(wpan.WPAN_EXT_ADDRESS)[1:-1]
-        for entry in neighbor_table:
-            if entry.ext_address == ext_addr:
-                break
-        else:
-            raise VerifyError("Failed to find a neighbor entry for extended address {} in table".format(ext_addr))
 
+    def fetch(queried_node):
+        if queried_node is node:
+            return wpan_table_parser.parse_neighbor_table_columns(node.get(wpan.WPAN_THREAD_NEIGHBOR_TABLE))
+        return queried_node.get(wpan.WPAN_EXT_ADDRESS)[1:-1]
 
-def check_parent_on_child_and_childtable_on_parent(parent, children):
-    """Check parent on each child and on parent verify all children are present.
-    """
+    results = fetch_all([node] + list(neighbors), fetch, max_workers)
+    neighbor_table = results[0]
 
-    # Get parent's extended address
-    parent_ext_addr = parent.getprop(wpan.WPAN_EXT_ADDRESS)[1:-1]
+    _raise_failures([
+        "Failed to find a neighbor entry for extended address {} in table".format(ext_addr)
+        for ext_addr in results[1:]
+        if ext_addr not in neighbor_table
+    ])
 
-    # Verify parent on children
-    for child in children:
-        # get the extended address(it's length is always 16) of the parent from child
-        thread_parent = child.getprop(wpan.WPAN_THREAD_PARENT)[1:17]
-        verify(parent_ext_addr == thread_parent)
-        logger.info("***** parent {} has extended address: {}, child {} selected parent: {} *****".format(
-            parent.name, parent_ext_addr, child.name, thread_parent))
 
-    # verify all children are present in selected parent's childtable
-    child_table = parent.wpanctl("get", "get " + wpan.WPAN_THREAD_CHILD_TABLE, 2)
-    child_table = wpan_table_parser.parse_child_table_result(child_table)
-    verify(len(child_table) == len(children))
+def check_parent_on_child_and_childtable_on_parent(parent, children, max_workers=None):
+    """Check parent on each child and on parent verify all children are present.
+        The parent and all children are queried concurrently; the VerifyError lists every failing child.
+    """
 
-    counter = 0
-    for i, child in enumerate(children):
-        ext_addr = child.getprop(wpan.WPAN_EXT_ADDRESS)[1:-1]
+    def fetch(node):
+        if node is parent:
+            child_table = parent.wpanctl("get", "get " + wpan.WPAN_THREAD_CHILD_TABLE, 2)
+            ext_address = parent.getprop(wpan.WPAN_EXT_ADDRESS)[1:-1]
+            return ext_address, wpan_table_parser.parse_child_table_columns(child_table)
 
-        for entry in child_table:
-            if entry.ext_address == ext_addr:
-                verify(int(entry.rloc16, 16) == int(child.get(wpan.WPAN_THREAD_RLOC16), 16))
-                verify(int(entry.timeout) == int(child.getprop(wpan.WPAN_THREAD_CHILD_TIMEOUT)))
-                verify(child.get(wpan.WPAN_NODE_TYPE) == wpan.NODE_TYPE_SLEEPY_END_DEVICE)
-                counter += 1
+        # get the extended address(it's length is always 16) of the parent from child
+        return {
+            "parent": node.getprop(wpan.WPAN_THREAD_PARENT)[1:17],
+            "ext_address": node.getprop(wpan.WPAN_EXT_ADDRESS)[1:-1],
+            "rloc16": int(node.get(wpan.WPAN_THREAD_RLOC16), 16),
+            "timeout": int(node.getprop(wpan.WPAN_THREAD_CHILD_TIMEOUT)),
+            "node_type": node.get(wpan.WPAN_NODE_TYPE),
+        }
+
+    children = list(children)
+    results = fetch_all([parent] + children, fetch, max_workers)
+    parent_ext_addr, child_table = results[0]
+    failures = []
+
+    # verify all children are present in selected parent's childtable, and no others
+    unexpected = child_table.unexpected(data["ext_address"] for data in results[1:])
+    if unexpected:
+        failures.append("{}: unexpected child table entries {}".format(parent.name, ", ".join(sorted(unexpected))))
 
-    missing_entry = len(children) - counter
-    verify(missing_entry == 0)
+    # Verify parent on children
+    for child, data in zip(children, results[1:]):
+        logger.info("***** parent {} has extended address: {}, child {} selected parent: {} *****".format(
+            parent.name, parent_ext_addr, child.name, data["parent"]))
+
+        if data["parent"] != parent_ext_addr:
+            failures.append("{}: selected parent {} instead of {}".format(child.name, data["parent"], parent_ext_addr))
+
+        index = child_table.find(ext_address=data["ext_address"])
+        if index is None:
+            failures.append("{}: missing from the child table of {}".format(child.name, parent.name))
+            continue
+        if child_table["rloc16"][index] != data["rloc16"]:
+            failures.append("{}: child table rloc16 {:#06x} instead of {:#06x}".format(
+                child.name, child_table["rloc16"][index], data["rloc16"]))
+        if child_table["timeout"][index] != data["timeout"]:
+            failures.append("{}: child table timeout {} instead of {}".format(child.name,
+                                                                              child_table["timeout"][index],
+                                                                              data["timeout"]))
+        if data["node_type"] != wpan.NODE_TYPE_SLEEPY_END_DEVICE:
+            failures.append("{}: node type {} instead of {}".format(child.name, data["node_type"],
+                                                                    wpan.NODE_TYPE_SLEEPY_END_DEVICE))
+
+    _raise_failures(failures)
 
 
 def check_unselected_parent(parent, children):
@@ -0,0 +1,105 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Classifier for wpantund log lines.
+
+Every line is first checked against a few literal markers; only lines
+containing one of them go through a single compiled alternation whose named
+groups identify the kind of line. The result is a LineEvent shared by all
+monitors of the line, or None for lines nobody reacts to.
+"""
+
+import collections
+import enum
+import re
+
+
+class LineEventType(enum.Enum):
+    STATE_CHANGE = 0
+    CRASH = 1
+    FRAMING_ERROR = 2
+    NCP_READY = 3
+    OTNS_STATUS = 4
+    NCP_VERSION = 5
+    EXTADDR_RESPONSE = 6
+    WPANTUND_START = 7
+
+
+LineEvent = collections.namedtuple("LineEvent", ["type", "value", "line"])
+LineEvent.__doc__ = """Classified log line.
+
+value holds the new state, the OTNS status payload, the NCP version or the
+extended address, depending on type, and None otherwise.
+"""
+
+# Lines of interest include every wpantund line silk_replay reacts to, since
+# only those are logged unless wpantund line logging is on.
+_MARKERS = ("[OTNS]", "State change", "FATAL ERROR", "Framing error", "Finished initializing NCP", "NCP is running",
+            "[stdout] [", "Starting wpantund")
+
+_LINE_REGEX = re.compile("|".join([
+    r"wpantund\[\d+\]: NCP => .*\[OTNS\] (?P<otns_status>[\w\d]+=[A-Fa-f0-9,rsdn]+)",
+    r"State change: \"[^\"]*\" -> \"(?P<state>[^\"]*)\"",
+    r"(?P<crash>FATAL ERROR)",
+    r"(?P<framing_error>Framing error)",
+    r"(?P<ncp_ready>Finished initializing NCP)",
+    r"NCP is running \"(?P<ncp_version>.*)\"",
+    r"\[stdout\] \[(?P<extaddr>[A-Fa-f0-9]{16})\]",
+    r"(?P<wpantund_start>Starting wpantund)",
+]))
+
+_GROUP_TYPES = {
+    "otns_status": LineEventType.OTNS_STATUS,
+    "state": LineEventType.STATE_CHANGE,
+    "crash": LineEventType.CRASH,
+    "framing_error": LineEventType.FRAMING_ERROR,
+    "ncp_ready": LineEventType.NCP_READY,
+    "ncp_version": LineEventType.NCP_VERSION,
+    "extaddr": LineEventType.EXTADDR_RESPONSE,
+    "wpantund_start": LineEventType.WPANTUND_START,
+}
+
+_VALUE_GROUPS = ("otns_status", "state", "ncp_version", "extaddr")
+
+
+def classify(line):
+    """Returns the LineEvent for line, or None if it is not a line of interest.
+    """
+    for marker in _MARKERS:
+        if marker in line:
+            break
+    else:
+        return None
+
+    match = _LINE_REGEX.search(line)
+    if match is None:
+        return None
+
+    group = match.lastgroup
+    value = match.group(group) if group in _VALUE_GROUPS else None
+    return LineEvent(_GROUP_TYPES[group], value, line)
+
+
+def split_otns_status(status):
+    """Split an OTNS status payload such as "role=3" into its key and value.
+    """
+    key, _, value = status.partition("=")
+    return key, value
+
+
+def line_event(kwargs):
+    """Returns the event published along with a line, classifying the line if the publisher did not.
+    """
+    if "event" in kwargs:
+        return kwargs["event"]
+    return classify(kwargs["line"])
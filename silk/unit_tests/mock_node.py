@@ -0,0 +1,45 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""This module contains a mock wpan node for tests of the wpan_util verifiers.
+"""
+
+import time
+
+
+class MockWpanNode(object):
+    """Mock node answering wpanctl queries from a dict after a delay.
+
+    Properties missing from the dict read as an empty table.
+    """
+
+    def __init__(self, name, properties, delay=0.1):
+        """Initialize a mock wpan node.
+
+        Args:
+            name (str): name of the node.
+            properties (dict): values of the wpan properties, by property name.
+            delay (float): seconds each query takes.
+        """
+        self.name = name
+        self.properties = properties
+        self.delay = delay
+
+    def get(self, prop_name):
+        time.sleep(self.delay)
+        return self.properties.get(prop_name, "[\n]")
+
+    getprop = get
+
+    def wpanctl(self, cmd, command, timeout):
+        return self.get(command.split()[-1])
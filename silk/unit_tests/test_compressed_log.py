@@ -0,0 +1,131 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import gzip
+import io
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from silk.tests.silk_run import SilkRunner
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import compressed_log
+
+
+class CompressedLogTest(SilkTestCase):
+    """Silk unit tests for the compressed, rotating log handler.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.directory.name, "silk.log")
+        self.logger = logging.getLogger("silk").getChild("CompressedLogTest")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_lines(self, handler, count):
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+        for index in range(count):
+            self.logger.debug("line %d", index)
+        self.logger.removeHandler(handler)
+        handler.close()
+
+    def test_round_trip(self):
+        """Test a compressed log is a regular gzip stream and is read back from any line.
+        """
+        handler = compressed_log.CompressedRotatingFileHandler(self.base_path,
+                                                               compression=compressed_log.COMPRESSION_GZIP,
+                                                               frame_size=100)
+        self.write_lines(handler, 50)
+        path = self.base_path + ".gz"
+
+        expected = ["line %d\n" % index for index in range(50)]
+        with gzip.open(path, "rt") as log_file:
+            self.assertEqual(log_file.readlines(), expected)
+
+        frames = compressed_log.read_index(path)
+        self.assertGreater(len(frames), 1)
+        self.assertEqual(sum(frame.lines for frame in frames), 50)
+
+        self.assertEqual(list(compressed_log.iter_lines(path)), expected)
+        self.assertEqual(list(compressed_log.iter_lines(path, start_line=37)), expected[37:])
+
+        os.remove(path + compressed_log.INDEX_SUFFIX)
+        self.assertEqual(list(compressed_log.iter_lines(path, start_line=37)), expected[37:])
+
+    def test_plain_log(self):
+        """Test plain text logs are read unchanged.
+        """
+        with open(self.base_path, "w") as log_file:
+            log_file.write("one\ntwo\n")
+        self.assertEqual(list(compressed_log.iter_lines(self.base_path, start_line=1)), ["two\n"])
+
+    def test_rotation(self):
+        """Test the log is rotated by compressed size and only backup_count logs are kept.
+        """
+        handler = compressed_log.CompressedRotatingFileHandler(self.base_path,
+                                                               compression=compressed_log.COMPRESSION_GZIP,
+                                                               max_bytes=1,
+                                                               backup_count=2,
+                                                               frame_size=1)
+        self.write_lines(handler, 4)
+        path = self.base_path + ".gz"
+
+        self.assertEqual(list(compressed_log.iter_lines(compressed_log.rotated_path(path, 2))), ["line 2\n"])
+        self.assertEqual(list(compressed_log.iter_lines(compressed_log.rotated_path(path, 1))), ["line 3\n"])
+        self.assertEqual(list(compressed_log.iter_lines(path)), [])
+        self.assertFalse(os.path.exists(compressed_log.rotated_path(path, 3)))
+
+    def test_background_flush(self):
+        """Test buffered records are written once flush_interval passes, with no further record or close.
+        """
+        handler = compressed_log.CompressedRotatingFileHandler(self.base_path,
+                                                               compression=compressed_log.COMPRESSION_GZIP,
+                                                               flush_interval=0.1)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+        try:
+            self.logger.debug("before the hang")
+            time.sleep(0.5)
+            self.assertEqual(list(compressed_log.iter_lines(self.base_path + ".gz")), ["before the hang\n"])
+        finally:
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def test_max_bytes_needs_backups(self):
+        """Test silk_run rejects --log-max-bytes without a backup to rotate to.
+        """
+        argv = ["silk_run.py", "-z", "gzip", "--log-max-bytes", "1000", "ot_test_*.py"]
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            SilkRunner.parse_args(argv)
+
+        args = SilkRunner.parse_args(argv[:-1] + ["--log-backups", "1", "ot_test_*.py"])
+        self.assertEqual((args.log_max_bytes, args.log_backups), (1000, 1))
+
+    def test_unknown_compression(self):
+        """Test an unknown codec is rejected.
+        """
+        with self.assertRaises(ValueError):
+            compressed_log.CompressedRotatingFileHandler(self.base_path, compression="lzma")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import threading
+import unittest
+
+from silk.device.system_call_manager import SystemCallManager
+from silk.node.fifteen_four_dev_board import FifteenFourDevBoardNode, ThreadDevBoard
+from silk.unit_tests.mock_device import MockHwModule
+from silk.unit_tests.testcase import SilkTestCase
+
+FAILING_NODE_ID = 3
+
+
+class PartialBoard(ThreadDevBoard):
+    """Board with a worker thread and no hardware; the board of FAILING_NODE_ID fails to build.
+    """
+
+    node_ids = itertools.count(1)
+    built = []
+
+    @staticmethod
+    def claim_device(name=None, sw_version=None):
+        node_id = next(PartialBoard.node_ids)
+        return MockHwModule("partial%d" % node_id, node_id), "Mock"
+
+    def __init__(self, device=None, device_path=None, **kwargs):
+        FifteenFourDevBoardNode.__init__(self, virtual=True, device=device, device_path=device_path)
+        SystemCallManager.__init__(self)
+        self.netns_cleaned_up = False
+        PartialBoard.built.append(self)
+
+        if device.get_otns_vis_node_id() == FAILING_NODE_ID:
+            raise RuntimeError("cannot open %s" % device_path)
+
+    def cleanup_netns(self):
+        self.netns_cleaned_up = True
+
+
+class DevBoardTest(SilkTestCase):
+    """Silk unit tests for building dev boards.
+    """
+
+    def test_create_many_partial_failure(self):
+        """Test the boards already built are torn down when another board fails to build.
+        """
+        threads_before = set(threading.enumerate())
+
+        with self.assertRaisesRegex(RuntimeError, "cannot open /dev/tty3"):
+            PartialBoard.create_many(4)
+
+        self.assertEqual(len(PartialBoard.built), 4)
+        for board in PartialBoard.built:
+            if board.device.get_otns_vis_node_id() != FAILING_NODE_ID:
+                self.assertTrue(board.netns_cleaned_up, board.device.name())
+
+        # Only the board that failed to build still has its worker thread.
+        worker_threads = [
+            thread for thread in set(threading.enumerate()) - threads_before if thread.name.startswith("thread-")
+        ]
+        self.assertEqual(len(worker_threads), 1)
+
+        for board in PartialBoard.built:
+            if board.device.get_otns_vis_node_id() == FAILING_NODE_ID:
+                board.stop_worker()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from silk.node.fifteen_four_dev_board import WpantundMonitor
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import event_log
+from silk.utils import signal
+
+
+class EventLogTest(SilkTestCase):
+    """Silk unit tests for the structured event log.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, event_log.EVENT_LOG_FILENAME)
+
+    def tearDown(self):
+        event_log.close_event_log()
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Test recorded events are read back in order with their fields.
+        """
+        event_log.open_event_log(self.path)
+        event_log.record(event_log.TEST_MARKER, marker="set_up", name="Test.test_one")
+        event_log.record(event_log.STATE_CHANGE, "Node1", state="associated")
+        event_log.close_event_log()
+
+        events = list(event_log.read_events(self.path))
+        self.assertEqual([(event.node, event.type, event.fields) for event in events], [
+            (None, event_log.TEST_MARKER, {
+                "marker": "set_up",
+                "name": "Test.test_one"
+            }),
+            ("Node1", event_log.STATE_CHANGE, {
+                "state": "associated"
+            }),
+        ])
+        self.assertLessEqual(events[0].ts, events[1].ts)
+
+    def test_events_on_disk_before_close(self):
+        """Test each event is on disk as soon as it is recorded, so a killed run keeps its events.
+        """
+        event_log.open_event_log(self.path)
+        event_log.record(event_log.WPANTUND_CRASH, "Node1")
+
+        events = list(event_log.read_events(self.path))
+        self.assertEqual([(event.node, event.type) for event in events], [("Node1", event_log.WPANTUND_CRASH)])
+
+    def test_record_without_log(self):
+        """Test recording with no event log open does nothing.
+        """
+        event_log.record(event_log.COMMAND, "Node1", command="ifconfig")
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_listeners(self):
+        """Test listeners get each recorded event, with or without an event log open.
+        """
+        events = []
+        event_log.add_listener(events.append)
+        try:
+            event_log.record(event_log.STATE_CHANGE, "Node1", state="associated")
+        finally:
+            event_log.remove_listener(events.append)
+        event_log.record(event_log.STATE_CHANGE, "Node1", state="offline")
+
+        self.assertEqual([(event.node, event.type) for event in events], [("Node1", event_log.STATE_CHANGE)])
+        self.assertEqual(events[0].fields, {"state": "associated"})
+
+    def test_filters_and_truncated_line(self):
+        """Test events are filtered by type and node and a truncated last line is skipped.
+        """
+        event_log.open_event_log(self.path)
+        event_log.record(event_log.STATE_CHANGE, "Node1", state="offline")
+        event_log.record(event_log.STATE_CHANGE, "Node2", state="offline")
+        event_log.record(event_log.OTNS_STATUS, "Node1", key="role", value="3")
+        event_log.close_event_log()
+        with open(self.path, "a") as event_file:
+            event_file.write("{\"ts\": 1, \"node\"")
+
+        node1 = list(event_log.read_events(self.path, node="Node1"))
+        self.assertEqual([event.type for event in node1], [event_log.STATE_CHANGE, event_log.OTNS_STATUS])
+
+        states = list(event_log.read_events(self.path, event_types=[event_log.STATE_CHANGE]))
+        self.assertEqual([event.node for event in states], ["Node1", "Node2"])
+
+    def test_wpantund_monitor_events(self):
+        """Test WpantundMonitor records state changes and OTNS status of its node.
+        """
+        event_log.open_event_log(self.path)
+        publisher = signal.Publisher()
+        monitor = WpantundMonitor(publisher=publisher)
+        monitor.node_name = "Node1"
+
+        publisher.emit(line="wpantund[1]: State change: \"offline\" -> \"associating\"")
+        publisher.emit(line="wpantund[1]: NCP => [OTNS] role=3")
+        event_log.close_event_log()
+
+        events = [(event.node, event.type, event.fields) for event in event_log.read_events(self.path)]
+        self.assertEqual(events, [
+            ("Node1", event_log.STATE_CHANGE, {
+                "state": "associating"
+            }),
+            ("Node1", event_log.OTNS_STATUS, {
+                "key": "role",
+                "value": "3"
+            }),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import subprocess
+import sys
+import unittest
+
+from silk.benchmarks import import_time
+from silk.unit_tests.testcase import SilkTestCase
+
+
+class ImportTimeTest(SilkTestCase):
+    """Silk unit tests for start-up imports.
+    """
+
+    def test_lazy_modules_not_imported(self):
+        """Test importing silk_run and a test module does not load OTNS, gRPC, pandas or Django.
+        """
+        script = ("import sys\n"
+                  "import silk.tests.silk_run\n"
+                  "import silk.tests.openthread.ot_test_form_network\n"
+                  "print(','.join(sorted(m for m in sys.modules if m.split('.')[0] in {0!r} or m in {0!r})))\n")
+        script = script.format(import_time.LAZY_MODULES)
+        output = subprocess.check_output([sys.executable, "-c", script], universal_newlines=True)
+        self.assertEqual(output.strip(), "")
+
+    @unittest.skipUnless(import_time.IMPORTTIME_SUPPORTED, "-X importtime needs Python 3.7 or later")
+    def test_measure(self):
+        """Test the benchmark reports the cumulative import time of the module and its imports.
+        """
+        imports = import_time.measure("silk.tools.topology_snapshot")
+        times = {name: (cumulative, self_us) for cumulative, self_us, name in imports}
+        self.assertIn("silk.tools.wpan_table_parser", times)
+        cumulative, self_us = times["silk.tools.topology_snapshot"]
+        self.assertGreaterEqual(cumulative, self_us)
+        self.assertGreater(cumulative, times["silk.tools.wpan_table_parser"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
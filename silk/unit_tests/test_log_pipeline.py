@@ -0,0 +1,88 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import queue
+import tempfile
+import unittest
+
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import log_pipeline
+
+
+class LogPipelineTest(SilkTestCase):
+    """Silk unit tests for the asynchronous logging pipeline.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.logger = logging.getLogger("silk").getChild("LogPipelineTest")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.directory.name, name)) as log_file:
+            return log_file.read()
+
+    def test_merged_and_sharded_output(self):
+        """Test records reach the merged file and the shard of their node.
+        """
+        formatter = logging.Formatter("%(name)s %(message)s")
+        merged = logging.FileHandler(os.path.join(self.directory.name, "silk.log"))
+        merged.setFormatter(formatter)
+        shards = log_pipeline.NodeShardHandler(self.directory.name, formatter=formatter)
+        pipeline = log_pipeline.LogPipeline([merged, shards])
+        pipeline.start()
+        self.logger.addHandler(pipeline.queue_handler)
+
+        self.logger.getChild("Node1").info("one")
+        self.logger.getChild("Node2").getChild("wpantund").debug("two")
+        self.logger.info("three")
+
+        pipeline.stop()
+        self.logger.removeHandler(pipeline.queue_handler)
+
+        expected = [
+            "silk.LogPipelineTest.Node1 one",
+            "silk.LogPipelineTest.Node2.wpantund two",
+            "silk.LogPipelineTest three",
+        ]
+        self.assertEqual(self.read("silk.log").splitlines(), expected)
+        self.assertEqual(self.read("silk.LogPipelineTest.log").count("\n"), 3)
+
+    def test_drop_policy(self):
+        """Test a full queue drops records and counts them.
+        """
+        handler = log_pipeline.BoundedQueueHandler(queue.Queue(2), log_pipeline.POLICY_DROP)
+        self.logger.addHandler(handler)
+        for index in range(5):
+            self.logger.info("record %s", index)
+        self.logger.removeHandler(handler)
+
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_unknown_policy(self):
+        """Test an unknown queue policy is rejected.
+        """
+        with self.assertRaises(ValueError):
+            log_pipeline.BoundedQueueHandler(queue.Queue(), "spill")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,10 +13,12 @@
 # limitations under the License.
 
 from pathlib import Path
+import tempfile
 import unittest
 from typing import Dict
 
 from silk.tests.silk_replay import SilkReplayer
+from silk.tools import wpantund_log
 from silk.tools.otns_manager import RoleType, OtnsNode
 from silk.unit_tests.testcase import SilkMockingTestCase
 
@@ -130,6 +132,36 @@ class OTNSLogReplayTest(SilkMockingTestCase):
         self.wait_for_expect(expect_thread)
         self.assertFalse(self.manager.otns_node_map)
 
+    def testReplayWithoutWpantundLineLogging(self):
+        """Test replaying a log written with wpantund line logging off.
+
+        Such a log only has the wpantund lines the classifier picks out, which must include every line the replayer
+        needs to add and remove nodes.
+        """
+        fixture_path = Path(__file__).parent / "fixture/form_network_log.txt"
+
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = Path(directory) / "form_network_lean_log.txt"
+            dropped = 0
+            with open(fixture_path) as fixture, open(log_path, "w") as log_file:
+                for line in fixture:
+                    if ".wpantund] [DEBUG] " in line and wpantund_log.classify(line) is None:
+                        dropped += 1
+                        continue
+                    log_file.write(line)
+            self.assertGreater(dropped, 0)
+
+            replayer = SilkReplayer(argv=self.args + ["-r", directory, str(log_path)], run_now=False)
+            replayer.otns_manager = self.manager
+
+            line_number = replayer.run(stop_regex=r"SET UP TestFormNetwork.test01_Pairing")
+            self.verify_nodes_added(7)
+
+            expect_thread = self.expect_grpc_commands([f"del {i}" for i in range(2, 9)])
+            replayer.run(start_line=line_number)
+            self.wait_for_expect(expect_thread)
+            self.assertFalse(self.manager.otns_node_map)
+
     def testReplayRouterTable(self):
         """Test replaying the router table test case log.
 
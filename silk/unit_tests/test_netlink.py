@@ -0,0 +1,68 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ipaddress
+import socket
+import struct
+import unittest
+
+from silk.device import netlink
+from silk.unit_tests.testcase import SilkTestCase
+
+
+class NetlinkEncodingTest(SilkTestCase):
+    """Silk unit tests for the rtnetlink message encoding.
+    """
+
+    def test_pack_attr_alignment(self):
+        """Test attributes are padded to four bytes and keep the unpadded length.
+        """
+        attr = netlink.pack_attr(netlink.IFLA_IFNAME, b"wpan0\0")
+        self.assertEqual(len(attr) % 4, 0)
+        length, attr_type = struct.unpack_from("=HH", attr)
+        self.assertEqual(length, 4 + 6)
+        self.assertEqual(attr_type, netlink.IFLA_IFNAME)
+
+    def test_message_round_trip(self):
+        """Test several packed messages in one datagram are split back apart.
+        """
+        bodies = [b"\x01\x02\x03", b"", b"\x04" * 9]
+        datagram = b"".join(
+            netlink.pack_message(netlink.RTM_NEWADDR, netlink.NLM_F_REQUEST, seq, netlink.pack_attr(1, body))
+            for seq, body in enumerate(bodies, 1))
+
+        messages = list(netlink.unpack_messages(datagram))
+        self.assertEqual([seq for _, seq, _ in messages], [1, 2, 3])
+        for (msg_type, _, body), expected in zip(messages, bodies):
+            self.assertEqual(msg_type, netlink.RTM_NEWADDR)
+            self.assertEqual(body[4:4 + len(expected)], expected)
+
+    def test_address_body(self):
+        """Test an RTM_NEWADDR body carries family, prefix length, index and address.
+        """
+        body = netlink.address_body(7, "fd00::1", 64)
+        family, prefix_len, _, _, index = struct.unpack_from("=BBBBI", body)
+        self.assertEqual((family, prefix_len, index), (socket.AF_INET6, 64, 7))
+        self.assertIn(ipaddress.IPv6Address("fd00::1").packed, body)
+
+    def test_default_route_body(self):
+        """Test a default route omits the destination attribute.
+        """
+        body = netlink.route_body(3, "::", 0)
+        self.assertEqual(struct.unpack_from("=B", body, 1)[0], 0)
+        self.assertEqual(len(body), 12 + 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from silk.node.node_state import NodeState
+from silk.node.wpan_node import WpanNode
+from silk.tools import watchable
+from silk.unit_tests.testcase import SilkTestCase
+
+
+class NodeStateTest(SilkTestCase):
+    """Silk unit tests for the typed node state.
+    """
+
+    def test_typed_fields(self):
+        """Test typed fields are converted once on write and keep the raw value.
+        """
+        state = NodeState()
+        state.set("panid", " 0xface\n")
+        state.set("channel", "15")
+        state.set("ping6_round_trip_time", "bad")
+
+        self.assertEqual(state.panid, "0xface")
+        self.assertEqual(state.get_typed("panid"), 0xface)
+        self.assertEqual(state.get_typed("channel"), 15)
+        self.assertEqual(state.get_typed("ping6_round_trip_time", 0), 0)
+        self.assertTrue(state.has_type("panid", "hex-int"))
+        self.assertFalse(state.has_type("panid", int))
+
+        state.set("fabric-id", "abc")
+        self.assertEqual(state.extras, {"fabric-id": "abc"})
+        self.assertEqual(state.get("fabric-id"), "abc")
+
+        state.clear()
+        self.assertIsNone(state.get("panid"))
+        self.assertEqual(state.get("fabric-id", "none"), "none")
+
+    def test_listeners_and_watchables(self):
+        """Test listeners see each change and a watchable field is set rather than replaced.
+        """
+        state = NodeState()
+        changes = []
+        state.add_listener(lambda *change: changes.append(change))
+
+        state.set("role", "leader")
+        state.set("role", "leader")
+        state.set("role", "router")
+        self.assertEqual(changes, [("role", None, "leader"), ("role", "leader", "router")])
+
+        network_state = watchable.WatchableWithHistory(name="state")
+        state.set("wpan_network_state", network_state)
+        state.set("wpan_network_state", "associated")
+        self.assertIs(state.get("wpan_network_state"), network_state)
+        self.assertEqual(network_state.get(), "associated")
+
+    def test_node_getters(self):
+        """Test node data getters read the typed state and get_data keeps its conversions.
+        """
+        node = WpanNode("node")
+        node.store_data("0x1234", node.panid_label)
+        node.store_data("26", node.channel_label)
+        node.store_data("aa:bb:cc", node.wpan_mac_addr_label)
+
+        self.assertEqual(node.panid, 0x1234)
+        self.assertEqual(node.channel, 26)
+        self.assertEqual(node.wpan_mac_addr, "aabbcc")
+        self.assertEqual(node.get_data(node.panid_label), "0x1234")
+        self.assertEqual(node.get_data(node.channel_label, str), "26")
+        self.assertEqual(node.ping6_sent, 0)
+
+        node.store_data(None, node.panid_label)
+        self.assertEqual(node.panid, -1)
+
+    def test_node_without_logger(self):
+        """Test a node without a logger yet can still log and store data.
+        """
+        node = WpanNode("node")
+        node.logger = None
+        node.log_debug("debug %s", "line")
+        node.log_info("info %s", "line")
+        node.store_data("26", node.channel_label)
+        self.assertEqual(node.channel, 26)
+
+
+if __name__ == "__main__":
+    unittest.main()
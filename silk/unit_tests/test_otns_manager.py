@@ -185,6 +185,20 @@ class OTNSUnitTest(SilkMockingTestCase):
             self.wait_for_expect(expect_thread)
             self.assertEqual(self.manager.otns_node_map[device].extaddr, extaddr)
 
+    def testUpdateExtaddrNotHex(self):
+        """Test a 16 character extaddr that is not hex is passed on as a plain status.
+        """
+        device = MockThreadDevBoard(random.randint(1, 10))
+
+        self.manager.add_node(device)
+        self.manager.subscribe_to_node(device)
+        extaddr = self.manager.otns_node_map[device].extaddr
+
+        expect_thread = self.expect_udp_messages([("extaddr=rsdnrsdnrsdnrsdn", device.id)])
+        device.wpantund_process.emit_status("extaddr=rsdnrsdnrsdnrsdn")
+        self.wait_for_expect(expect_thread)
+        self.assertEqual(self.manager.otns_node_map[device].extaddr, extaddr)
+
     def testUpdateMode(self):
         """Test updating node mode, one of the properties OTNS manager does not track.
         """
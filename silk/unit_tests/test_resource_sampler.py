@@ -0,0 +1,69 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import resource_sampler
+
+
+class ResourceSamplerTest(SilkTestCase):
+    """Silk unit tests for the /proc resource sampler.
+    """
+
+    def test_read_proc(self):
+        """Test CPU ticks and RSS of the running process are read from /proc.
+        """
+        self.assertGreaterEqual(resource_sampler.read_cpu_ticks(os.getpid()), 0)
+        self.assertGreater(resource_sampler.read_rss(os.getpid()), 0)
+
+    def test_sampling(self):
+        """Test a busy process is sampled and a process that exits stops being sampled.
+        """
+        busy_loop = "import time\nend = time.time() + 0.6\nwhile time.time() < end: pass"
+        busy = subprocess.Popen([sys.executable, "-c", busy_loop])
+        sampler = resource_sampler.ResourceSampler(interval=0.1)
+        sampler.add("silk", os.getpid())
+        sampler.add("busy", busy.pid)
+
+        sampler.start()
+        busy.wait()
+        time.sleep(0.3)
+        summary = sampler.stop()
+
+        self.assertEqual(set(summary), {"silk", "busy"})
+        self.assertGreater(summary["busy"]["cpu_peak"], 10)
+        self.assertGreaterEqual(summary["busy"]["cpu_peak"], summary["busy"]["cpu_mean"])
+        self.assertGreater(summary["silk"]["rss_peak_kb"], 0)
+        self.assertFalse(sampler.processes["busy"].alive)
+        self.assertGreater(summary["silk"]["samples"], summary["busy"]["samples"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "resources.json")
+            sampler.save(path)
+            with open(path) as samples_file:
+                samples = json.load(samples_file)
+
+        self.assertEqual(len(samples["silk"]["cpu"]), summary["silk"]["samples"])
+        self.assertEqual(len(samples["silk"]["rss_kb"]), summary["silk"]["samples"])
+
+
+if __name__ == "__main__":
+    unittest.main()
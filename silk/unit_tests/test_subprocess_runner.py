@@ -0,0 +1,82 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import signal
+from silk.utils.subprocess_runner import SubprocessRunner
+
+
+class LineCollector(signal.Subscriber):
+    """Collects the lines published by a SubprocessRunner.
+    """
+
+    def __init__(self, publisher, expected):
+        self.lines = []
+        self.expected = expected
+        self.done = threading.Event()
+        super().__init__(publisher=publisher)
+
+    def subscribe_handle(self, sender, **kwargs):
+        self.lines.append(kwargs["line"])
+        if len(self.lines) == self.expected:
+            self.done.set()
+
+
+class SubprocessRunnerTest(SilkTestCase):
+    """Silk unit tests for the shared subprocess output reactor.
+    """
+
+    def test_lines_from_partial_reads(self):
+        """Test output split across reads is published as whole lines.
+        """
+        runner = SubprocessRunner("printf 'ab'; sleep 0.2; printf 'c\\n\\nd\\n'; sleep 0.2; printf 'tail'")
+        collector = LineCollector(runner, 3)
+        runner.start()
+
+        self.assertTrue(collector.done.wait(5))
+        self.assertEqual(collector.lines, ["abc", "d", "tail"])
+        runner.stop()
+
+    def test_many_runners_share_one_thread(self):
+        """Test runners do not add threads and stop without waiting for a poll timeout.
+        """
+        # Start the reactor before counting threads.
+        warm_up = SubprocessRunner("true")
+        warm_up.start()
+        warm_up.stop()
+
+        thread_count = threading.active_count()
+        runners = [SubprocessRunner("echo runner{}; exec sleep 30".format(index)) for index in range(8)]
+        collectors = [LineCollector(runner, 1) for runner in runners]
+        for runner in runners:
+            runner.start()
+
+        for index, collector in enumerate(collectors):
+            self.assertTrue(collector.done.wait(5))
+            self.assertEqual(collector.lines, ["runner{}".format(index)])
+        self.assertEqual(threading.active_count(), thread_count)
+
+        start_time = time.time()
+        for runner in runners:
+            runner.stop(1)
+        self.assertLess(time.time() - start_time, 2)
+        self.assertTrue(all(runner.proc.poll() is not None for runner in runners))
+
+
+if __name__ == "__main__":
+    unittest.main()
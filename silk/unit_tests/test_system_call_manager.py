@@ -0,0 +1,117 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+import unittest
+
+from silk.device.system_call_manager import TemporarySystemCallManager
+from silk.node import base_node
+from silk.unit_tests.testcase import SilkTestCase
+
+
+class SystemCallManagerTest(SilkTestCase):
+    """Silk unit tests for the system call worker queue.
+    """
+
+    def test_failed_command_returns_early(self):
+        """Test a command exiting with an error does not wait out its timeout.
+        """
+        manager = TemporarySystemCallManager()
+        start_time = time.time()
+        manager.make_system_call_async("fail", "echo failed; exit 1", "succeeded", 30)
+        error = manager.wait_for_completion()
+        self.assertIsNotNone(error)
+        self.assertLess(time.time() - start_time, 10)
+
+    def test_abort_pending(self):
+        """Test abort_pending kills the running command, drops queued ones and wakes the waiter.
+        """
+        manager = TemporarySystemCallManager()
+        manager.make_system_call_async("sleep", "sleep 30", "", 60)
+        manager.make_system_call_async("echo", "echo queued", "queued", 10, "queued")
+
+        abort_timer = threading.Timer(1, manager.abort_pending, args=("daemon crashed",))
+        abort_timer.start()
+
+        start_time = time.time()
+        error = manager.wait_for_completion()
+        abort_timer.join()
+
+        self.assertEqual(error, "daemon crashed")
+        self.assertLess(time.time() - start_time, 10)
+        self.assertIsNone(manager.get_data("queued"))
+        self.assertEqual(manager.abort_generation, 1)
+
+        # The worker keeps serving new commands after an abort.
+        manager.make_system_call_async("echo", "echo resumed", "resumed", 10, "resumed")
+        self.assertIsNone(manager.wait_for_completion())
+        self.assertEqual(manager.get_data("resumed"), "resumed")
+
+    def test_diagnostic_skipped_in_lean_mode(self):
+        """Test diagnostic commands only run outside lean mode.
+        """
+        manager = TemporarySystemCallManager()
+        base_node.set_lean_mode(True)
+        try:
+            manager.make_system_call_async("echo", "echo lean", "lean", 10, "lean", diagnostic=True)
+            self.assertIsNone(manager.wait_for_completion())
+            self.assertIsNone(manager.get_data("lean"))
+        finally:
+            base_node.set_lean_mode(False)
+
+        manager.make_system_call_async("echo", "echo full", "full", 10, "full", diagnostic=True)
+        self.assertIsNone(manager.wait_for_completion())
+        self.assertEqual(manager.get_data("full"), "full")
+
+    def test_stop_worker(self):
+        """Test stop_worker kills the running command and ends the worker thread.
+        """
+        threads_before = set(threading.enumerate())
+        manager = TemporarySystemCallManager()
+        manager.make_system_call_async("sleep", "sleep 30", "", 60)
+        time.sleep(0.5)
+
+        start_time = time.time()
+        manager.stop_worker()
+        self.assertLess(time.time() - start_time, 5)
+        self.assertEqual(set(threading.enumerate()) - threads_before, set())
+
+    def test_disabled_debug_is_not_formatted(self):
+        """Test log_debug arguments are only formatted when debug events are enabled.
+        """
+
+        class Unprintable(object):
+
+            def __str__(self):
+                raise AssertionError("formatted while debug output is disabled")
+
+        manager = TemporarySystemCallManager()
+        manager.logger = logging.getLogger("silk").getChild("SystemCallManagerTest")
+        manager.logger.setLevel(logging.INFO)
+        self.assertFalse(manager.is_debug_enabled())
+        manager.log_debug("value %s", Unprintable())
+
+        manager.logger.setLevel(logging.DEBUG)
+        self.assertTrue(manager.is_debug_enabled())
+        with self.assertLogs(manager.logger, logging.DEBUG) as logs:
+            manager.log_debug("value %s", 100)
+            manager.log_debug("100%")
+        self.assertEqual(logs.records[0].getMessage(), "DBG: TemporarySystemCallManager: value 100")
+        self.assertEqual(logs.records[1].getMessage(), "DBG: TemporarySystemCallManager: 100%")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from silk.config import wpan_constants as wpan
+from silk.node.wpan_node import WpanCredentials
+from silk.tools import topology
+from silk.unit_tests.testcase import SilkTestCase
+
+
+class FakeNode(object):
+    """Records the wpanctl level calls made by the topology builder.
+    """
+
+    def __init__(self, name, extaddr):
+        self.name = name
+        self.extaddr = extaddr
+        self.calls = []
+        self.allowlist = []
+        self.lock = threading.Lock()
+        self.xpanid = "0x1122334455667788"
+        self.panid = 0x1234
+        self.error = None
+
+    def get(self, prop_name):
+        with self.lock:
+            self.calls.append(("get", prop_name))
+        return "[{}]".format(self.extaddr)
+
+    def add(self, prop_name, value):
+        self.allowlist.append(value)
+
+    def set(self, prop_name, value):
+        self.calls.append(("set", prop_name, value))
+
+    def form(self, network, role):
+        self.calls.append(("form", role))
+
+    def join(self, network, role):
+        self.calls.append(("join", role, network.panid))
+
+    def permit_join(self, period):
+        self.calls.append(("permit-join", period))
+
+    def wait_for_completion(self):
+        return self.error
+
+
+class TopologyTest(SilkTestCase):
+    """Silk unit tests for the topology builder.
+    """
+
+    def setUp(self):
+        self.nodes = [FakeNode("node{}".format(index), "{:016x}".format(index)) for index in range(7)]
+
+    def test_edge_helpers(self):
+        """Test the chain, star, tree and mesh edge lists.
+        """
+        a, b, c, d = self.nodes[:4]
+        self.assertEqual(topology.chain([a, b, c]), [(a, b), (b, c)])
+        self.assertEqual(topology.star(a, [b, c]), [(a, b), (a, c)])
+        self.assertEqual(topology.tree([a, b, c, d]), [(a, b), (a, c), (b, d)])
+        self.assertEqual(len(topology.mesh([a, b, c, d])), 6)
+
+    def test_join_levels(self):
+        """Test nodes are grouped by hop distance from the leader.
+        """
+        tree = topology.Topology(topology.tree(self.nodes))
+        self.assertEqual(tree.levels, [self.nodes[0:1], self.nodes[1:3], self.nodes[3:7]])
+
+    def test_unreachable_node(self):
+        """Test a node that cannot reach the leader is rejected.
+        """
+        a, b, c, d = self.nodes[:4]
+        with self.assertRaises(ValueError):
+            topology.Topology([(a, b), (c, d)])
+
+    def test_build(self):
+        """Test extaddrs are read once, allowlists cover every edge and joins follow the levels.
+        """
+        leader = self.nodes[0]
+        edges = topology.star(leader, self.nodes[1:3]) + [(self.nodes[1], self.nodes[3])]
+        network = WpanCredentials(network_name="SILK", psk="00" * 16, channel=11, fabric_id="0")
+        tree = topology.Topology(edges, roles={self.nodes[3]: "sleepy-end-device"})
+
+        timings = tree.build(network, permit_join_period=60)
+
+        self.assertEqual(list(timings), ["extaddr", "allowlist", "form", "join-1", "join-2"])
+        for node in self.nodes[:4]:
+            self.assertEqual(node.calls.count(("get", wpan.WPAN_EXT_ADDRESS)), 1)
+            self.assertIn(("set", wpan.WPAN_MAC_ALLOWLIST_ENABLED, "1"), node.calls)
+        self.assertEqual(sorted(leader.allowlist), [self.nodes[1].extaddr, self.nodes[2].extaddr])
+        self.assertEqual(leader.calls[-2:], [("form", "router"), ("permit-join", 60)])
+        self.assertEqual(self.nodes[3].calls[-1], ("join", "sleepy-end-device", leader.panid))
+        self.assertEqual(network.xpanid, leader.xpanid)
+
+    def test_build_join_failure(self):
+        """Test a failed join is reported with the node name.
+        """
+        self.nodes[2].error = "Join timed out"
+        tree = topology.Topology(topology.chain(self.nodes[:3]))
+        network = WpanCredentials(network_name="SILK", psk="00" * 16, channel=11, fabric_id="0")
+
+        with self.assertRaisesRegex(topology.TopologyError, "node2: Join timed out"):
+            tree.build(network)
+
+
+if __name__ == "__main__":
+    unittest.main()
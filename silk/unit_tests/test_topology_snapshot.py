@@ -0,0 +1,221 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from silk.config import wpan_constants as wpan
+from silk.tools import topology_snapshot
+from silk.tools import wpan_util
+from silk.tools.topology_snapshot import TopologySnapshot
+from silk.unit_tests.mock_node import MockWpanNode
+from silk.unit_tests.testcase import SilkTestCase
+
+# Seconds each query of a mock node takes
+QUERY_DELAY = 0.02
+
+LEADER = "1111111111111111"
+ROUTER = "2222222222222222"
+CHILD = "3333333333333333"
+
+ROUTER_ROW = "\t\"{}, RLOC16:{}, RouterId:{}, NextHop:{}, PathCost:{}, LQIn:3, LQOut:3, Age:1, LinkEst:{}\""
+CHILD_ROW = "\t\"{}, RLOC16:{}, NetDataVer:87, LQIn:3, AveRssi:-18, LastRssi:-18, Timeout:240, Age:0, RxOnIdle:no, " \
+            "FTD:no, SecDataReq:yes, FullNetData:yes\""
+
+
+def table(*rows):
+    return "\n".join(("[",) + rows + ("]",))
+
+
+def make_mesh():
+    leader = {
+        wpan.WPAN_EXT_ADDRESS:
+            "[%s]" % LEADER,
+        wpan.WPAN_STATE:
+            wpan.STATE_ASSOCIATED,
+        wpan.WPAN_NODE_TYPE:
+            wpan.NODE_TYPE_LEADER,
+        wpan.WPAN_THREAD_RLOC16:
+            "0x2400",
+        wpan.WPAN_PARTITION_ID:
+            "0x12345678",
+        wpan.WPAN_THREAD_ROUTER_TABLE:
+            table(ROUTER_ROW.format(LEADER, "2400", 9, 63, 0, "no"),
+                  ROUTER_ROW.format(ROUTER, "2c00", 11, 11, 1, "yes")),
+        wpan.WPAN_THREAD_CHILD_TABLE:
+            table(CHILD_ROW.format(CHILD, "2401")),
+    }
+    router = {
+        wpan.WPAN_EXT_ADDRESS:
+            "[%s]" % ROUTER,
+        wpan.WPAN_STATE:
+            wpan.STATE_ASSOCIATED,
+        wpan.WPAN_NODE_TYPE:
+            wpan.NODE_TYPE_ROUTER,
+        wpan.WPAN_THREAD_RLOC16:
+            "0x2c00",
+        wpan.WPAN_PARTITION_ID:
+            "0x12345678",
+        wpan.WPAN_THREAD_ROUTER_TABLE:
+            table(ROUTER_ROW.format(LEADER, "2400", 9, 9, 1, "yes"),
+                  ROUTER_ROW.format(ROUTER, "2c00", 11, 63, 0, "no")),
+    }
+    child = {
+        wpan.WPAN_EXT_ADDRESS: "[%s]" % CHILD,
+        wpan.WPAN_STATE: wpan.STATE_ASSOCIATED,
+        wpan.WPAN_NODE_TYPE: wpan.NODE_TYPE_SLEEPY_END_DEVICE,
+        wpan.WPAN_THREAD_RLOC16: "0x2401",
+        wpan.WPAN_PARTITION_ID: "0x12345678",
+    }
+    return [
+        MockWpanNode(name, properties, delay=QUERY_DELAY)
+        for name, properties in [("leader", leader), ("router", router), ("child", child)]
+    ]
+
+
+class TopologySnapshotTest(SilkTestCase):
+    """Silk unit tests for network-wide topology snapshots.
+    """
+
+    def test_collect(self):
+        """Test a snapshot queries the nodes concurrently and joins their tables into parent and router links.
+        """
+        nodes = make_mesh()
+        snapshot = TopologySnapshot.collect(nodes)
+
+        # 20 queries one after another would take 0.4 seconds.
+        self.assertLess(snapshot.duration, 0.3)
+        self.assertEqual(snapshot.nodes["child"].rloc16, 0x2401)
+        self.assertEqual(snapshot.parents, {"child": "leader"})
+        self.assertEqual(snapshot.children("leader"), ["child"])
+        self.assertEqual(snapshot.neighbors("leader"), ["router"])
+        self.assertEqual(snapshot.router_links[("router", "leader")].path_cost, 1)
+        self.assertTrue(snapshot.is_converged(), snapshot.convergence_problems())
+
+    def test_diff_and_convergence(self):
+        """Test diffs report changed nodes, parents and links, and convergence problems are listed.
+        """
+        nodes = make_mesh()
+        before = TopologySnapshot.collect(nodes)
+        self.assertFalse(TopologySnapshot.collect(nodes).diff(before))
+
+        leader, router, child = nodes
+        router.properties[wpan.WPAN_NODE_TYPE] = wpan.NODE_TYPE_LEADER
+        router.properties[wpan.WPAN_PARTITION_ID] = "0x0badcafe"
+        router.properties[wpan.WPAN_THREAD_ROUTER_TABLE] = table()
+        router.properties[wpan.WPAN_THREAD_CHILD_TABLE] = table(CHILD_ROW.format(CHILD, "2c01"))
+        after = TopologySnapshot.collect(nodes)
+
+        diff = after.diff(before)
+        self.assertEqual(diff.changed["router"], {
+            "role": (wpan.NODE_TYPE_ROUTER, wpan.NODE_TYPE_LEADER),
+            "partition_id": ("0x12345678", "0x0badcafe"),
+        })
+        self.assertEqual(diff.links_removed, {("router", "leader")})
+        self.assertFalse(diff.added or diff.removed)
+
+        problems = after.convergence_problems()
+        self.assertFalse(after.is_converged())
+        self.assertIn("2 leaders: leader, router", problems)
+        self.assertIn("child is in 2 child tables", problems)
+        self.assertIn("link leader -> router is not established back", problems)
+        self.assertTrue(any(problem.startswith("2 partitions") for problem in problems))
+
+    def test_fingerprint(self):
+        """Test fingerprints match the snapshot and ignore link qualities and ages but not routes.
+        """
+        nodes = make_mesh()
+        leader, router, child = nodes
+        before = topology_snapshot.fingerprint(nodes)
+        self.assertEqual(before, TopologySnapshot.collect(nodes).fingerprint())
+        self.assertIsNone(before[2][2])
+
+        router.properties[wpan.WPAN_THREAD_ROUTER_TABLE] = router.properties[wpan.WPAN_THREAD_ROUTER_TABLE].replace(
+            "Age:1", "Age:7")
+        self.assertEqual(topology_snapshot.fingerprint(nodes), before)
+
+        router.properties[wpan.WPAN_THREAD_ROUTER_TABLE] = table(ROUTER_ROW.format(ROUTER, "2c00", 11, 63, 0, "no"))
+        self.assertNotEqual(topology_snapshot.fingerprint(nodes), before)
+
+    def test_wait_for_convergence(self):
+        """Test the wait ends after identical rounds and measures the settling time from the last change.
+        """
+        nodes = make_mesh()
+        result = topology_snapshot.wait_for_convergence(nodes, 5, stable_rounds=3, interval=0.1)
+        self.assertEqual(result.rounds, 3)
+        self.assertLess(result.settling_time, 0.05)
+        # Three rounds 0.1 seconds apart, then the snapshot validating the mesh.
+        self.assertGreaterEqual(result.elapsed, 0.2)
+        self.assertLess(result.elapsed, 0.6)
+
+        leader, router, child = nodes
+        router.properties[wpan.WPAN_NODE_TYPE] = wpan.NODE_TYPE_END_DEVICE
+
+        def become_router():
+            router.properties[wpan.WPAN_NODE_TYPE] = wpan.NODE_TYPE_ROUTER
+
+        # The rounds at 0, 0.1 and 0.2 seconds see an end device, the one at 0.3 seconds the router again.
+        timer = threading.Timer(0.25, become_router)
+        timer.start()
+        result = topology_snapshot.wait_for_convergence(nodes, 5, stable_rounds=4, interval=0.1)
+        timer.join()
+
+        self.assertAlmostEqual(result.settling_time, 0.3, delta=0.05)
+        self.assertEqual(result.rounds, 7)
+        self.assertEqual(result.fingerprint, TopologySnapshot.collect(nodes).fingerprint())
+
+    def test_wait_for_convergence_validates(self):
+        """Test a stable network only converges once the snapshot finds no problem, unless validate is overridden.
+        """
+        nodes = make_mesh()
+        leader, router, child = nodes
+        router.properties[wpan.WPAN_NODE_TYPE] = wpan.NODE_TYPE_LEADER
+        router.properties[wpan.WPAN_PARTITION_ID] = "0x0badcafe"
+
+        with self.assertRaises(wpan_util.VerifyError) as context:
+            topology_snapshot.wait_for_convergence(nodes, 0.3, stable_rounds=2, interval=0.05)
+        self.assertIn("stable but did not converge", str(context.exception))
+        self.assertIn("2 leaders: leader, router", str(context.exception))
+
+        for node in nodes:
+            node.properties[wpan.WPAN_STATE] = wpan.STATE_OFFLINE
+        with self.assertRaises(wpan_util.VerifyError) as context:
+            topology_snapshot.wait_for_convergence(nodes, 0.3, stable_rounds=2, interval=0.05)
+        self.assertIn("leader is {}".format(wpan.STATE_OFFLINE), str(context.exception))
+
+        result = topology_snapshot.wait_for_convergence(nodes, 5, stable_rounds=2, interval=0.1, validate=lambda _: [])
+        self.assertEqual(result.rounds, 2)
+
+    def test_wait_for_convergence_deadline(self):
+        """Test the wait raises once the deadline passes while the network keeps changing.
+        """
+        nodes = make_mesh()
+        partition_ids = iter(range(1000))
+
+        def get(prop_name):
+            if prop_name == wpan.WPAN_PARTITION_ID:
+                return hex(next(partition_ids))
+            return nodes[0].properties.get(prop_name, "[\n]")
+
+        nodes[0].get = get
+        start_time = time.monotonic()
+        with self.assertRaises(wpan_util.VerifyError) as context:
+            topology_snapshot.wait_for_convergence(nodes, 0.3, stable_rounds=2, interval=0.05)
+        self.assertLess(time.monotonic() - start_time, 0.6)
+        self.assertIn("1 of 2 identical rounds", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -102,6 +102,54 @@ class SilkUnitTest(SilkTestCase):
         publisher.emit(line=string)
         self.assertTrue(subscriber.received)
 
+    def test_signal_batch(self):
+        """Test batch delivery to batch and per-item handlers.
+        """
+        batches = []
+        lines = []
+
+        class BatchSubscriber(signal.Subscriber):
+
+            def subscribe_batch_handle(self, sender, batch):
+                batches.append([kwargs["line"] for kwargs in batch])
+
+        class LineSubscriber(signal.Subscriber):
+
+            def subscribe_handle(self, sender, **kwargs):
+                lines.append(kwargs["line"])
+
+        publisher = signal.Publisher()
+        batch_subscriber = BatchSubscriber(publisher=publisher)
+        line_subscriber = LineSubscriber(publisher=publisher)
+        publisher.emit_batch([{"line": "a"}, {"line": "b"}])
+
+        self.assertEqual(batches, [["a", "b"]])
+        self.assertEqual(lines, ["a", "b"])
+
+        line_subscriber.unsubscribe()
+        publisher.emit(line="c")
+        self.assertEqual(lines, ["a", "b"])
+        self.assertIsNotNone(batch_subscriber)
+
+    def test_signal_weak_subscriber(self):
+        """Test a subscriber that is garbage collected stops receiving signals.
+        """
+        received = []
+
+        def handle(sender, **kwargs):
+            received.append(kwargs["line"])
+
+        publisher = signal.Publisher()
+        publisher.subscribe(handle)
+        publisher.subscribe(handle)
+        publisher.emit(line="first")
+        self.assertEqual(received, ["first"])
+
+        del handle
+        publisher.emit(line="second")
+        self.assertEqual(received, ["first"])
+        self.assertEqual(len(publisher._subscribers), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
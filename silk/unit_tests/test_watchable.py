@@ -0,0 +1,199 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import threading
+import time
+import unittest
+from unittest import mock
+
+from silk.benchmarks import watchable_wait
+from silk.tools import watchable
+from silk.unit_tests.testcase import SilkTestCase
+
+
+def set_later(target, value, delay=0.1):
+    timer = threading.Timer(delay, target.set, args=(value,))
+    timer.start()
+    return timer
+
+
+class WatchableTest(SilkTestCase):
+    """Silk unit tests for watchables.
+    """
+
+    def test_watch(self):
+        """Test watch returns once the value satisfies the function, or the last result on timeout.
+        """
+        state = watchable.Watchable("offline")
+        timer = set_later(state, "associated")
+        self.assertTrue(state.watch(lambda value: value == "associated", timeout=5))
+        timer.join()
+
+        start_time = time.time()
+        self.assertFalse(state.watch(lambda value: value == "offline", timeout=0.2))
+        self.assertGreaterEqual(time.time() - start_time, 0.2)
+
+    def test_watch_for_update(self):
+        """Test watch_for_update returns on any set, even of the same value, and honours its timeout.
+        """
+        state = watchable.WatchableWithHistory(name="state")
+        state.set("associated")
+
+        timer = set_later(state, "associated")
+        self.assertTrue(state.watch_for_update(timeout=5))
+        timer.join()
+
+        start_time = time.time()
+        self.assertIsNone(state.watch_for_update(timeout=0.2))
+        self.assertLess(time.time() - start_time, 5)
+
+    def test_wait_any(self):
+        """Test wait_any returns the first satisfied watch across watchables.
+        """
+        states = [watchable.Watchable("offline") for _ in range(3)]
+        watches = [(state, lambda value: value == "associated") for state in states]
+
+        timer = set_later(states[2], "associated")
+        self.assertEqual(watchable.wait_any(watches, timeout=5), (2, True))
+        timer.join()
+
+        self.assertIsNone(watchable.wait_any(watches[:2], timeout=0.1))
+
+    def test_wait_all(self):
+        """Test wait_all returns once every watch is satisfied, or None when the deadline passes.
+        """
+        states = [watchable.WatchableWithHistory(name=str(index)) for index in range(3)]
+        watches = [(state, lambda value: value == "associated") for state in states]
+        states[0].set("associated")
+
+        timers = [set_later(states[1], "associated", 0.05), set_later(states[2], "associated", 0.1)]
+        self.assertEqual(watchable.wait_all(watches, timeout=5), [True, True, True])
+        for timer in timers:
+            timer.join()
+
+        states[1].set("offline")
+        self.assertIsNone(watchable.wait_all(watches, timeout=0.1))
+
+    def test_watch_same_object_set_again(self):
+        """Test setting the same object again wakes watchers, as it may have been mutated in place.
+        """
+        addresses = []
+        state = watchable.Watchable(addresses)
+
+        def add_address():
+            addresses.append("fd00::1")
+            state.set(addresses)
+
+        timer = threading.Timer(0.1, add_address)
+        timer.start()
+        self.assertTrue(state.watch(lambda value: "fd00::1" in value, timeout=5))
+        timer.join()
+
+    def test_history_ring_buffer(self):
+        """Test the history keeps only the latest max_history updates.
+        """
+        state = watchable.WatchableWithHistory(initial_value="offline", max_history=3)
+        self.assertEqual(state.get(), "offline")
+
+        for index in range(5):
+            state.append([index * 10, "state%d" % index])
+
+        self.assertEqual(state.get(), "state4")
+        self.assertEqual(len(state), 3)
+        self.assertEqual(state.dropped, 2)
+        self.assertEqual([value for _, value in state.get_history()], ["state2", "state3", "state4"])
+        self.assertEqual(state[-1][1], "state4")
+        with self.assertRaises(IndexError):
+            state[3]
+
+    def test_history_time_lookups(self):
+        """Test value_at and changes_between look up updates by monotonic time.
+        """
+        state = watchable.WatchableWithHistory(initial_value="offline")
+        for timestamp, value in [(100, "associating"), (200, "associated"), (300, "offline")]:
+            state.append([timestamp, value])
+
+        self.assertEqual(state.value_at(50), "offline")
+        self.assertEqual(state.value_at(100), "associating")
+        self.assertEqual(state.value_at(250), "associated")
+        self.assertEqual(state.changes_between(100, 200), [(100, "associating"), (200, "associated")])
+        self.assertEqual(state.changes_between(201, 299), [])
+
+        # An update older than the last one is inserted in time order; the latest update stays the current value.
+        state.append([150, "joining"])
+        self.assertEqual(state.changes_between(100, 200), [(100, "associating"), (150, "joining"),
+                                                           (200, "associated")])
+        self.assertEqual(state.value_at(175), "joining")
+        self.assertEqual(state.get(), "offline")
+        state.append([300, "associating"])
+        self.assertEqual(state.changes_between(300, 300), [(300, "offline"), (300, "associating")])
+        self.assertEqual(state.get(), "associating")
+
+        truncated = watchable.WatchableWithHistory(max_history=1)
+        truncated.append([100, "a"])
+        truncated.append([200, "b"])
+        self.assertIsNone(truncated.value_at(150))
+
+    def test_history_concurrent_sets(self):
+        """Test sets from several threads at once all land in the history, in time order.
+        """
+        state = watchable.WatchableWithHistory(max_history=10000)
+
+        def set_many(thread_index):
+            for index in range(2000):
+                state.set((thread_index, index))
+
+        threads = [threading.Thread(target=set_many, args=(thread_index,)) for thread_index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        times = [timestamp for timestamp, _ in state.changes_between(0, watchable.now_ns())]
+        self.assertEqual(len(times), 8000)
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(state.get(), state[-1][1])
+
+    def test_history_set_uses_monotonic_time(self):
+        """Test set stamps updates with now_ns and get_history converts them back to datetimes.
+        """
+        state = watchable.WatchableWithHistory()
+        before = watchable.now_ns()
+        state.set("associated")
+        after = watchable.now_ns()
+
+        self.assertEqual(state.changes_between(before, after)[0][1], "associated")
+        self.assertEqual(state.value_at(after), "associated")
+        self.assertLess(abs((datetime.datetime.now() - state[0][0]).total_seconds()), 5)
+
+    def test_history_follows_wall_clock_steps(self):
+        """Test history datetimes follow the wall clock after it is stepped, as NTP does on a Pi host.
+        """
+        state = watchable.WatchableWithHistory()
+        state.set("associated")
+
+        stepped = time.time() + 3600
+        with mock.patch("time.time", return_value=stepped):
+            self.assertLess(abs(stepped - state[0][0].timestamp()), 5)
+
+    def test_benchmark(self):
+        """Test the concurrent watchers benchmark satisfies every watcher.
+        """
+        results = watchable_wait.run(num_nodes=8, num_watchers=64, num_updates=50)
+        self.assertEqual(results["satisfied"], 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
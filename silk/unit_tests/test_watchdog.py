@@ -0,0 +1,155 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from silk.device.system_call_manager import TemporarySystemCallManager
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import watchdog
+
+
+def sleep_call(seconds, delegates):
+    time.sleep(seconds)
+    return True
+
+
+class WatchdogTest(SilkTestCase):
+    """Silk unit tests for the stalled thread watchdog.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        watchdog.stop()
+        self.directory.cleanup()
+
+    def test_stall_dumps_stacks(self):
+        """Test a heartbeat that stops beating is reported once with its location and a stack dump.
+        """
+        stalls = []
+        handled = threading.Event()
+        release = threading.Event()
+
+        def stall_handler(location, stacks_path):
+            stalls.append((location, stacks_path))
+            handled.set()
+
+        heartbeat = watchdog.register("stuck-worker", stall_handler)
+
+        def stuck_worker():
+            heartbeat.arm()
+            release.wait(10)
+            heartbeat.disarm()
+
+        worker = threading.Thread(target=stuck_worker)
+        worker.start()
+
+        checker = watchdog.Watchdog(0.2, self.directory.name, interval=0.05)
+        checker.start()
+        try:
+            self.assertTrue(handled.wait(5))
+            time.sleep(0.3)
+        finally:
+            release.set()
+            worker.join()
+            checker.stop()
+
+        self.assertEqual(len(stalls), 1)
+        location, stacks_path = stalls[0]
+        self.assertIn("in wait", location)
+        with open(stacks_path) as stacks_file:
+            self.assertIn("stuck_worker", stacks_file.read())
+
+    def test_idle_and_beating_heartbeats(self):
+        """Test disarmed heartbeats and heartbeats that keep beating are not reported.
+        """
+        stalls = []
+        watchdog.register("idle-worker", lambda *args: stalls.append(args))
+        beating = watchdog.register("busy-worker", lambda *args: stalls.append(args))
+        beating.arm()
+
+        checker = watchdog.Watchdog(0.2, self.directory.name)
+        for _ in range(5):
+            time.sleep(0.1)
+            beating.beat()
+            checker.check()
+
+        self.assertEqual(stalls, [])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_stalled_system_call_fails_node(self):
+        """Test a system call worker that stops making progress is failed with the stall location.
+        """
+        manager = TemporarySystemCallManager()
+        watchdog.start(0.5, self.directory.name)
+
+        # Storing data takes the node lock, which the node state shares; holding it stalls the worker.
+        manager._lock.acquire()
+        try:
+            manager.make_system_call_async("echo", "echo stuck", "stuck", 10, "stuck")
+            error = manager.wait_for_completion()
+        finally:
+            manager._lock.release()
+
+        self.assertIn("Worker thread stalled at", error)
+        self.assertIn("node_state.py", error)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def test_hung_subprocess_fails_node(self):
+        """Test a system call hung in its subprocess is reported long before its own timeout.
+        """
+        manager = TemporarySystemCallManager()
+        watchdog.start(0.5, self.directory.name)
+
+        start_time = time.monotonic()
+        manager.make_system_call_async("sleep", "sleep 30", "", 60)
+        error = manager.wait_for_completion()
+
+        self.assertIn("Worker thread stalled at", error)
+        self.assertLess(time.monotonic() - start_time, 10)
+
+    def test_system_call_printing_output_is_not_stalled(self):
+        """Test a system call that keeps printing output may run longer than the watchdog timeout.
+        """
+        manager = TemporarySystemCallManager()
+        watchdog.start(0.5, self.directory.name)
+
+        manager.make_system_call_async("count", "for i in 1 2 3 4 5 6; do echo $i; sleep 0.2; done", "6", 10)
+        self.assertIsNone(manager.wait_for_completion())
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_function_call_budget(self):
+        """Test function calls may run for several watchdog timeouts, but are failed once they outlast their budget.
+        """
+        manager = TemporarySystemCallManager()
+        watchdog.start(0.1, self.directory.name)
+
+        manager.make_function_call_async(sleep_call, 0.3)
+        self.assertIsNone(manager.wait_for_completion())
+
+        start_time = time.monotonic()
+        manager.make_function_call_async(sleep_call, 5)
+        error = manager.wait_for_completion()
+
+        self.assertIn("Worker thread stalled at", error)
+        self.assertLess(time.monotonic() - start_time, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from silk.benchmarks import table_parse
+from silk.tools import wpan_table_parser
+from silk.unit_tests.testcase import SilkTestCase
+
+CHILD_TABLE = "\n".join([
+    "[",
+    "\t\"26E31B8C0A9E7263, RLOC16:3c01, NetDataVer:87, LQIn:3, AveRssi:-18, LastRssi:-18, Timeout:240, Age:0, "
+    "RxOnIdle:no, FTD:no, SecDataReq:yes, FullNetData:yes\"",
+    "\t\"EE7AD82183A83E77, RLOC16:3c02, NetDataVer:87, LQIn:3, AveRssi:-36, LastRssi:-36, Timeout:120, Age:4, "
+    "RxOnIdle:yes, FTD:yes, SecDataReq:yes, FullNetData:no\"",
+    "]",
+])
+
+ROUTER_TABLE = "\n".join([
+    "[",
+    "\t\"BAC3624E385416ED, RLOC16:2400, RouterId:9, NextHop:58, PathCost:1, LQIn:0, LQOut:0, Age:32, LinkEst:no\"",
+    "\t\"1EC7A04B35AE6CBD, RLOC16:2c00, RouterId:11, NextHop:58, PathCost:2, LQIn:3, LQOut:3, Age:1, LinkEst:yes\"",
+    "]",
+])
+
+
+class WpanTableParserTest(SilkTestCase):
+    """Silk unit tests for the wpanctl table parsers.
+    """
+
+    def test_row_entries(self):
+        """Test the row entries parse every field, also when the fields are printed in another order.
+        """
+        children = wpan_table_parser.parse_child_table_result(CHILD_TABLE)
+        self.assertEqual([child.ext_address for child in children], ["26E31B8C0A9E7263", "EE7AD82183A83E77"])
+        self.assertEqual((children[1].rloc16, children[1].timeout), ("3c02", "120"))
+        self.assertEqual([children[1].is_rx_on_when_idle(), children[1].is_ftd(), children[1].is_full_net_data()],
+                         [True, True, False])
+        self.assertIn("'_rloc16': '3c01'", repr(children[0]))
+
+        routers = wpan_table_parser.parse_router_table_result(ROUTER_TABLE)
+        self.assertEqual([(router.rloc16, router.router_id, router.next_hop, router.path_cost) for router in routers],
+                         [(0x2400, 9, 58, 1), (0x2c00, 11, 58, 2)])
+        self.assertEqual([router.is_link_established() for router in routers], [False, True])
+
+        reordered = wpan_table_parser.NeighborEntry(
+            "\t\"5AC95ED4646D6565, IsChild:yes, RLOC16:9403, FTD:no, RxOnIdle:yes, Age:0\"")
+        self.assertEqual((reordered.ext_address, reordered.rloc16), ("5AC95ED4646D6565", "9403"))
+        flags = [reordered.is_child(), reordered.is_ftd(), reordered.is_rx_on_when_idle()]
+        self.assertEqual(flags, [True, False, True])
+
+        cache_entry = wpan_table_parser.AddressCacheEntry("\t\"fd00:1234::d427:a1d9:6204:dbae -> 0x9c00, age:7\"")
+        self.assertEqual((cache_entry.address, cache_entry.rloc16, cache_entry.age),
+                         ("fd00:1234::d427:a1d9:6204:dbae", 0x9c00, 7))
+
+    def test_columns(self):
+        """Test columnar tables hold typed columns and find rows by extended address or RLOC16.
+        """
+        table = wpan_table_parser.parse_child_table_columns(CHILD_TABLE)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table["rloc16"]), [0x3c01, 0x3c02])
+        self.assertEqual(list(table["timeout"]), [240, 120])
+        self.assertEqual(list(table["rx_on_idle"]), [0, 1])
+
+        self.assertEqual(table.find(ext_address="EE7AD82183A83E77"), 1)
+        self.assertEqual(table.get(rloc16=0x3c01)["ext_address"], "26E31B8C0A9E7263")
+        self.assertIsNone(table.find(rloc16=0x3c03))
+        self.assertEqual(table.as_numpy("timeout").sum(), 360)
+
+        self.assertEqual(len(wpan_table_parser.parse_router_table_columns("[\n]")), 0)
+
+    def test_indexes_and_diff(self):
+        """Test router tables are indexed by router id and diffs report missing, unexpected and changed rows.
+        """
+        before = wpan_table_parser.parse_router_table_columns(ROUTER_TABLE)
+        self.assertEqual(before.get(router_id=11)["ext_address"], "1EC7A04B35AE6CBD")
+        self.assertIn("BAC3624E385416ED", before)
+        self.assertEqual(before.missing(["BAC3624E385416ED", "8EBA774B236DF308"]), {"8EBA774B236DF308"})
+        self.assertEqual(before.unexpected(["BAC3624E385416ED"]), {"1EC7A04B35AE6CBD"})
+
+        after = wpan_table_parser.parse_router_table_columns("\n".join([
+            "[",
+            "\t\"BAC3624E385416ED, RLOC16:2400, RouterId:9, NextHop:11, PathCost:3, LQIn:0, LQOut:0, Age:2, "
+            "LinkEst:no\"",
+            "\t\"8EBA774B236DF308, RLOC16:e800, RouterId:58, NextHop:63, PathCost:0, LQIn:3, LQOut:3, Age:0, "
+            "LinkEst:yes\"",
+            "]",
+        ]))
+        diff = after.diff(before)
+        self.assertEqual(diff.missing, {"1EC7A04B35AE6CBD"})
+        self.assertEqual(diff.unexpected, {"8EBA774B236DF308"})
+        self.assertEqual(diff.changed, {"BAC3624E385416ED": {"next_hop": (58, 11), "path_cost": (1, 3)}})
+        self.assertEqual(after.diff(before, columns=["rloc16"]).changed, {})
+
+    def test_benchmark(self):
+        """Test the benchmark finds every kind of table in the fixture logs and parses them the same way.
+        """
+        tables = table_parse.load_tables()
+        for kind, (rows_parser, columns_parser) in table_parse.PARSERS.items():
+            self.assertTrue(tables[kind], kind)
+            for table in tables[kind]:
+                rows = rows_parser(table)
+                self.assertEqual([row.ext_address for row in rows], columns_parser(table)["ext_address"])
+
+        results = table_parse.run(repeat=1)
+        self.assertEqual(set(results), {"child", "neighbor", "router"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from silk.config import wpan_constants as wpan
+from silk.tools import wpan_util
+from silk.unit_tests.mock_node import MockWpanNode
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import event_log
+
+
+def address_list(*addresses):
+    return "[\n" + "".join('\t"{}    prefix_len:64   origin:ncp"\n'.format(address) for address in addresses) + "]"
+
+
+class WpanUtilTest(SilkTestCase):
+    """Silk unit tests for the wpan_util verifiers.
+    """
+
+    def test_verify_within_passes(self):
+        """Test verify_within retries until the condition passes and reports its attempts.
+        """
+        calls = []
+
+        def condition():
+            calls.append(time.monotonic())
+            wpan_util.verify(len(calls) >= 4)
+
+        context = wpan_util.verify_within(condition, 5, delay_time=0.05, backoff=2)
+        self.assertEqual(context.attempts, 4)
+        self.assertEqual(context.stats()["attempts"], 4)
+        self.assertLess(context.check_time, context.elapsed)
+
+        # The delays double: 0.05, 0.1 then 0.2 seconds.
+        delays = [later - earlier for earlier, later in zip(calls, calls[1:])]
+        self.assertGreaterEqual(delays[2], 0.2)
+        self.assertGreater(delays[2], delays[0] * 2)
+
+    def test_verify_within_deadline(self):
+        """Test verify_within makes its last attempt at the deadline and then raises.
+        """
+        calls = []
+
+        def condition():
+            calls.append(time.monotonic())
+            wpan_util.verify(False)
+
+        start_time = time.monotonic()
+        with self.assertRaises(wpan_util.VerifyError):
+            wpan_util.verify_within(condition, 0.5, delay_time=0.2, max_delay_time=0.2)
+
+        self.assertAlmostEqual(calls[-1] - start_time, 0.5, delta=0.1)
+        self.assertLess(time.monotonic() - start_time, 0.7)
+
+    def test_delay_covers_slow_checks(self):
+        """Test the delay after an attempt is at least as long as the attempt took, within max_delay_time.
+        """
+        context = wpan_util.PollContext(10, delay_time=0.01, max_delay_time=1)
+        context.attempt(lambda: time.sleep(0.1))
+        self.assertGreaterEqual(context.next_delay(), 0.1)
+
+        context.last_check_time = 5
+        self.assertEqual(context.next_delay(), 1)
+
+    def test_concurrent_verify_within(self):
+        """Test verify_within calls on several threads keep their own state.
+        """
+        results = {}
+
+        def run(index):
+            attempts = []
+
+            def condition():
+                attempts.append(None)
+                wpan_util.verify(len(attempts) > index)
+
+            results[index] = wpan_util.verify_within(condition, 5, delay_time=0.01).attempts
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {index: index + 1 for index in range(4)})
+        self.assertFalse(wpan_util._is_in_verify_within())
+
+    def test_verify_on_events(self):
+        """Test verify_on_events re-checks when a relevant event is recorded rather than on its fallback poll.
+        """
+        state = {"role": "detached"}
+
+        def condition():
+            wpan_util.verify(state["role"] == "router")
+
+        def become_router():
+            event_log.record(event_log.COMMAND, "Node1", command="wpanctl status")
+            event_log.record(event_log.STATE_CHANGE, "Node2", state="associated")
+            state["role"] = "router"
+            event_log.record(event_log.STATE_CHANGE, "Node1", state="associated")
+
+        timer = threading.Timer(0.2, become_router)
+        timer.start()
+        context = wpan_util.verify_on_events(condition, 10, nodes=["Node1"], fallback_delay_time=5)
+        timer.join()
+
+        self.assertLess(context.elapsed, 1)
+        self.assertEqual(context.attempts, 2)
+
+        # Without events the condition is still polled, up to the deadline.
+        start_time = time.monotonic()
+        with self.assertRaises(wpan_util.VerifyError):
+            wpan_util.verify_on_events(lambda: wpan_util.verify(False), 0.3, fallback_delay_time=0.1)
+        self.assertLess(time.monotonic() - start_time, 1)
+
+    def test_verify_address_fan_out(self):
+        """Test node_list verifiers query the nodes concurrently and report every failing node.
+        """
+        nodes = [
+            MockWpanNode("node%d" % index, {wpan.WPAN_IP6_ALL_ADDRESSES: address_list("fd00:1::%d" % index)})
+            for index in range(8)
+        ]
+
+        start_time = time.monotonic()
+        wpan_util.verify_address(nodes, "fd00:1::")
+        self.assertLess(time.monotonic() - start_time, 0.5)
+
+        nodes[2].properties[wpan.WPAN_IP6_ALL_ADDRESSES] = address_list("fe80::2")
+        nodes[5].properties[wpan.WPAN_IP6_ALL_ADDRESSES] = address_list()
+        with self.assertRaises(wpan_util.VerifyError) as context:
+            wpan_util.verify_address(nodes, "fd00:1::")
+        self.assertIn("node2: ", str(context.exception))
+        self.assertIn("node5: ", str(context.exception))
+        self.assertNotIn("node3", str(context.exception))
+
+    def test_check_neighbor_table(self):
+        """Test the neighbor table check lists every missing neighbor.
+        """
+        entry = '\t"{}, RLOC16:{}, LQIn:3, AveRssi:-20, LastRssi:-20, Age:0, LinkFC:8, MleFC:0, IsChild:no, ' \
+                'RxOnIdle:yes, FTD:yes, SecDataReq:yes, FullNetData:yes"\n'
+        neighbor_table = "[\n" + entry.format("2222222222222222", "2400") + "]"
+        node = MockWpanNode("r1", {wpan.WPAN_THREAD_NEIGHBOR_TABLE: neighbor_table})
+        neighbors = [
+            MockWpanNode("r%d" % index, {wpan.WPAN_EXT_ADDRESS: "[{}]".format(str(index) * 16)}) for index in (2, 3)
+        ]
+
+        wpan_util.check_neighbor_table(node, neighbors[:1])
+        with self.assertRaises(wpan_util.VerifyError) as context:
+            wpan_util.check_neighbor_table(node, neighbors)
+        self.assertEqual(str(context.exception),
+                         "Failed to find a neighbor entry for extended address 3333333333333333 in table")
+
+    def test_check_parent_and_child_table(self):
+        """Test the parent and child table check lists each child that is wrong.
+        """
+        entry = '\t"{}, RLOC16:{}, NetDataVer:175, LQIn:3, AveRssi:-20, LastRssi:-20, Timeout:120, Age:0, ' \
+                'RxOnIdle:no, FTD:no, SecDataReq:yes, FullNetData:yes"\n'
+        child_table = "[\n" + entry.format("2222222222222222", "d401") + entry.format("3333333333333333", "d402") + "]"
+        parent = MockWpanNode("parent", {
+            wpan.WPAN_EXT_ADDRESS: "[1111111111111111]",
+            wpan.WPAN_THREAD_CHILD_TABLE: child_table,
+        })
+        children = [
+            MockWpanNode(
+                "child%d" % index, {
+                    wpan.WPAN_THREAD_PARENT: "[1111111111111111, RLOC16:d400]",
+                    wpan.WPAN_EXT_ADDRESS: "[{}]".format(str(index + 1) * 16),
+                    wpan.WPAN_THREAD_RLOC16: "0xd40%d" % index,
+                    wpan.WPAN_THREAD_CHILD_TIMEOUT: "120",
+                    wpan.WPAN_NODE_TYPE: wpan.NODE_TYPE_SLEEPY_END_DEVICE,
+                }) for index in (1, 2)
+        ]
+
+        start_time = time.monotonic()
+        wpan_util.check_parent_on_child_and_childtable_on_parent(parent, children)
+        # Each child answers five queries; one after another the check would take 1.2 seconds.
+        self.assertLess(time.monotonic() - start_time, 0.9)
+
+        children[0].properties[wpan.WPAN_THREAD_PARENT] = "[4444444444444444, RLOC16:e000]"
+        children[1].properties[wpan.WPAN_THREAD_CHILD_TIMEOUT] = "240"
+        with self.assertRaises(wpan_util.VerifyError) as context:
+            wpan_util.check_parent_on_child_and_childtable_on_parent(parent, children)
+        self.assertIn("child1: selected parent 4444444444444444", str(context.exception))
+        self.assertIn("child2: child table timeout 120 instead of 240", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import unittest
+
+from silk.node import base_node
+from silk.node import fifteen_four_dev_board
+from silk.node.fifteen_four_dev_board import WpantundMonitor
+from silk.tools import wpantund_log
+from silk.tools.wpantund_log import LineEventType
+from silk.unit_tests.testcase import SilkTestCase
+from silk.utils import signal
+
+
+class WpantundLogTest(SilkTestCase):
+    """Silk unit tests for the wpantund log line classifier.
+    """
+
+    def test_classify(self):
+        """Test each kind of line of interest is classified with its value.
+        """
+        cases = [
+            ("wpantund[1234]: NCP => [OTNS] role=3", LineEventType.OTNS_STATUS, "role=3"),
+            ("wpantund[1234]: State change: \"offline\" -> \"associating\"", LineEventType.STATE_CHANGE,
+             "associating"),
+            ("wpantund[1234]: FATAL ERROR: NCP not responding", LineEventType.CRASH, None),
+            ("wpantund[1234]: Framing error 1", LineEventType.FRAMING_ERROR, None),
+            ("wpantund[1234]: Finished initializing NCP", LineEventType.NCP_READY, None),
+            ("wpantund[1234]: NCP is running \"OPENTHREAD/1.0\"", LineEventType.NCP_VERSION, "OPENTHREAD/1.0"),
+            ("DBG: Node1: [stdout] [0123456789ABCDEF]", LineEventType.EXTADDR_RESPONSE, "0123456789ABCDEF"),
+            ("wpantund[1234]: Starting wpantund 0.08.00d (Jun 26 2020 17:03:46) . . .", LineEventType.WPANTUND_START,
+             None),
+        ]
+        for line, event_type, value in cases:
+            event = wpantund_log.classify(line)
+            self.assertEqual((event.type, event.value, event.line), (event_type, value, line))
+
+    def test_classify_uninteresting(self):
+        """Test lines without a marker, or with a marker but no match, are ignored.
+        """
+        self.assertIsNone(wpantund_log.classify("wpantund[1234]: Property changed"))
+        self.assertIsNone(wpantund_log.classify("wpantund[1234]: [OTNS] without status"))
+
+    def test_split_otns_status(self):
+        """Test an OTNS status payload is split into key and value.
+        """
+        self.assertEqual(wpantund_log.split_otns_status("child_added=0123456789abcdef"),
+                         ("child_added", "0123456789abcdef"))
+
+    def test_monitor_uses_published_event(self):
+        """Test WpantundMonitor reacts to events published with the line and to bare lines.
+        """
+        publisher = signal.Publisher()
+        monitor = WpantundMonitor(publisher=publisher)
+        crashes = []
+        monitor.crash_handler = crashes.append
+
+        line = "wpantund[1]: Finished initializing NCP"
+        publisher.emit(line=line, event=wpantund_log.classify(line))
+        self.assertTrue(monitor.running)
+
+        publisher.emit(line="wpantund[1]: State change: \"associated\" -> \"uninitialized:fault\"")
+        self.assertEqual(monitor.state, "uninitialized:fault")
+        self.assertFalse(monitor.running)
+        self.assertEqual(len(crashes), 1)
+
+        publisher.emit(line="wpantund[1]: FATAL ERROR")
+        self.assertEqual(len(crashes), 1)
+
+    def test_monitor_line_logging(self):
+        """Test lines of no interest are logged unless lean mode is on, and always when wpantund line logging is on.
+        """
+        publisher = signal.Publisher()
+        monitor = WpantundMonitor(publisher=publisher)
+        monitor.logger = logging.getLogger("silk").getChild("WpantundLogTest")
+        monitor.logger.setLevel(logging.DEBUG)
+
+        try:
+            with self.assertLogs(monitor.logger, logging.DEBUG) as logs:
+                publisher.emit(line="wpantund[1]: Property changed")
+                base_node.set_lean_mode(True)
+                publisher.emit(line="wpantund[1]: Property changed in lean mode")
+                publisher.emit(line="wpantund[1]: Framing error 1")
+                fifteen_four_dev_board.set_wpantund_line_logging(True)
+                publisher.emit(line="wpantund[1]: Property changed again")
+        finally:
+            base_node.set_lean_mode(False)
+            fifteen_four_dev_board.set_wpantund_line_logging(None)
+
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            ["wpantund[1]: Property changed", "wpantund[1]: Framing error 1", "wpantund[1]: Property changed again"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compressed, size-rotated log files.
+
+Log records are compressed in frames: each frame is an independent gzip member
+or zstd frame holding whole lines, so the file as a whole is a regular .gz or
+.zst stream that standard tools can read. Every frame is also listed in a
+sidecar index (<log>.idx, one JSON object per line) with its compressed offset
+and size and the number of its first line, which lets readers seek to a line
+without decompressing everything before it.
+"""
+
+import collections
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_AUTO = "auto"
+
+EXTENSIONS = {COMPRESSION_GZIP: ".gz", COMPRESSION_ZSTD: ".zst"}
+INDEX_SUFFIX = ".idx"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+Frame = collections.namedtuple("Frame", ["offset", "size", "line", "lines"])
+Frame.__doc__ = """Index entry of a compressed frame.
+
+offset and size locate the frame in the compressed file, line is the number of
+its first line counting from 0 and lines is the number of lines it holds.
+"""
+
+
+def resolve_compression(compression):
+    """Returns the codec to use for compression, picking zstd for COMPRESSION_AUTO if it is installed.
+    """
+    if compression == COMPRESSION_AUTO:
+        return COMPRESSION_ZSTD if zstandard is not None else COMPRESSION_GZIP
+    if compression not in EXTENSIONS:
+        raise ValueError("Unknown log compression %s" % compression)
+    if compression == COMPRESSION_ZSTD and zstandard is None:
+        raise ValueError("zstd log compression requires the zstandard package")
+    return compression
+
+
+def rotated_path(path, index):
+    """Returns the name of backup number index of path, e.g. silk.log.2.gz for silk.log.gz.
+    """
+    root, extension = os.path.splitext(path)
+    return "%s.%d%s" % (root, index, extension)
+
+
+class CompressedRotatingFileHandler(logging.Handler):
+    """Writes compressed records to base_path plus the extension of the codec.
+
+    Args:
+        base_path (str): uncompressed log file path, such as "silk.log".
+        compression (str): COMPRESSION_GZIP, COMPRESSION_ZSTD or COMPRESSION_AUTO.
+        max_bytes (int): rotate once the compressed file reaches this size; 0 never rotates.
+        backup_count (int): number of rotated files to keep. As with logging.handlers.RotatingFileHandler,
+            nothing is rotated if it is 0.
+        frame_size (int): uncompressed bytes buffered before a frame is written.
+        flush_interval (float): seconds after which a frame is written even if it is not full. A background thread
+            writes it when no record comes in, so a hung or killed run loses at most this much of its log.
+    """
+
+    def __init__(self,
+                 base_path,
+                 compression=COMPRESSION_GZIP,
+                 max_bytes=0,
+                 backup_count=0,
+                 frame_size=1 << 20,
+                 flush_interval=5.0):
+        super().__init__()
+        self.compression = resolve_compression(compression)
+        self.path = base_path + EXTENSIONS[self.compression]
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.frame_size = frame_size
+        self.flush_interval = flush_interval
+
+        if self.compression == COMPRESSION_ZSTD:
+            self._zstd = zstandard.ZstdCompressor()
+
+        self._file = None
+        self._index = None
+        self._open()
+
+        self._closed = threading.Event()
+        self._flush_thread = None
+        if flush_interval:
+            self._flush_thread = threading.Thread(target=self._flush_periodically, name="compressed-log-flush")
+            self._flush_thread.daemon = True
+            self._flush_thread.start()
+
+    def _open(self):
+        self._file = open(self.path, "wb")
+        self._index = open(self.path + INDEX_SUFFIX, "w")
+        self._offset = 0
+        self._line = 0
+        self._buffer = []
+        self._buffered = 0
+        self._frame_start = time.time()
+
+    def _compress(self, data):
+        if self.compression == COMPRESSION_ZSTD:
+            return self._zstd.compress(data)
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+    def _write_frame(self):
+        if not self._buffer:
+            return
+
+        frame = self._compress(b"".join(self._buffer))
+        self._file.write(frame)
+        self._file.flush()
+
+        entry = Frame(self._offset, len(frame), self._line, len(self._buffer))
+        self._index.write(json.dumps(entry._asdict()) + "\n")
+        self._index.flush()
+
+        self._offset += len(frame)
+        self._line += len(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+
+    def _should_rotate(self):
+        return self.max_bytes > 0 and self.backup_count > 0 and self._offset >= self.max_bytes
+
+    def _rotate(self):
+        self._close_files()
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = rotated_path(self.path, index)
+            if os.path.exists(source):
+                destination = rotated_path(self.path, index + 1)
+                os.replace(source, destination)
+                os.replace(source + INDEX_SUFFIX, destination + INDEX_SUFFIX)
+
+        destination = rotated_path(self.path, 1)
+        os.replace(self.path, destination)
+        os.replace(self.path + INDEX_SUFFIX, destination + INDEX_SUFFIX)
+
+        self._open()
+
+    def _close_files(self):
+        self._write_frame()
+        self._file.close()
+        self._index.close()
+        self._file = None
+        self._index = None
+
+    def emit(self, record):
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+
+            if self._file is None:
+                return
+
+            if not self._buffer:
+                self._frame_start = time.time()
+            self._buffer.append(line)
+            self._buffered += len(line)
+
+            if self._buffered >= self.frame_size or time.time() - self._frame_start >= self.flush_interval:
+                self._end_frame()
+        except Exception:
+            self.handleError(record)
+
+    def _end_frame(self):
+        self._write_frame()
+        if self._should_rotate():
+            self._rotate()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            with self.lock:
+                if self._file is not None and self._buffer and \
+                        time.time() - self._frame_start >= self.flush_interval:
+                    self._end_frame()
+
+    def flush(self):
+        """Write the buffered records as a frame, so readers see them.
+        """
+        with self.lock:
+            if self._file is not None:
+                self._write_frame()
+
+    def close(self):
+        self._closed.set()
+        if self._flush_thread is not None and self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+
+        with self.lock:
+            if self._file is not None:
+                self._close_files()
+        super().close()
+
+
+def read_index(path):
+    """Returns the Frame list of a compressed log, or None if it has no index.
+    """
+    try:
+        with open(path + INDEX_SUFFIX, "r") as index_file:
+            frames = []
+            for line in index_file:
+                try:
+                    frames.append(Frame(**json.loads(line)))
+                except (TypeError, ValueError):
+                    # An entry cut short by an interrupted run.
+                    break
+            return frames
+    except FileNotFoundError:
+        return None
+
+
+def detect_compression(path):
+    """Returns the codec path was compressed with, or None for a plain text file.
+    """
+    with open(path, "rb") as log_file:
+        magic = log_file.read(4)
+
+    if magic.startswith(_GZIP_MAGIC):
+        return COMPRESSION_GZIP
+    if magic.startswith(_ZSTD_MAGIC):
+        return COMPRESSION_ZSTD
+    return None
+
+
+def _decompress_frame(compression, data):
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _iter_indexed_lines(path, compression, frames, start_line):
+    first = 0
+    for number, frame in enumerate(frames):
+        if frame.line <= start_line:
+            first = number
+
+    line_number = frames[first].line
+    with open(path, "rb") as log_file:
+        log_file.seek(frames[first].offset)
+        for frame in frames[first:]:
+            data = log_file.read(frame.size)
+            for line in _decompress_frame(compression, data).decode("utf-8").splitlines(True):
+                if line_number >= start_line:
+                    yield line
+                line_number += 1
+
+
+def _open_stream(path, compression):
+    if compression == COMPRESSION_GZIP:
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("Reading %s requires the zstandard package" % path)
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r")
+
+
+def iter_lines(path, start_line=0):
+    """Yield the lines of a plain or compressed log file.
+
+    Compressed logs with an index start decompressing at the frame holding
+    start_line; other files are read from the start.
+
+    Args:
+        path (str): log file path.
+        start_line (int): number of the first line to yield, counting from 0.
+
+    Yields:
+        str: lines of the log, with their line endings.
+    """
+    compression = detect_compression(path)
+
+    frames = read_index(path) if compression is not None else None
+    if frames:
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            raise ValueError("Reading %s requires the zstandard package" % path)
+        yield from _iter_indexed_lines(path, compression, frames, start_line)
+        return
+
+    with _open_stream(path, compression) as log_file:
+        for line_number, line in enumerate(log_file):
+            if line_number >= start_line:
+                yield line
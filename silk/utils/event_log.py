@@ -0,0 +1,165 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Structured event log written next to silk.log.
+
+Each event is one JSON object per line (JSON Lines) with an epoch timestamp in
+nanoseconds, the node it concerns (or null), its type and its fields:
+
+    {"ts": 1600000000000000000, "node": "Node1", "type": "state_change", "state": "associated"}
+
+Tools can stream the events with read_events instead of parsing silk.log text.
+Code running in the same process can also add a listener to get each event as
+it is recorded, whether or not an event log file is open.
+"""
+
+import collections
+import json
+import threading
+import time
+
+EVENT_LOG_FILENAME = "events.jsonl"
+
+TEST_MARKER = "test_marker"
+STATE_CHANGE = "state_change"
+WPANTUND_CRASH = "wpantund_crash"
+OTNS_STATUS = "otns_status"
+COMMAND = "command"
+CONVERGENCE = "convergence"
+
+Event = collections.namedtuple("Event", ["ts", "node", "type", "fields"])
+
+_WRITER = None
+_LISTENERS = ()
+_LISTENERS_LOCK = threading.Lock()
+
+try:
+    _now_ns = time.time_ns
+except AttributeError:
+
+    def _now_ns():
+        return int(time.time() * 1e9)
+
+
+class EventLogWriter(object):
+    """Appends events to a JSON Lines file, safe to use from any thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w")
+        self._lock = threading.Lock()
+
+    def write(self, event_type, node=None, **fields):
+        record = {"ts": _now_ns(), "node": node, "type": event_type}
+        record.update(fields)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                # A crashed or killed run must still leave the events leading up to it on disk.
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def open_event_log(path):
+    """Start writing framework events to path, closing any previous event log.
+    """
+    global _WRITER
+
+    close_event_log()
+    _WRITER = EventLogWriter(path)
+    return _WRITER
+
+
+def close_event_log():
+    """Stop writing framework events.
+    """
+    global _WRITER
+
+    writer, _WRITER = _WRITER, None
+    if writer is not None:
+        writer.close()
+
+
+def add_listener(listener):
+    """Call listener(event) with each Event recorded from now on.
+
+    Listeners run on the recording thread, often a process output reader, so
+    they should only hand the event over and return.
+    """
+    global _LISTENERS
+
+    with _LISTENERS_LOCK:
+        _LISTENERS = _LISTENERS + (listener,)
+
+
+def remove_listener(listener):
+    global _LISTENERS
+
+    with _LISTENERS_LOCK:
+        _LISTENERS = tuple(known for known in _LISTENERS if known != listener)
+
+
+def record(event_type, node=None, **fields):
+    """Record an event in the current event log and pass it to the listeners.
+    """
+    writer = _WRITER
+    if writer is not None:
+        writer.write(event_type, node, **fields)
+
+    listeners = _LISTENERS
+    if listeners:
+        event = Event(_now_ns(), node, event_type, fields)
+        for listener in listeners:
+            listener(event)
+
+
+def read_events(path, event_types=None, node=None):
+    """Stream the events of an event log.
+
+    Args:
+        path (str): event log file.
+        event_types (Iterable[str]): only yield events of these types.
+        node (str): only yield events concerning this node.
+
+    Yields:
+        Event: events in the order they were written.
+    """
+    if event_types is not None:
+        event_types = set(event_types)
+
+    with open(path, "r") as event_file:
+        for line in event_file:
+            if not line.strip():
+                continue
+
+            try:
+                fields = json.loads(line)
+            except ValueError:
+                # A record cut short by an interrupted run.
+                continue
+            event = Event(fields.pop("ts"), fields.pop("node"), fields.pop("type"), fields)
+
+            if event_types is not None and event.type not in event_types:
+                continue
+            if node is not None and event.node != node:
+                continue
+
+            yield event
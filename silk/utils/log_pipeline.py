@@ -0,0 +1,142 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Asynchronous logging pipeline.
+
+Records are put on a bounded queue by the logging threads and written out by a
+single listener thread, so file and console I/O no longer run under the handler
+lock of the thread issuing the command or reading wpantund output.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+POLICY_BLOCK = "block"
+POLICY_DROP = "drop"
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that either blocks or drops records when the queue is full.
+    """
+
+    def __init__(self, log_queue, policy=POLICY_BLOCK):
+        if policy not in (POLICY_BLOCK, POLICY_DROP):
+            raise ValueError("Unknown queue policy %s" % policy)
+
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        if self.policy == POLICY_BLOCK:
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _BlockingSentinelListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue instead of failing.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class NodeShardHandler(logging.Handler):
+    """Writes the records of each node to its own file.
+
+    The node is the first logger name component below root_name, so records of
+    "silk.Node1.wpantund" go to "<prefix>.Node1.log" in directory.
+    """
+
+    def __init__(self, directory, root_name="silk", prefix="silk", formatter=None):
+        super().__init__()
+        self.directory = directory
+        self.root_name = root_name
+        self.prefix = prefix
+        self.shards = {}
+        if formatter is not None:
+            self.setFormatter(formatter)
+
+    def shard_name(self, record):
+        parts = record.name.split(".")
+        if len(parts) < 2 or parts[0] != self.root_name:
+            return None
+        return parts[1]
+
+    def emit(self, record):
+        name = self.shard_name(record)
+        if name is None:
+            return
+
+        handler = self.shards.get(name)
+        if handler is None:
+            path = os.path.join(self.directory, "%s.%s.log" % (self.prefix, name))
+            handler = logging.FileHandler(path, mode="w")
+            handler.setFormatter(self.formatter)
+            self.shards[name] = handler
+
+        handler.emit(record)
+
+    def close(self):
+        for handler in self.shards.values():
+            handler.close()
+        self.shards.clear()
+        super().close()
+
+
+class LogPipeline(object):
+    """Queue plus listener thread feeding the given handlers.
+
+    Args:
+        handlers (list): handlers run on the listener thread, each at its own level.
+        queue_size (int): maximum number of records waiting to be written.
+        policy (str): POLICY_BLOCK to make loggers wait for room, POLICY_DROP to discard records.
+    """
+
+    def __init__(self, handlers, queue_size=10000, policy=POLICY_BLOCK):
+        self.handlers = list(handlers)
+        self.queue = queue.Queue(queue_size)
+        self.queue_handler = BoundedQueueHandler(self.queue, policy)
+        self.listener = _BlockingSentinelListener(self.queue, *self.handlers, respect_handler_level=True)
+
+    @property
+    def dropped(self):
+        return self.queue_handler.dropped
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        """Write out every queued record and close the handlers.
+        """
+        self.listener.stop()
+
+        if self.dropped:
+            record = logging.LogRecord("silk", logging.WARNING, __file__, 0,
+                                       "Log pipeline dropped %s records" % self.dropped, None, None)
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+        for handler in self.handlers:
+            handler.close()
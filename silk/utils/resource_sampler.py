@@ -0,0 +1,172 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""CPU and memory sampling of processes through /proc.
+
+A ResourceSampler thread reads /proc/<pid>/stat and /proc/<pid>/statm of each
+added process at a fixed interval and keeps the CPU usage (percent of one
+core) and resident set size of every sample in compact arrays.
+"""
+
+import array
+import json
+import os
+import threading
+import time
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def read_cpu_ticks(pid):
+    """Returns the user plus system CPU time of pid in clock ticks.
+    """
+    with open("/proc/%d/stat" % pid, "rb") as stat_file:
+        stat = stat_file.read()
+
+    # The command name may contain spaces and parentheses; fields resume after the last ")".
+    fields = stat[stat.rindex(b")") + 2:].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def read_rss(pid):
+    """Returns the resident set size of pid in bytes.
+    """
+    with open("/proc/%d/statm" % pid, "rb") as statm_file:
+        return int(statm_file.read().split()[1]) * _PAGE_SIZE
+
+
+class ProcessSamples(object):
+    """Samples of one process.
+
+    cpu holds the CPU usage in percent of one core over each interval, rss the
+    resident set size in KiB at each sample.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.cpu = array.array("f")
+        self.rss = array.array("L")
+        self.alive = True
+        self._last_ticks = None
+        self._last_time = None
+
+    def sample(self, now):
+        try:
+            ticks = read_cpu_ticks(self.pid)
+            rss = read_rss(self.pid)
+        except (OSError, ValueError, IndexError):
+            self.alive = False
+            return
+
+        if self._last_ticks is not None and now > self._last_time:
+            self.cpu.append(100.0 * (ticks - self._last_ticks) / _CLOCK_TICKS / (now - self._last_time))
+            self.rss.append(rss // 1024)
+
+        self._last_ticks = ticks
+        self._last_time = now
+
+    def summary(self):
+        """Returns the peak and mean CPU usage and RSS, or None for a process with no samples.
+        """
+        if not self.cpu:
+            return None
+
+        return {
+            "pid": self.pid,
+            "samples": len(self.cpu),
+            "cpu_peak": round(max(self.cpu), 1),
+            "cpu_mean": round(sum(self.cpu) / len(self.cpu), 1),
+            "rss_peak_kb": max(self.rss),
+            "rss_mean_kb": sum(self.rss) // len(self.rss),
+        }
+
+
+class ResourceSampler(object):
+    """Thread sampling the CPU usage and RSS of labelled processes.
+
+    Args:
+        interval (float): seconds between two samples.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.processes = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, label, pid):
+        """Sample process pid under label from now on.
+        """
+        with self._lock:
+            self.processes[label] = ProcessSamples(int(pid))
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the summary of each process that has samples.
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            # Cover the time since the last periodic sample.
+            self.sample()
+        return self.summary()
+
+    def sample(self):
+        now = time.monotonic()
+        with self._lock:
+            processes = list(self.processes.values())
+
+        for process in processes:
+            if process.alive:
+                process.sample(now)
+
+    def summary(self):
+        with self._lock:
+            processes = list(self.processes.items())
+
+        summaries = {}
+        for label, process in processes:
+            summary = process.summary()
+            if summary is not None:
+                summaries[label] = summary
+        return summaries
+
+    def save(self, path):
+        """Write the samples of every process to path as JSON arrays.
+        """
+        with self._lock:
+            processes = list(self.processes.items())
+
+        samples = {
+            label: {
+                "pid": process.pid,
+                "interval": self.interval,
+                "cpu": [round(value, 1) for value in process.cpu],
+                "rss_kb": process.rss.tolist(),
+            } for label, process in processes
+        }
+        with open(path, "w") as samples_file:
+            json.dump(samples, samples_file, separators=(",", ":"))
+
+    def _run(self):
+        self.sample()
+        while not self._stop_event.wait(self.interval):
+            self.sample()
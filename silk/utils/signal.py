@@ -15,8 +15,8 @@
 """
 
 import logging
-
-from django.dispatch import Signal
+import threading
+import weakref
 
 from silk.utils import decorator
 
@@ -112,29 +112,78 @@ class SignalLogger(object):
 class Publisher(SignalLogger):
     """Base class for signaling Publisher.
 
-    The base __init__ function setups the signaling object that a Subscriber can connect to.
+    Subscribers are held through weak references in a tuple that is replaced on
+    every change, so emitting never takes a lock and a handler may subscribe or
+    unsubscribe while a signal is being dispatched.
     """
 
     def __init__(self):
         """Setups signaling object.
         """
         super().__init__()
-        self._signal = Signal()
-
-    def subscribe(self, handle):
+        self._subscribers = ()
+        self._subscribers_lock = threading.RLock()
+
+    @staticmethod
+    def _make_ref(handle, on_delete):
+        if handle is None:
+            return None
+        if hasattr(handle, "__self__") and hasattr(handle, "__func__"):
+            return weakref.WeakMethod(handle, on_delete)
+        return weakref.ref(handle, on_delete)
+
+    def _remove_dead_subscribers(self, _=None):
+        with self._subscribers_lock:
+            self._subscribers = tuple(entry for entry in self._subscribers if entry[0]() is not None)
+
+    def subscribe(self, handle, batch_handle=None):
         """Subscribe a handle to this publisher.
+
+        Args:
+            handle: called as handle(sender=publisher, **kwargs) for each emitted signal.
+            batch_handle: if given, called once as batch_handle(sender=publisher, batch=batch) by emit_batch
+                instead of calling handle for every item.
         """
-        self._signal.connect(handle)
+        with self._subscribers_lock:
+            if any(entry[0]() == handle for entry in self._subscribers):
+                return
+
+            entry = (self._make_ref(handle, self._remove_dead_subscribers),
+                     self._make_ref(batch_handle, self._remove_dead_subscribers))
+            self._subscribers = self._subscribers + (entry,)
 
     def unsubscribe(self, handle):
         """Unsubscribe a handle from this publisher.
         """
-        self._signal.disconnect(handle)
+        with self._subscribers_lock:
+            self._subscribers = tuple(entry for entry in self._subscribers if entry[0]() != handle)
 
     def emit(self, **kwargs):
         """Emits arguments to the subscribers.
         """
-        self._signal.send(sender=self, **kwargs)
+        for handle_ref, _ in self._subscribers:
+            handle = handle_ref()
+            if handle is not None:
+                handle(sender=self, **kwargs)
+
+    def emit_batch(self, batch):
+        """Emits a list of keyword argument dicts to the subscribers.
+
+        Subscribers with a batch handle get the whole list in one call, the others get one call per item.
+        """
+        if not batch:
+            return
+
+        for handle_ref, batch_ref in self._subscribers:
+            batch_handle = batch_ref() if batch_ref is not None else None
+            if batch_handle is not None:
+                batch_handle(sender=self, batch=batch)
+                continue
+
+            handle = handle_ref()
+            if handle is not None:
+                for kwargs in batch:
+                    handle(sender=self, **kwargs)
 
 
 class Subscriber(SignalLogger):
@@ -168,7 +217,7 @@ class Subscriber(SignalLogger):
         if not isinstance(publisher, Publisher):
             raise TypeError("publisher must be a type Publisher but was %s" % type(publisher))
 
-        publisher.subscribe(self.subscribe_handle)
+        publisher.subscribe(self.subscribe_handle, self.subscribe_batch_handle)
         self.publishers.append(publisher)
 
     def unsubscribe(self, publisher=None):
@@ -191,3 +240,9 @@ class Subscriber(SignalLogger):
         """Handler method that should be overwritten from the publisher.
         """
         pass
+
+    def subscribe_batch_handle(self, sender, batch):
+        """Handler for a batch of signals; calls subscribe_handle for each one unless overwritten.
+        """
+        for kwargs in batch:
+            self.subscribe_handle(sender, **kwargs)
@@ -12,37 +12,185 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import re
-import select
+import selectors
 import subprocess
 import threading
 import traceback
 
 from silk.utils import signal
+from silk.utils import watchdog
 
+_REACTOR = None
+_REACTOR_LOCK = threading.Lock()
 
-class SubprocessRunner(signal.Publisher, threading.Thread):
-    """A class which runs a command.
+
+class _OutputReactor(object):
+    """Single thread multiplexing the stdout of every SubprocessRunner.
+
+    Registration changes are queued and the selector is woken through a pipe, so
+    starting or stopping a runner takes effect without waiting for a poll timeout.
+    """
+
+    read_size = 65536
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._dispatching = None
+        self._heartbeat = watchdog.register("subprocess-reactor", self._stalled)
+
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ, None)
+
+        self._thread = threading.Thread(target=self._run, name="subprocess-reactor")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def call_soon(self, function, *args):
+        """Run function on the reactor thread before it next waits for output.
+        """
+        with self._lock:
+            self._pending.append((function, args))
+
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            # The wake pipe is full, the reactor is already due to wake up.
+            pass
+
+    def add(self, runner):
+        self.call_soon(self._register, runner)
+
+    def remove(self, runner):
+        self.call_soon(self._unregister, runner)
+
+    def _register(self, runner):
+        self._selector.register(runner.proc.stdout, selectors.EVENT_READ, runner)
+
+    def _unregister(self, runner):
+        try:
+            self._selector.unregister(runner.proc.stdout)
+        except (KeyError, ValueError):
+            # Already unregistered on end of stream.
+            return
+
+        runner._flush()
+        runner.proc.stdout.close()
+
+    def _run_pending(self):
+        try:
+            while True:
+                os.read(self._wake_read, 4096)
+        except BlockingIOError:
+            pass
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for function, args in pending:
+            try:
+                function(*args)
+            except Exception as e:
+                traceback.print_exc()
+                print("Error in SubprocessRunner reactor:", str(e))
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                runner = key.data
+
+                if runner is None:
+                    self._run_pending()
+                    continue
+
+                try:
+                    data = os.read(key.fd, self.read_size)
+                except OSError:
+                    data = b""
+
+                if data:
+                    self._dispatching = runner
+                    self._heartbeat.arm()
+                    try:
+                        runner._feed(data)
+                    finally:
+                        self._heartbeat.disarm()
+                        self._dispatching = None
+                else:
+                    self._unregister(runner)
+
+    def _stalled(self, location, stacks_path):
+        """Pass a stall of the reactor on to the runner whose subscribers it was running.
+        """
+        runner = self._dispatching
+        if runner is not None and runner.stall_handler is not None:
+            runner.stall_handler(location, stacks_path)
+
+
+def _get_reactor():
+    """Returns the process wide output reactor, starting it on first use.
+    """
+    global _REACTOR
+
+    with _REACTOR_LOCK:
+        if _REACTOR is None:
+            _REACTOR = _OutputReactor()
+
+    return _REACTOR
+
+
+class SubprocessRunner(signal.Publisher):
+    """A class which runs a command and publishes each line of its output.
+
+    Output of all runners is read by a single shared reactor thread.
 
     :param command:
         command to run
+    :param classifier:
+        optional function of a line whose result is published with the line as `event`,
+        so that subscribers share one classification per line
+
+    `stall_handler`, if set, is called as stall_handler(location, stacks_path) when the
+    watchdog finds the subscribers of this runner blocking the reactor.
     """
 
-    def __init__(self, command):
+    stall_handler = None
+
+    def __init__(self, command, classifier=None):
         super().__init__()
-        threading.Thread.__init__(self)
 
         self.command = command
+        self.classifier = classifier
+        self.proc = None
+        self._buffer = b""
 
         self.running = False
-        self.daemon = True
 
     def start(self):
-        """Start the subprocess runner, this does not start process.
+        """Start the command and begin publishing its output.
         """
+        # Added code to handle wpantund start in RCP mode
+        # sudo /usr/local/sbin/wpantund -o Config:NCP:SocketPath "system:openthread/output/posix/x86_64-unknown-linux-
+        # gnu/bin/ot-ncp /dev/ttyACM0 115200" -o Config:TUN:InterfaceName wpan0 -o Daemon:SyslogMask "all"
+
+        command = re.findall(r"(?:\".*?\"|\S)+", self.command)
+
+        command = " ".join(e for e in command)
+
         try:
-            super().start()
+            self.proc = subprocess.Popen(command,
+                                         bufsize=0,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT,
+                                         shell=True)
+            os.set_blocking(self.proc.stdout.fileno(), False)
             self.running = True
+            _get_reactor().add(self)
         except Exception as e:
             traceback.print_exc()
             print("Error in SubprocessRunner start:", str(e))
@@ -55,38 +203,45 @@ class SubprocessRunner(signal.Publisher, threading.Thread):
         """
         if self.running:
             self.running = False
-            # try joining for 15 seconds, else let the program tear down
-            self.join(timeout)
-            if self.is_alive():
-                self.warn("SubprocessRunner join timed out")
+            _get_reactor().remove(self)
+
+            try:
+                self.proc.terminate()
+                self.proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.warn("SubprocessRunner terminate timed out")
                 self.proc.kill()
+            except OSError:
+                pass
 
-    def run(self):
-        """start the command.
+    def _feed(self, data):
+        """Assemble complete lines from a chunk of output and publish them as one batch.
         """
+        lines = (self._buffer + data).split(b"\n")
+        self._buffer = lines.pop()
+        self._emit_lines(lines)
 
-        # Added code to handle wpantund start in RCP mode
-        # sudo /usr/local/sbin/wpantund -o Config:NCP:SocketPath "system:openthread/output/posix/x86_64-unknown-linux-
-        # gnu/bin/ot-ncp /dev/ttyACM0 115200" -o Config:TUN:InterfaceName wpan0 -o Daemon:SyslogMask "all"
-
-        command = re.findall(r"(?:\".*?\"|\S)+", self.command)
-
-        command = " ".join(e for e in command)
+    def _flush(self):
+        """Publish any trailing output not terminated by a newline.
+        """
+        line, self._buffer = self._buffer, b""
+        self._emit_lines([line])
+
+    def _emit_lines(self, lines):
+        batch = []
+        for line in lines:
+            line = line.rstrip()
+            if not line:
+                continue
+
+            line = line.decode("utf-8", errors="replace")
+            if self.classifier is None:
+                batch.append({"line": line})
+            else:
+                batch.append({"line": line, "event": self.classifier(line)})
 
-        self.proc = subprocess.Popen(command, bufsize=0, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
         try:
-            while self.running:
-                for s in select.select([self.proc.stdout], [], [], 1)[0]:
-                    line = s.readline().rstrip()
-                    if line:
-                        line = line.decode("utf-8")
-                        self.emit(line=line)
+            self.emit_batch(batch)
         except Exception as e:
             traceback.print_exc()
-            print("Error in SubprocessRunner run:", str(e))
-        finally:
-            self.running = False
-            try:
-                self.proc.terminate()
-            except OSError:
-                pass
+            print("Error in SubprocessRunner subscriber:", str(e))
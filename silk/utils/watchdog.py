@@ -0,0 +1,224 @@
+# Copyright 2019 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Watchdog for stalled worker threads.
+
+Worker threads register a Heartbeat, arm it while they work on something and
+beat it as they make progress. Once started, the watchdog thread checks the
+armed heartbeats; when one has not beaten for the stall timeout, times the
+budget it was armed with, it writes the
+stacks of all threads to the output directory and calls the stall handler of
+the heartbeat, on a thread of its own, with the location the thread is stuck at.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+STACKS_FILENAME_FORMAT = "stacks-%s-%s.txt"
+
+_HEARTBEATS = weakref.WeakSet()
+_HEARTBEATS_LOCK = threading.Lock()
+_WATCHDOG = None
+_WATCHDOG_LOCK = threading.Lock()
+
+
+class Heartbeat(object):
+    """Liveness of one worker thread.
+
+    Args:
+        name (str): name used in logs and stack dump file names.
+        stall_handler (callable): called as stall_handler(location, stacks_path) when the worker stalls. It runs on
+            a new thread, so it may block on locks the stalled worker holds without stopping the watchdog.
+    """
+
+    def __init__(self, name, stall_handler=None):
+        self.name = name
+        self.stall_handler = stall_handler
+        self.thread_id = None
+        self.last_beat = 0
+        self.budget = 1.0
+        self.armed = False
+        self.stalled = False
+
+    def arm(self, budget=1.0):
+        """Start watching the calling thread.
+
+        Args:
+            budget (float): multiple of the watchdog timeout the thread may go without beating until disarmed.
+        """
+        self.thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.budget = budget
+        self.stalled = False
+        self.armed = True
+
+    def beat(self):
+        """Report progress of the watched thread.
+        """
+        self.last_beat = time.monotonic()
+
+    def is_overdue(self, now, timeout):
+        """Returns whether the heartbeat is armed and has not beaten within its budget of timeout seconds.
+
+        A heartbeat already reported as stalled is not overdue again until it is re-armed.
+        """
+        return self.armed and not self.stalled and now - self.last_beat > timeout * self.budget
+
+    def disarm(self):
+        """Stop watching, e.g. before the worker blocks waiting for new work.
+        """
+        self.armed = False
+
+
+def register(name, stall_handler=None):
+    """Returns a new Heartbeat checked by the watchdog whenever it is running.
+
+    Heartbeats are held weakly and are dropped with their owner.
+    """
+    heartbeat = Heartbeat(name, stall_handler)
+    with _HEARTBEATS_LOCK:
+        _HEARTBEATS.add(heartbeat)
+    return heartbeat
+
+
+def thread_location(thread_id, frames=None):
+    """Returns "file:line in function" of the innermost frame of a thread, or None if it is gone.
+    """
+    if frames is None:
+        frames = sys._current_frames()
+
+    frame = frames.get(thread_id)
+    if frame is None:
+        return None
+
+    return "%s:%d in %s" % (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+
+
+def dump_stacks(path, frames=None):
+    """Write the stacks of all Python threads to path.
+    """
+    if frames is None:
+        frames = sys._current_frames()
+
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+    with open(path, "w") as stacks_file:
+        for thread_id, frame in frames.items():
+            stacks_file.write("Thread %s (%s):\n" % (names.get(thread_id, "unknown"), thread_id))
+            stacks_file.write("".join(traceback.format_stack(frame)))
+            stacks_file.write("\n")
+
+
+class Watchdog(object):
+    """Thread checking the registered heartbeats.
+
+    Args:
+        timeout (float): seconds an armed heartbeat may go without beating.
+        output_directory (str): directory the stack dumps are written to.
+        interval (float): seconds between two checks.
+    """
+
+    def __init__(self, timeout, output_directory, interval=None):
+        self.timeout = timeout
+        self.output_directory = output_directory
+        self.interval = interval if interval is not None else min(timeout / 4.0, 5.0)
+        self.logger = logging.getLogger("silk").getChild("watchdog")
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watchdog")
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def check(self):
+        """Report the heartbeats that stalled since the last check.
+        """
+        now = time.monotonic()
+        with _HEARTBEATS_LOCK:
+            heartbeats = list(_HEARTBEATS)
+
+        stalled = [heartbeat for heartbeat in heartbeats if heartbeat.is_overdue(now, self.timeout)]
+        if not stalled:
+            return
+
+        frames = sys._current_frames()
+        for heartbeat in stalled:
+            heartbeat.stalled = True
+            location = thread_location(heartbeat.thread_id, frames)
+
+            stacks_path = os.path.join(self.output_directory,
+                                       STACKS_FILENAME_FORMAT % (heartbeat.name, time.strftime("%Y%m%d-%H%M%S")))
+            try:
+                dump_stacks(stacks_path, frames)
+            except OSError as error:
+                self.logger.error("Failed to write stacks to %s: %s", stacks_path, error)
+                stacks_path = None
+
+            self.logger.error("%s stalled for %.0fs at %s, stacks in %s", heartbeat.name, now - heartbeat.last_beat,
+                              location, stacks_path)
+
+            if heartbeat.stall_handler is not None:
+                handler_thread = threading.Thread(target=self._call_stall_handler,
+                                                  args=(heartbeat, location, stacks_path),
+                                                  name="watchdog-" + heartbeat.name)
+                handler_thread.daemon = True
+                handler_thread.start()
+
+        # The run may be killed soon after a stall; get the buffered log up to here on disk.
+        for handler in logging.getLogger("silk").handlers:
+            handler.flush()
+
+    def _call_stall_handler(self, heartbeat, location, stacks_path):
+        try:
+            heartbeat.stall_handler(location, stacks_path)
+        except Exception:
+            self.logger.exception("Stall handler of %s failed", heartbeat.name)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+
+def start(timeout, output_directory):
+    """Start the watchdog, or update the timeout and output directory of the running one.
+    """
+    global _WATCHDOG
+
+    with _WATCHDOG_LOCK:
+        if _WATCHDOG is None:
+            _WATCHDOG = Watchdog(timeout, output_directory)
+            _WATCHDOG.start()
+        else:
+            _WATCHDOG.timeout = timeout
+            _WATCHDOG.output_directory = output_directory
+
+
+def stop():
+    """Stop the watchdog, if it is running.
+    """
+    global _WATCHDOG
+
+    with _WATCHDOG_LOCK:
+        watchdog, _WATCHDOG = _WATCHDOG, None
+    if watchdog is not None:
+        watchdog.stop()